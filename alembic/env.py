@@ -12,6 +12,11 @@ from src.database.core import Base
 from src.models.user import User
 from src.models.api_provider import ApiProvider
 from src.models.api_key import ApiKey
+from src.models.catalog_version import CatalogVersion
+from src.models.token_revocation import TokenRevocation
+from src.models.used_refresh_token import UsedRefreshToken
+from src.models.chat import Chat
+from src.models.message import Message
 
 from alembic import context
 
@@ -70,7 +75,22 @@ def run_migrations_online() -> None:
     In this scenario we need to create an Engine
     and associate a connection with the context.
 
+    A connection passed in config.attributes["connection"] is used as is,
+    e.g. to migrate a schema inside a transaction of the caller.
+
     """
+    connection = config.attributes.get("connection")
+
+    if connection is not None:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
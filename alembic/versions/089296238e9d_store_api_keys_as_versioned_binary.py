@@ -0,0 +1,101 @@
+"""store api keys as versioned binary
+
+Revision ID: 089296238e9d
+Revises: acb869909cc5
+Create Date: 2026-10-18 07:03:02.294998
+
+"""
+import base64
+import binascii
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '089296238e9d'
+down_revision: Union[str, None] = 'acb869909cc5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column('api_keys', sa.Column('key_blob', sa.LargeBinary(), nullable=True))
+
+    # Convert the hex-encoded Fernet tokens in batches, so a large table is never loaded into memory at once.
+    # The tokens are only re-encoded, not decrypted, they become version 0 of the binary format.
+    connection = op.get_bind()
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, key FROM api_keys WHERE id > :last_id "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).all()
+
+        if not rows:
+            break
+
+        connection.execute(
+            sa.text("UPDATE api_keys SET key_blob = :key_blob WHERE id = :id"),
+            [
+                {
+                    "id": row.id,
+                    "key_blob": b"\x00"
+                    + base64.urlsafe_b64decode(binascii.unhexlify(row.key)),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.drop_column('api_keys', 'key')
+    op.alter_column('api_keys', 'key_blob', new_column_name='key', nullable=False)
+
+
+def downgrade() -> None:
+    op.add_column('api_keys', sa.Column('key_hex', sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    last_id = 0
+
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, key FROM api_keys WHERE id > :last_id "
+                "ORDER BY id LIMIT :batch_size"
+            ),
+            {"last_id": last_id, "batch_size": BATCH_SIZE},
+        ).all()
+
+        if not rows:
+            break
+
+        if any(row.key[0] != 0 for row in rows):
+            # Keys encrypted with AES-GCM cannot be converted back to Fernet tokens without the users' data keys.
+            raise RuntimeError(
+                "Cannot downgrade API keys encrypted with AES-GCM. Delete them first."
+            )
+
+        connection.execute(
+            sa.text("UPDATE api_keys SET key_hex = :key_hex WHERE id = :id"),
+            [
+                {
+                    "id": row.id,
+                    "key_hex": binascii.hexlify(
+                        base64.urlsafe_b64encode(row.key[1:])
+                    ).decode(),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.drop_column('api_keys', 'key')
+    op.alter_column('api_keys', 'key_hex', new_column_name='key', nullable=False)
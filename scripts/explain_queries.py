@@ -0,0 +1,425 @@
+"""
+Query plan regression harness.
+
+Runs every repository query against a local PostgreSQL database seeded with a large number of rows, explains it with
+EXPLAIN (FORMAT JSON) and fails if a sequential scan shows up on any of the large tables, which usually means that
+a query cannot use an index anymore.
+
+Everything happens in a temporary schema inside a single transaction that is rolled back at the end, so the database
+pointed to by DATABASE_URL is left untouched. Still, prefer a local development database. The schema is created by
+running the Alembic migrations up to head.
+
+Usage (from the root directory):
+
+    python -m scripts.explain_queries [--users 100000] [--providers 5] [--keys-per-user 3] [--chats-per-user 2]
+        [--messages-per-chat 10]
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+from typing import Any
+from datetime import datetime, UTC
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import Connection, event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.database.core import engine
+
+from src.models.user import User
+from src.models.api_provider import ApiProvider
+from src.models.api_key import ApiKey
+from src.models.chat import Chat
+from src.models.message import Message
+
+from src.repositories.user import UserRepository
+from src.repositories.api_provider import ApiProviderRepository
+from src.repositories.api_key import ApiKeyRepository
+from src.repositories.token_revocation import TokenRevocationRepository
+from src.repositories.chat import ChatRepository
+from src.repositories.message import MessageRepository
+
+
+SCHEMA = "explain_harness"
+
+# Tables seeded with enough rows for a sequential scan to be a regression. Small lookup tables, like the API
+# providers, are expected to be scanned sequentially.
+LARGE_TABLES = {
+    User.__tablename__,
+    ApiKey.__tablename__,
+    Chat.__tablename__,
+    Message.__tablename__,
+}
+
+# IDs and emails of the seeded rows, see seed().
+_USER_ID = 42
+_EMAIL = "user42@example.com"
+_CHAT_ID = 42
+_NOW = datetime.now(UTC)
+
+# The repository calls whose queries are explained, as (repository, method, arguments). Every repository query should
+# be covered here.
+QUERY_CASES: list[tuple[type, str, tuple]] = [
+    (UserRepository, "get_one_by_id", (_USER_ID,)),
+    (
+        UserRepository,
+        "get_one_with_selected_attributes_by_condition",
+        (["id", "password"], "email", _EMAIL),
+    ),
+    (
+        UserRepository,
+        "get_one_with_selected_attributes_by_condition",
+        (["passphrase_salt", "passphrase_verifier"], "id", _USER_ID),
+    ),
+    (
+        UserRepository,
+        "create",
+        ({"name": "New", "email": "new@example.com", "password": "x"},),
+    ),
+    (
+        UserRepository,
+        "create_if_email_not_exists",
+        ({"name": "New", "email": _EMAIL, "password": "x"},),
+    ),
+    (UserRepository, "update_password_by_id", (_USER_ID, "x")),
+    (UserRepository, "update_profile_by_id", (_USER_ID, {"name": "Renamed"})),
+    (
+        UserRepository,
+        "update_passphrase_by_id",
+        (_USER_ID, {"passphrase_salt": "00"}),
+    ),
+    (ApiProviderRepository, "get_all", ()),
+    (ApiKeyRepository, "get_all_by_user_id", (_USER_ID,)),
+    (ApiKeyRepository, "get_all_fingerprints_by_user_id", (_USER_ID,)),
+    (
+        ApiKeyRepository,
+        "get_one_key_by_user_id_and_api_provider_id",
+        (_USER_ID, 1),
+    ),
+    (
+        ApiKeyRepository,
+        "sync_by_user_id",
+        (
+            _USER_ID,
+            [{"api_provider_id": 1, "key": b"\x01", "fingerprint": b"\x00"}],
+            [1],
+        ),
+    ),
+    (ApiKeyRepository, "delete_all_by_user_id", (_USER_ID,)),
+    (
+        TokenRevocationRepository,
+        "revoke_all_by_user_id",
+        (_USER_ID, _NOW, _NOW),
+    ),
+    (TokenRevocationRepository, "get_all_active_after_id", (0,)),
+    (
+        TokenRevocationRepository,
+        "mark_refresh_token_as_used",
+        ("0" * 32, _USER_ID, _NOW),
+    ),
+    (TokenRevocationRepository, "delete_expired", ()),
+    (
+        ChatRepository,
+        "create_for_user",
+        (_USER_ID, {"title": "New", "api_provider_id": 1, "model": None}),
+    ),
+    (ChatRepository, "get_one_by_user_id_and_id", (_USER_ID, _CHAT_ID)),
+    (ChatRepository, "get_page_by_user_id", (_USER_ID, 21)),
+    (ChatRepository, "get_page_by_user_id", (_USER_ID, 21, (_NOW, _CHAT_ID))),
+    (
+        ChatRepository,
+        "update_by_user_id_and_id",
+        (_USER_ID, _CHAT_ID, {"title": "Renamed"}),
+    ),
+    (ChatRepository, "delete_by_user_id_and_id", (_USER_ID, _CHAT_ID)),
+    (
+        MessageRepository,
+        "create_bulk_in_chat",
+        (
+            _USER_ID,
+            _CHAT_ID,
+            [{"role": "user", "content": "Hi"}] * 2,
+        ),
+    ),
+    (MessageRepository, "get_page_by_chat_id", (_USER_ID, _CHAT_ID, 51)),
+    (
+        MessageRepository,
+        "get_page_by_chat_id",
+        (_USER_ID, _CHAT_ID, 51, 5),
+    ),
+    (
+        MessageRepository,
+        "get_page_by_chat_id",
+        (_USER_ID, _CHAT_ID, 51, None, 5),
+    ),
+    (MessageRepository, "append_content", (_USER_ID, _CHAT_ID, 5, "Hi")),
+    (MessageRepository, "finish_generating", (_USER_ID, _CHAT_ID, 5)),
+    (MessageRepository, "search_by_user_id", (_USER_ID, "message 5", 21)),
+    (
+        MessageRepository,
+        "search_by_user_id",
+        (_USER_ID, "message 5", 21, 1, (0.1, _CHAT_ID, 5)),
+    ),
+    (MessageRepository, "get_all_with_chat_title_by_user_id", (_USER_ID,)),
+    (MessageRepository, "get_all_with_chat_title_by_user_id", (_USER_ID, 1)),
+]
+
+
+def migrate(connection: Connection) -> None:
+    """
+    Run the Alembic migrations up to head on a connection, inside its transaction and search path.
+
+    Args:
+        connection (Connection): The connection holding the harness' transaction.
+
+    Returns:
+        None
+    """
+
+    # Without a config file, Alembic leaves the logging of the harness alone.
+    config = Config()
+    config.set_main_option("script_location", "alembic")
+    config.attributes["connection"] = connection
+
+    command.upgrade(config, "head")
+
+
+async def seed(
+    connection: AsyncConnection,
+    users: int,
+    providers: int,
+    keys_per_user: int,
+    chats_per_user: int,
+    messages_per_chat: int,
+) -> None:
+    """
+    Create the tables in the temporary schema and fill them with rows.
+
+    Args:
+        connection (AsyncConnection): The connection holding the harness' transaction.
+        users (int): The number of users.
+        providers (int): The number of API providers.
+        keys_per_user (int): The number of API keys of every user.
+        chats_per_user (int): The number of chats of every user.
+        messages_per_chat (int): The number of messages of every chat.
+
+    Returns:
+        None
+    """
+
+    await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await connection.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+    # The schema is built by the migrations rather than from the models, so the queries are explained against the
+    # indexes the production database actually has.
+    await connection.run_sync(migrate)
+
+    await connection.execute(
+        text(
+            "INSERT INTO api_providers (name, lowercase_name) "
+            "SELECT 'Provider ' || i, 'provider' || i "
+            "FROM generate_series(1, :providers) AS i"
+        ),
+        {"providers": providers},
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO users (name, email, is_email_verified, password, is_password_reset_requested) "
+            "SELECT 'User ' || i, 'user' || i || '@example.com', false, 'x', false "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": users},
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO api_keys (key, user_id, api_provider_id) "
+            "SELECT '\\x01'::bytea, users.id, api_providers.id "
+            "FROM users CROSS JOIN api_providers "
+            "WHERE api_providers.id <= :keys_per_user"
+        ),
+        {"keys_per_user": keys_per_user},
+    )
+    # The first chat of every user has the same ID as the user.
+    await connection.execute(
+        text(
+            "INSERT INTO chats (user_id, id, api_provider_id, title, last_seq, last_message_at) "
+            "SELECT users.id, users.id + (i - 1) * :users, 1, 'Chat ' || i, :messages_per_chat, "
+            "now() - i * interval '1 minute' "
+            "FROM users CROSS JOIN generate_series(1, :chats_per_user) AS i"
+        ),
+        {
+            "users": users,
+            "chats_per_user": chats_per_user,
+            "messages_per_chat": messages_per_chat,
+        },
+    )
+    await connection.execute(
+        text(
+            "SELECT setval(pg_get_serial_sequence('chats', 'id'), max(id)) FROM chats"
+        )
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO messages (user_id, chat_id, seq, role, content) "
+            "SELECT chats.user_id, chats.id, seq, 'user', 'Message ' || seq "
+            "FROM chats CROSS JOIN generate_series(1, :messages_per_chat) AS seq"
+        ),
+        {"messages_per_chat": messages_per_chat},
+    )
+    await connection.execute(
+        text(
+            f"ANALYZE {User.__tablename__}, {ApiProvider.__tablename__}, {ApiKey.__tablename__}, "
+            f"{Chat.__tablename__}, {Message.__tablename__}"
+        )
+    )
+
+
+def find_sequential_scans(plan: dict) -> list[str]:
+    """
+    Find the tables scanned sequentially anywhere in the plan.
+
+    Args:
+        plan (dict): A node of the JSON query plan.
+
+    Returns:
+        list[str]: The names of the sequentially scanned tables.
+    """
+
+    tables = []
+
+    if plan.get("Node Type") == "Seq Scan":
+        tables.append(plan["Relation Name"])
+    for subplan in plan.get("Plans", []):
+        tables.extend(find_sequential_scans(subplan))
+
+    return tables
+
+
+async def explain_queries(
+    users: int,
+    providers: int,
+    keys_per_user: int,
+    chats_per_user: int,
+    messages_per_chat: int,
+) -> bool:
+    """
+    Seed the database, run all query cases and explain the statements they executed.
+
+    Args:
+        users (int): The number of seeded users.
+        providers (int): The number of seeded API providers.
+        keys_per_user (int): The number of seeded API keys of every user.
+        chats_per_user (int): The number of seeded chats of every user.
+        messages_per_chat (int): The number of seeded messages of every chat.
+
+    Returns:
+        bool: Whether no sequential scan was found on the large tables.
+    """
+
+    captured: list[tuple[str, Any]] = []
+    capturing = False
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if capturing:
+            captured.append(
+                (statement, parameters[0] if executemany else parameters)
+            )
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    is_passing = True
+
+    try:
+        async with engine.connect() as connection:
+            transaction = await connection.begin()
+
+            try:
+                await seed(
+                    connection,
+                    users,
+                    providers,
+                    keys_per_user,
+                    chats_per_user,
+                    messages_per_chat,
+                )
+
+                for repository, method, args in QUERY_CASES:
+                    name = f"{repository.__name__}.{method}"
+                    captured.clear()
+
+                    async with AsyncSession(
+                        bind=connection,
+                        join_transaction_mode="create_savepoint",
+                    ) as db:
+                        capturing = True
+                        try:
+                            await getattr(repository(db), method)(*args)
+                        finally:
+                            capturing = False
+                        await db.rollback()
+
+                    for statement, parameters in captured:
+                        if (
+                            statement.lstrip()
+                            .upper()
+                            .startswith(("SAVEPOINT", "RELEASE", "ROLLBACK"))
+                        ):
+                            continue
+
+                        result = await connection.exec_driver_sql(
+                            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                        )
+                        plan = result.scalar_one()
+                        if isinstance(plan, str):
+                            plan = json.loads(plan)
+
+                        scanned_tables = [
+                            table
+                            for table in find_sequential_scans(plan[0]["Plan"])
+                            if table in LARGE_TABLES
+                        ]
+
+                        if scanned_tables:
+                            is_passing = False
+                            print(
+                                f"FAIL {name}: sequential scan on {', '.join(scanned_tables)}\n"
+                                f"{statement}\n{json.dumps(plan, indent=2)}\n"
+                            )
+                        else:
+                            print(f"ok   {name}")
+            finally:
+                await transaction.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        await engine.dispose()
+
+    return is_passing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fail if a repository query scans a large table sequentially."
+    )
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--providers", type=int, default=5)
+    parser.add_argument("--keys-per-user", type=int, default=3)
+    parser.add_argument("--chats-per-user", type=int, default=2)
+    parser.add_argument("--messages-per-chat", type=int, default=10)
+    args = parser.parse_args()
+
+    is_passing = asyncio.run(
+        explain_queries(
+            args.users,
+            args.providers,
+            args.keys_per_user,
+            args.chats_per_user,
+            args.messages_per_chat,
+        )
+    )
+
+    sys.exit(0 if is_passing else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ from src.routers.auth import router as auth_router
 from src.routers.user import router as user_router
 from src.routers.api_provider import router as api_providers_router
 from src.routers.api_key import router as api_key_router
+from src.routers.chat import router as chat_router
+from src.routers.chat_channel import router as chat_channel_router
+from src.routers.metrics import router as metrics_router
 
 
 api_router = APIRouter(prefix="/api")
@@ -12,3 +15,6 @@ api_router.include_router(auth_router)
 api_router.include_router(user_router)
 api_router.include_router(api_providers_router)
 api_router.include_router(api_key_router)
+api_router.include_router(chat_router)
+api_router.include_router(chat_channel_router)
+api_router.include_router(metrics_router)
@@ -1,3 +1,4 @@
+from typing import Literal, Optional
 from functools import lru_cache
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -9,10 +10,69 @@ class Settings(BaseSettings):
     """
 
     DATABASE_URL: str
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_POOL_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT_IN_SECONDS: float = 30
+    DATABASE_POOL_RECYCLE_IN_SECONDS: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_TIMEOUT_IN_MILLISECONDS: int = 30000
+    DATABASE_PREPARE_THRESHOLD: int = 1
     ALLOWED_ORIGIN: str
     JWT_AUTH_SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_IN_MINUTES: int = 180
+    ACCESS_TOKEN_CACHE_ENABLED: bool = True
+    ACCESS_TOKEN_CACHE_MAX_SIZE: int = 10000
+    REFRESH_TOKEN_EXPIRE_IN_DAYS: int = 14
+    TOKEN_REVOCATION_POLL_INTERVAL_IN_SECONDS: int = 5
+    TOKEN_REVOCATION_PRUNE_INTERVAL_IN_SECONDS: int = 3600
+    CRYPTO_EXECUTOR_KIND: Literal["thread", "process"] = "thread"
+    CRYPTO_EXECUTOR_MAX_WORKERS: Optional[int] = None
+    CRYPTO_EXECUTOR_MAX_QUEUE_SIZE: int = 64
+    CRYPTO_EXECUTOR_RETRY_AFTER_IN_SECONDS: int = 1
+    THROTTLE_ENABLED: bool = True
+    THROTTLE_IP_CAPACITY: float = 30
+    THROTTLE_IP_REFILL_PER_MINUTE: float = 20
+    THROTTLE_ACCOUNT_CAPACITY: float = 10
+    THROTTLE_ACCOUNT_REFILL_PER_MINUTE: float = 5
+    THROTTLE_MAX_LOAD: float = 0.9
+    THROTTLE_MAX_BUCKETS: int = 100000
+    THROTTLE_REDIS_URL: Optional[str] = None
+    PASSWORD_HASH_BCRYPT_ROUNDS: int = 12
+    PASSPHRASE_KDF_ALGORITHM: Literal["pbkdf2-sha256", "scrypt"] = (
+        "pbkdf2-sha256"
+    )
+    PASSPHRASE_KDF_PBKDF2_ITERATIONS: int = 600000
+    PASSPHRASE_KDF_SCRYPT_LOG_N: int = 15
+    PASSPHRASE_KDF_SCRYPT_R: int = 8
+    PASSPHRASE_KDF_SCRYPT_P: int = 1
+    KDF_CALIBRATION_TARGET_IN_MILLISECONDS: Optional[int] = None
+    API_PROVIDER_CATALOG_POLL_INTERVAL_IN_SECONDS: int = 5
+    USER_PROFILE_CACHE_ENABLED: bool = True
+    USER_PROFILE_CACHE_TTL_IN_SECONDS: int = 60
+    USER_PROFILE_CACHE_MAX_SIZE: int = 10000
+    COMPLETION_BASE_URLS: dict[str, str] = {
+        "openai": "https://api.openai.com/v1",
+        "groq": "https://api.groq.com/openai/v1",
+    }
+    COMPLETION_TIMEOUT_IN_SECONDS: float = 120
+    COMPLETION_MAX_HISTORY_MESSAGES: int = 50
+    COMPLETION_FLUSH_INTERVAL_IN_SECONDS: float = 0.5
+    COMPLETION_FLUSH_SIZE_IN_CHARACTERS: int = 2048
+    GENERATION_BUFFER_SIZE_IN_CHARACTERS: int = 16384
+    GENERATION_RETENTION_IN_SECONDS: float = 60
+    GENERATION_MAX_PER_USER: int = 3
+    CHAT_CHANNEL_AUTH_TIMEOUT_IN_SECONDS: float = 10
+    CHAT_CHANNEL_PING_INTERVAL_IN_SECONDS: float = 20
+    CHAT_CHANNEL_IDLE_TIMEOUT_IN_SECONDS: float = 60
+    CHAT_CHANNEL_MAX_STREAMS: int = 4
+    CHAT_CHANNEL_INITIAL_CREDIT: int = 64
+    CHAT_CHANNEL_MAX_CREDIT: int = 1024
+    SEARCH_BACKEND: Literal["postgres", "memory"] = "postgres"
+    VAULT_SESSION_TTL_IN_SECONDS: int = 900
+    VAULT_SESSION_IDLE_TIMEOUT_IN_SECONDS: int = 300
+    VAULT_SESSION_MAX_SESSIONS: int = 10000
+    VAULT_SESSION_MAX_SESSIONS_PER_USER: int = 5
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
@@ -1,34 +1,115 @@
-from typing import Generator
+from typing import AsyncGenerator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 from src.config import settings
 
+from .pool import InstrumentedAsyncAdaptedQueuePool
 
-engine = create_engine(settings.DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+connect_args: dict = {}
+
+if settings.DATABASE_STATEMENT_TIMEOUT_IN_MILLISECONDS:
+    # The timeout is set once per connection by the server, instead of with a SET statement on every checkout.
+    # A value of 0 disables it.
+    connect_args["options"] = (
+        f"-c statement_timeout={settings.DATABASE_STATEMENT_TIMEOUT_IN_MILLISECONDS}"
+    )
+
+# psycopg prepares a statement on the server once it has been executed more times than the threshold on the same
+# connection, so Postgres skips planning the hot queries. A negative value disables server-side prepared statements,
+# which is required behind a connection pooler running in transaction mode.
+connect_args["prepare_threshold"] = (
+    settings.DATABASE_PREPARE_THRESHOLD
+    if settings.DATABASE_PREPARE_THRESHOLD >= 0
+    else None
+)
+
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_POOL_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT_IN_SECONDS,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE_IN_SECONDS,
+    pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+    connect_args=connect_args,
+)
+
+SessionLocal = async_sessionmaker(
+    bind=engine, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 
+# Keys of the session's info dictionary holding the callbacks to run once the unit of work is committed, and the
+# ones to run if it ends without being committed.
+AFTER_COMMIT_CALLBACKS = "after_commit_callbacks"
+AFTER_ROLLBACK_CALLBACKS = "after_rollback_callbacks"
+
+
+async def commit(db: AsyncSession) -> None:
+    """
+    Commit a unit of work and run the callbacks registered by the repositories.
+
+    Args:
+        db (AsyncSession): The database session holding the unit of work.
+
+    Returns:
+        None
+    """
+
+    await db.commit()
+    db.info.pop(AFTER_ROLLBACK_CALLBACKS, None)
+    for callback in db.info.pop(AFTER_COMMIT_CALLBACKS, ()):
+        callback()
+
+
+def discard(db: AsyncSession) -> None:
+    """
+    Drop the after-commit callbacks of a unit of work that ended without being committed and run its after-rollback
+    callbacks. Does nothing once the work is committed.
+
+    Args:
+        db (AsyncSession): The database session holding the unit of work.
+
+    Returns:
+        None
+    """
+
+    db.info.pop(AFTER_COMMIT_CALLBACKS, None)
+    for callback in db.info.pop(AFTER_ROLLBACK_CALLBACKS, ()):
+        callback()
+
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Get a database connection.
 
-    This function is a generator that manages the database session.
-    It initializes a session before performing operations on the database and
-    ensures that the session is closed after the operations are completed,
-    regardless of whether the operations succeed or fail.
+    This function is an asynchronous generator that manages the database session.
+    The session is shared by all repositories used during a single request and acts
+    as its unit of work: repositories only flush their changes, which are committed
+    once the request is handled successfully, or rolled back if it fails.
+    Callbacks registered by the repositories, e.g. to invalidate caches, run only
+    after a successful commit, others only if the work is not committed. The
+    session is always closed after the operations are completed.
 
     Yields:
-        Session: A database connection session object.
+        AsyncSession: A database connection session object.
     """
 
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    async with SessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+        else:
+            await commit(db)
+        finally:
+            discard(db)
@@ -0,0 +1,96 @@
+import time
+import bisect
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default pool of the async engine, additionally recording how long requests wait to check out a connection
+    and how many checkouts fail, e.g. because the pool timeout was reached.
+    """
+
+    # Upper bounds (in seconds) of the checkout wait time histogram buckets, the last bucket is unbounded.
+    WAIT_TIME_BUCKETS: tuple[float, ...] = (
+        0.001,
+        0.005,
+        0.01,
+        0.05,
+        0.1,
+        0.5,
+        1.0,
+        5.0,
+    )
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Initializes the pool. Accepts the same arguments as AsyncAdaptedQueuePool.
+
+        Returns:
+            None
+        """
+
+        super().__init__(*args, **kwargs)
+
+        self._checkouts: int = 0
+        self._checkout_failures: int = 0
+        self._total_wait_time: float = 0.0
+        self._max_wait_time: float = 0.0
+        self._wait_time_histogram: list[int] = [0] * (
+            len(self.WAIT_TIME_BUCKETS) + 1
+        )
+
+    def connect(self) -> PoolProxiedConnection:
+        """
+        Check out a connection from the pool, recording the time it took.
+
+        Returns:
+            PoolProxiedConnection: The checked out connection.
+        """
+
+        started_at = time.perf_counter()
+
+        try:
+            connection = super().connect()
+        except Exception:
+            self._checkout_failures += 1
+            raise
+
+        wait_time = time.perf_counter() - started_at
+        self._checkouts += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+        self._wait_time_histogram[
+            bisect.bisect_left(self.WAIT_TIME_BUCKETS, wait_time)
+        ] += 1
+
+        return connection
+
+    def get_metrics(self) -> dict:
+        """
+        Get the metrics of the pool.
+
+        Returns:
+            dict: The pool size, the number of checked in, checked out and overflow connections, the number of
+                checkouts and failed checkouts, as well as the average and maximum checkout wait time (in seconds)
+                and its histogram.
+        """
+
+        bounds = [*map(str, self.WAIT_TIME_BUCKETS), "+Inf"]
+
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self._max_overflow,
+            "checkouts": self._checkouts,
+            "checkout_failures": self._checkout_failures,
+            "average_wait_time": (
+                self._total_wait_time / self._checkouts
+                if self._checkouts
+                else 0.0
+            ),
+            "max_wait_time": self._max_wait_time,
+            "wait_time_histogram": dict(zip(bounds, self._wait_time_histogram)),
+        }
@@ -1,14 +1,21 @@
 from typing import Annotated
 
-from fastapi import Depends, Security
+from fastapi import Depends, Request, Security
+from fastapi.security import OAuth2PasswordRequestForm
 
 from src.services.auth import AuthService
 from src.services.user import UserService
 from src.services.api_provider import ApiProviderService
 from src.services.api_key import ApiKeyService
+from src.services.token import TokenService
+from src.services.chat import ChatService
+from src.services.message import MessageService
+from src.services.completion import CompletionService
 
 from src.schemas.auth import AuthCurrentUser
 
+from src.utils.throttle import throttle
+
 
 AuthServiceDependency = Annotated[AuthService, Depends(AuthService)]
 UserServiceDependency = Annotated[UserService, Depends(UserService)]
@@ -16,7 +23,50 @@ ApiProviderServiceDependency = Annotated[
     ApiProviderService, Depends(ApiProviderService)
 ]
 ApiKeyServiceDependency = Annotated[ApiKeyService, Depends(ApiKeyService)]
+TokenServiceDependency = Annotated[TokenService, Depends(TokenService)]
+ChatServiceDependency = Annotated[ChatService, Depends(ChatService)]
+MessageServiceDependency = Annotated[MessageService, Depends(MessageService)]
+CompletionServiceDependency = Annotated[
+    CompletionService, Depends(CompletionService)
+]
 
 AuthDependency = Annotated[
     AuthCurrentUser, Security(AuthService.get_current_user)
 ]
+
+
+def _get_client_ip(request: Request) -> str | None:
+    """
+    Get the IP address of the client. Behind a reverse proxy, run uvicorn with --proxy-headers and
+    --forwarded-allow-ips, so it is taken from the X-Forwarded-For header set by the proxy.
+    """
+
+    return request.client.host if request.client else None
+
+
+async def throttle_by_client(request: Request) -> None:
+    """
+    Throttle a CPU-heavy request by the client's IP address.
+    """
+
+    await throttle.check(_get_client_ip(request))
+
+
+async def throttle_login(
+    request: Request, payload: Annotated[OAuth2PasswordRequestForm, Depends()]
+) -> None:
+    """
+    Throttle a login attempt by the client's IP address and by the email it is made for.
+    """
+
+    await throttle.check(
+        _get_client_ip(request), f"email:{payload.username.strip().lower()}"
+    )
+
+
+async def throttle_by_user(request: Request, auth: AuthDependency) -> None:
+    """
+    Throttle a CPU-heavy request by the client's IP address and by the authenticated user.
+    """
+
+    await throttle.check(_get_client_ip(request), f"user:{auth.user_id}")
@@ -1,11 +1,149 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api import api_router
 from .config import settings
+from .database.core import SessionLocal
+from .repositories.api_provider import ApiProviderRepository
+from .repositories.token_revocation import TokenRevocationRepository
+from .services.api_provider import ApiProviderService
+from .services.token import TokenService
+from .utils.kdf import calibrate_kdf_parameters, calibrate_bcrypt_rounds
+from .utils.hash import hash_util
+from .utils.passphrase import passphrase_util
+from .utils.crypto_executor import crypto_executor
+from .utils.completion import completion_client
+from .utils.generation import generation_registry
+
+
+logger = logging.getLogger(__name__)
+
+
+async def refresh_api_provider_catalog() -> None:
+    """
+    Reload the API provider catalog if it changed, using a session of its own.
+    """
+
+    async with SessionLocal() as db:
+        await ApiProviderService(ApiProviderRepository(db)).refresh_catalog()
+
+
+async def refresh_token_revocation_list() -> None:
+    """
+    Load the token revocations added by any worker since the last refresh, using a session of its own.
+    """
+
+    async with SessionLocal() as db:
+        await TokenService(
+            TokenRevocationRepository(db)
+        ).refresh_revocation_list()
+
+
+async def delete_expired_token_revocations() -> None:
+    """
+    Delete the expired token revocations and used refresh tokens, using a session of its own.
+    """
+
+    async with SessionLocal() as db:
+        await TokenService(TokenRevocationRepository(db)).delete_expired()
+        await db.commit()
+
+
+async def poll(
+    refresh: Callable[[], Awaitable[None]],
+    interval_in_seconds: float,
+    error_message: str,
+) -> None:
+    """
+    Periodically run a refresh, so changes made by other workers are picked up. Failures are logged and retried
+    in the next interval.
+    """
+
+    while True:
+        await asyncio.sleep(interval_in_seconds)
+        try:
+            await refresh()
+        except Exception:
+            logger.exception(error_message)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manage the resources living as long as the application.
+    """
+
+    if settings.KDF_CALIBRATION_TARGET_IN_MILLISECONDS:
+        # Runs before the crypto executor starts its workers, so they are created with the calibrated parameters.
+        target_in_seconds = (
+            settings.KDF_CALIBRATION_TARGET_IN_MILLISECONDS / 1000
+        )
+
+        passphrase_util.kdf_parameters = calibrate_kdf_parameters(
+            passphrase_util.kdf_parameters, target_in_seconds
+        )
+        hash_util.configure(
+            calibrate_bcrypt_rounds(
+                hash_util.create_hash,
+                hash_util.bcrypt_rounds,
+                target_in_seconds,
+            )
+        )
+
+    try:
+        await refresh_api_provider_catalog()
+    except Exception:
+        # The catalog is loaded lazily on the first request instead.
+        logger.exception("Failed to load the API provider catalog")
+    try:
+        await refresh_token_revocation_list()
+    except Exception:
+        # Until the first poll succeeds, tokens revoked by other workers are still accepted.
+        logger.exception("Failed to load the token revocation list")
+
+    poll_tasks = [
+        asyncio.create_task(
+            poll(
+                refresh_api_provider_catalog,
+                settings.API_PROVIDER_CATALOG_POLL_INTERVAL_IN_SECONDS,
+                "Failed to refresh the API provider catalog",
+            )
+        ),
+        asyncio.create_task(
+            poll(
+                refresh_token_revocation_list,
+                settings.TOKEN_REVOCATION_POLL_INTERVAL_IN_SECONDS,
+                "Failed to refresh the token revocation list",
+            )
+        ),
+        asyncio.create_task(
+            poll(
+                delete_expired_token_revocations,
+                settings.TOKEN_REVOCATION_PRUNE_INTERVAL_IN_SECONDS,
+                "Failed to delete the expired token revocations",
+            )
+        ),
+    ]
+
+    yield
+
+    for poll_task in poll_tasks:
+        poll_task.cancel()
+    for poll_task in poll_tasks:
+        with suppress(asyncio.CancelledError):
+            await poll_task
+    # Stores what was generated so far before the connections to the API providers are closed.
+    await generation_registry.cancel_all()
+    await completion_client.aclose()
+    crypto_executor.shutdown()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +151,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 app.include_router(api_router)
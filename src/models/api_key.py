@@ -1,7 +1,13 @@
 import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, UniqueConstraint, ForeignKey, func
+from sqlalchemy import (
+    DateTime,
+    LargeBinary,
+    UniqueConstraint,
+    ForeignKey,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database.core import Base
@@ -15,10 +21,14 @@ if TYPE_CHECKING:
 
 class ApiKey(Base):
     __tablename__ = "api_keys"
-    __table_args__ = (UniqueConstraint("api_provider_id", "user_id"),)
+    # user_id leads the constraint's index, so it also serves all the lookups of a user's API keys.
+    __table_args__ = (UniqueConstraint("user_id", "api_provider_id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    key: Mapped[str]
+    # Raw ciphertext prefixed with a version byte, see CipherUtil.
+    key: Mapped[bytes] = mapped_column(LargeBinary)
+    # Keyed HMAC of the plaintext key, see CipherUtil.fingerprint_many.
+    fingerprint: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     api_provider_id: Mapped[int] = mapped_column(ForeignKey("api_providers.id"))
     created_at: Mapped[datetime.datetime] = mapped_column(
@@ -0,0 +1,13 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.core import Base
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    # The name of the cached catalog, e.g. "api_providers".
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # Bumped on every change of the catalog, so workers can cheaply tell whether their copy is stale.
+    version: Mapped[int] = mapped_column(default=0)
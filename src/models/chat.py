@@ -0,0 +1,51 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    String,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.core import Base
+
+
+class Chat(Base):
+    __tablename__ = "chats"
+    # Serves listing the user's most recently active chats page by page, without touching their messages.
+    __table_args__ = (
+        Index(
+            "ix_chats_user_id_last_message_at_id",
+            "user_id",
+            "last_message_at",
+            "id",
+        ),
+    )
+
+    # Chats are always accessed through their user, so the user's ID leads the primary key.
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"), primary_key=True
+    )
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    api_provider_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("api_providers.id", ondelete="SET NULL")
+    )
+    title: Mapped[str] = mapped_column(String(255))
+    # The name of the model used by the API provider, e.g. "gpt-4o".
+    model: Mapped[Optional[str]] = mapped_column(String(100))
+    # The sequence number of the chat's last message, the next message gets the following one.
+    last_seq: Mapped[int] = mapped_column(default=0)
+    last_message_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
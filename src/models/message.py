@@ -0,0 +1,63 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Computed,
+    DateTime,
+    ForeignKeyConstraint,
+    Index,
+    String,
+    Text,
+    false,
+    func,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.core import Base
+
+
+# The text search configuration the messages are indexed and searched with.
+SEARCH_CONFIG = "english"
+
+
+class Message(Base):
+    __tablename__ = "messages"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["user_id", "chat_id"],
+            ["chats.user_id", "chats.id"],
+            ondelete="CASCADE",
+        ),
+        Index(
+            "ix_messages_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+    )
+
+    # The primary key keeps the messages of a chat together and in order, so a page of them is a single index range.
+    user_id: Mapped[int] = mapped_column(primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    seq: Mapped[int] = mapped_column(primary_key=True)
+    # Either "system", "user" or "assistant".
+    role: Mapped[str] = mapped_column(String(20))
+    content: Mapped[str] = mapped_column(Text)
+    # The name of the model which generated an assistant message.
+    model: Mapped[Optional[str]] = mapped_column(String(100))
+    # Whether an assistant message is still being generated and stored in batches. Workers that don't generate it
+    # follow it in the database until the flag is cleared.
+    is_generating: Mapped[bool] = mapped_column(
+        default=False, server_default=false()
+    )
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # The lexemes of the content, kept up to date by Postgres whenever the content is inserted or updated.
+    # Only used to search the messages, so it isn't loaded with them.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True),
+        deferred=True,
+    )
@@ -0,0 +1,22 @@
+import datetime
+
+from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.database.core import Base
+
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+
+    # Workers poll for revocations with an ID higher than the last one they loaded.
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # All tokens of the user issued before this time are revoked.
+    revoked_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True)
+    )
+    # All tokens affected by the revocation have expired after this time, so it can be deleted.
+    expires_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
@@ -24,6 +24,9 @@ class User(Base):
     is_password_reset_requested: Mapped[bool] = mapped_column(default=False)
     passphrase: Mapped[Optional[str]]
     passphrase_salt: Mapped[Optional[str]]
+    passphrase_verifier: Mapped[Optional[str]]
+    passphrase_kdf: Mapped[Optional[str]]
+    encrypted_data_key: Mapped[Optional[str]]
     created_at: Mapped[datetime.datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
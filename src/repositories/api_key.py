@@ -1,7 +1,9 @@
 from typing import Sequence
 
-from sqlalchemy import select, insert, update, delete, or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Integer, select, delete, bindparam, func, all_
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import Depends
 
@@ -17,12 +19,12 @@ class ApiKeyRepository(BaseRepository[ApiKey]):
     Repository for api key database related operations.
     """
 
-    def __init__(self, db: Session = Depends(get_db)) -> None:
+    def __init__(self, db: AsyncSession = Depends(get_db)) -> None:
         """
         Initialize the repository with a database session.
 
         Args:
-            db (Session): Database session.
+            db (AsyncSession): Database session.
 
         Returns:
             None
@@ -30,77 +32,127 @@ class ApiKeyRepository(BaseRepository[ApiKey]):
 
         super().__init__(db, ApiKey)
 
-    def create_bulk(self, api_keys: list[dict]) -> None:
+    async def get_all_by_user_id(self, user_id: int) -> Sequence[ApiKey]:
         """
-        Create multiple API keys in the database.
+        Get all user's API keys by user ID.
 
         Args:
-            api_keys (list[dict]): A list of API key dictionaries.
+            user_id (int): The user's ID.
 
         Returns:
-            None
+            Sequence[ApiKey]: A sequence of API key objects containing the key, API provider name and lowercase name.
         """
 
-        self.db.execute(insert(self.model), api_keys)
-        self.db.commit()
+        return (
+            await self.db.scalars(
+                select(self.model)
+                .options(joinedload(self.model.api_provider))
+                .where(self.model.user_id == user_id)
+            )
+        ).all()
 
-    def get_all_by_user_id(self, user_id: int) -> Sequence[ApiKey]:
+    async def get_one_key_by_user_id_and_api_provider_id(
+        self, user_id: int, api_provider_id: int
+    ) -> bytes | None:
         """
-        Get all user's API keys by user ID.
+        Get the encrypted key of the user's API key for an API provider.
 
         Args:
             user_id (int): The user's ID.
+            api_provider_id (int): The API provider's ID.
 
         Returns:
-            Sequence[ApiKey]: A sequence of API key objects containing the key, API provider name and lowercase name.
+            bytes | None: The encrypted key or None if the user has no API key for the API provider.
         """
 
-        return self.db.scalars(
-            select(self.model)
-            .options(joinedload(self.model.api_provider))
-            .where(self.model.user_id == user_id)
-        ).all()
+        return await self.db.scalar(
+            select(self.model.key).where(
+                self.model.user_id == user_id,
+                self.model.api_provider_id == api_provider_id,
+            )
+        )
 
-    def update_bulk(self, api_keys: list[dict]) -> None:
+    async def get_all_fingerprints_by_user_id(
+        self, user_id: int
+    ) -> Sequence[ApiKey]:
         """
-        Update multiple API keys in the database.
+        Get the IDs, API provider IDs and fingerprints of all user's API keys by user ID, without loading
+        the encrypted keys themselves.
 
         Args:
-            api_keys (list[dict]): A list of API key dictionaries.
+            user_id (int): The user's ID.
 
         Returns:
-            None
+            Sequence[ApiKey]: A sequence of API key objects containing the ID, API provider ID and fingerprint.
         """
 
-        self.db.execute(update(self.model), api_keys)
-        self.db.commit()
+        return (
+            await self.db.scalars(
+                select(self.model)
+                .options(
+                    load_only(
+                        self.model.id,
+                        self.model.api_provider_id,
+                        self.model.fingerprint,
+                        raiseload=True,
+                    )
+                )
+                .where(self.model.user_id == user_id)
+            )
+        ).all()
 
-    def delete_selected_by_user_id(
-        self, user_id: int, api_keys: list[dict]
+    async def sync_by_user_id(
+        self,
+        user_id: int,
+        api_keys: list[dict],
+        api_provider_ids_to_keep: list[int] | None,
     ) -> None:
         """
-        Delete selected API keys by user ID.
+        Synchronize the user's API keys with the given ones in a single transaction. Keys are inserted or, if the user
+        already has a key for the same API provider, overwritten. Optionally, the keys of all other API providers
+        are deleted in the same transaction.
 
         Args:
             user_id (int): The user's ID.
-            api_keys (list[dict]): A list of API key dictionaries to delete.
+            api_keys (list[dict]): A list of API key dictionaries to insert or overwrite, each containing the API
+                provider ID, the encrypted key and its fingerprint.
+            api_provider_ids_to_keep (list[int] | None): The IDs of the API providers whose keys are kept, keys of
+                any other API provider are deleted. Nothing is deleted if None.
 
         Returns:
             None
         """
 
-        conditions = [self.model.id == api_key["id"] for api_key in api_keys]
-
-        stmt = (
-            delete(self.model)
-            .where(self.model.user_id == user_id)
-            .where(or_(*conditions))
-        )
-
-        self.db.execute(stmt)
-        self.db.commit()
-
-    def delete_all_by_user_id(self, user_id: int) -> None:
+        if api_keys:
+            stmt = insert(self.model)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[self.model.user_id, self.model.api_provider_id],
+                set_={
+                    "key": stmt.excluded.key,
+                    "fingerprint": stmt.excluded.fingerprint,
+                    # The ORM's onupdate is not applied to the DO UPDATE clause.
+                    "updated_at": func.now(),
+                },
+            )
+
+            await self.db.execute(
+                stmt, [{**api_key, "user_id": user_id} for api_key in api_keys]
+            )
+
+        if api_provider_ids_to_keep is not None:
+            # A single array parameter keeps the statement the same regardless of the number of providers.
+            await self.db.execute(
+                delete(self.model)
+                .where(self.model.user_id == user_id)
+                .where(
+                    self.model.api_provider_id
+                    != all_(bindparam("api_provider_ids", type_=ARRAY(Integer)))
+                ),
+                {"api_provider_ids": api_provider_ids_to_keep},
+                execution_options={"synchronize_session": False},
+            )
+
+    async def delete_all_by_user_id(self, user_id: int) -> None:
         """
         Delete all user's API keys by user ID.
 
@@ -111,5 +163,6 @@ class ApiKeyRepository(BaseRepository[ApiKey]):
             None
         """
 
-        self.db.execute(delete(self.model).where(self.model.user_id == user_id))
-        self.db.commit()
+        await self.db.execute(
+            delete(self.model).where(self.model.user_id == user_id)
+        )
@@ -1,13 +1,16 @@
 from typing import Sequence
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import load_only
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import Depends
 
 from src.database.core import get_db
 
 from src.models.api_provider import ApiProvider
+from src.models.catalog_version import CatalogVersion
 
 from .base import BaseRepository
 
@@ -17,12 +20,12 @@ class ApiProviderRepository(BaseRepository[ApiProvider]):
     Repository for api provider database related operations.
     """
 
-    def __init__(self, db: Session = Depends(get_db)) -> None:
+    def __init__(self, db: AsyncSession = Depends(get_db)) -> None:
         """
         Initialize the repository with a database session.
 
         Args:
-            db (Session): Database session.
+            db (AsyncSession): Database session.
 
         Returns:
             None
@@ -30,16 +33,58 @@ class ApiProviderRepository(BaseRepository[ApiProvider]):
 
         super().__init__(db, ApiProvider)
 
-    def get_all(self) -> Sequence[ApiProvider]:
+    async def get_all(self) -> Sequence[ApiProvider]:
         """
         Get all API providers.
 
         Returns:
-            Sequence[ApiProvider]: A sequence of API provider objects containing the name of the provider.
+            Sequence[ApiProvider]: A sequence of API provider objects containing the ID, name and lowercase name of
+                the provider.
         """
 
-        return self.db.scalars(
-            select(self.model).options(
-                load_only(self.model.name, self.model.id)
+        return (
+            await self.db.scalars(
+                select(self.model).options(
+                    load_only(
+                        self.model.name,
+                        self.model.id,
+                        self.model.lowercase_name,
+                    )
+                )
             )
         ).all()
+
+    async def get_catalog_version(self) -> int:
+        """
+        Get the current version of the API provider catalog.
+
+        Returns:
+            int: The version of the catalog.
+        """
+
+        version = await self.db.scalar(
+            select(CatalogVersion.version).where(
+                CatalogVersion.name == self.model.__tablename__
+            )
+        )
+
+        return version or 0
+
+    async def bump_catalog_version(self) -> None:
+        """
+        Increment the version of the API provider catalog, so all workers reload their copy of it.
+
+        Returns:
+            None
+        """
+
+        stmt = insert(CatalogVersion).values(
+            name=self.model.__tablename__, version=1
+        )
+
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CatalogVersion.name],
+                set_={"version": CatalogVersion.version + 1},
+            )
+        )
@@ -1,5 +1,44 @@
-from sqlalchemy import select
-from sqlalchemy.orm import Session, load_only
+from typing import Callable
+from functools import lru_cache
+
+from sqlalchemy import Select, select, bindparam
+from sqlalchemy.orm import load_only
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
+
+from src.database.core import (
+    AFTER_COMMIT_CALLBACKS,
+    AFTER_ROLLBACK_CALLBACKS,
+)
+
+
+@lru_cache(maxsize=256)
+def _build_select_with_selected_attributes(
+    model: type, attributes_to_fetch: tuple[str, ...], filter_attribute: str
+) -> Select:
+    """
+    Build a statement selecting the given attributes of an entity filtered by a single attribute.
+
+    The filter value is a bound parameter named "filter_value", so the statement is built only once for every
+    combination of model, attributes and filter attribute. Reusing the same statement object also lets SQLAlchemy
+    skip compiling it again, and produces the same SQL, so the driver can prepare it on the server.
+
+    Args:
+        model (type): The model of the entity.
+        attributes_to_fetch (tuple[str, ...]): The attributes to retrieve from the entity.
+        filter_attribute (str): The attribute to use for filtering.
+
+    Returns:
+        Select: The statement.
+    """
+
+    selected_attributes = [getattr(model, attr) for attr in attributes_to_fetch]
+    filter_column = getattr(model, filter_attribute)
+
+    return (
+        select(model)
+        .options(load_only(*selected_attributes, raiseload=True))
+        .where(filter_column == bindparam("filter_value"))
+    )
 
 
 class BaseRepository[T]:
@@ -7,14 +46,17 @@ class BaseRepository[T]:
     Base repository for database related operations.
 
     All repositories should inherit from this class.
+
+    Repositories never commit. Their changes are part of the request's unit of work,
+    committed or rolled back as a whole by the get_db dependency.
     """
 
-    def __init__(self, db: Session, model: type[T]) -> None:
+    def __init__(self, db: AsyncSession, model: type[T]) -> None:
         """
         Initialize the repository with a database session.
 
         Args:
-            db (Session): Database session.
+            db (AsyncSession): Database session.
 
         Returns:
             None
@@ -23,7 +65,7 @@ class BaseRepository[T]:
         self.db = db
         self.model = model
 
-    def create(self, payload: dict) -> None:
+    async def create(self, payload: dict) -> None:
         """
         Create a new record in the database.
 
@@ -35,9 +77,50 @@ class BaseRepository[T]:
         """
 
         self.db.add(self.model(**payload))
-        self.db.commit()
+        await self.db.flush()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback to run once the request's unit of work is committed, e.g. to invalidate a cache
+        only after the change is visible to other requests. The callback is dropped if the work is rolled back.
+
+        Args:
+            callback (Callable[[], None]): The callback.
 
-    def get_one_by_id(self, entity_id: int) -> T:
+        Returns:
+            None
+        """
+
+        self.db.info.setdefault(AFTER_COMMIT_CALLBACKS, []).append(callback)
+
+    def after_rollback(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback to run if the request's unit of work ends without being committed, e.g. to give back a
+        resource reserved for it. The callback is dropped once the work is committed.
+
+        Args:
+            callback (Callable[[], None]): The callback.
+
+        Returns:
+            None
+        """
+
+        self.db.info.setdefault(AFTER_ROLLBACK_CALLBACKS, []).append(callback)
+
+    def savepoint(self) -> AsyncSessionTransaction:
+        """
+        Begin a savepoint, to be used as an async context manager.
+
+        If the block raises an exception, only the changes made inside it are rolled back,
+        while the rest of the request's unit of work can still be committed.
+
+        Returns:
+            AsyncSessionTransaction: The nested transaction.
+        """
+
+        return self.db.begin_nested()
+
+    async def get_one_by_id(self, entity_id: int) -> T:
         """
         Get an entity from the database by its ID.
 
@@ -48,9 +131,9 @@ class BaseRepository[T]:
             T: The entity retrieved from the database.
         """
 
-        return self.db.get_one(self.model, entity_id)
+        return await self.db.get_one(self.model, entity_id)
 
-    def get_one_with_selected_attributes_by_condition(
+    async def get_one_with_selected_attributes_by_condition(
         self,
         attributes_to_fetch: list[str],
         filter_attribute: str,
@@ -68,18 +151,13 @@ class BaseRepository[T]:
             T: The entity retrieved from the database.
         """
 
-        selected_attributes = [
-            getattr(self.model, attr) for attr in attributes_to_fetch
-        ]
-        filter_column = getattr(self.model, filter_attribute)
-
-        return self.db.scalar(
-            select(self.model)
-            .options(load_only(*selected_attributes, raiseload=True))
-            .where(filter_column == filter_value)
+        stmt = _build_select_with_selected_attributes(
+            self.model, tuple(attributes_to_fetch), filter_attribute
         )
 
-    def delete_by_id(self, entity_id: int) -> None:
+        return await self.db.scalar(stmt, {"filter_value": filter_value})
+
+    async def delete_by_id(self, entity_id: int) -> None:
         """
         Delete an entity from the database by its ID.
 
@@ -90,5 +168,5 @@ class BaseRepository[T]:
             None
         """
 
-        self.db.delete(self.db.get_one(self.model, entity_id))
-        self.db.commit()
+        await self.db.delete(await self.db.get_one(self.model, entity_id))
+        await self.db.flush()
@@ -0,0 +1,149 @@
+import datetime
+from typing import Sequence
+
+from sqlalchemy import select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi import Depends
+
+from src.database.core import get_db
+
+from src.models.chat import Chat
+
+from .base import BaseRepository
+
+
+class ChatRepository(BaseRepository[Chat]):
+    """
+    Repository for chat database related operations.
+    """
+
+    def __init__(self, db: AsyncSession = Depends(get_db)) -> None:
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db (AsyncSession): Database session.
+
+        Returns:
+            None
+        """
+
+        super().__init__(db, Chat)
+
+    async def create_for_user(self, user_id: int, payload: dict) -> Chat:
+        """
+        Create a new chat of a user.
+
+        Args:
+            user_id (int): User id.
+            payload (dict): Payload containing the chat's title, API provider's ID and model.
+
+        Returns:
+            Chat: The created chat.
+        """
+
+        return await self.db.scalar(
+            insert(self.model)
+            .values(user_id=user_id, **payload)
+            .returning(self.model)
+        )
+
+    async def get_one_by_user_id_and_id(
+        self, user_id: int, chat_id: int
+    ) -> Chat | None:
+        """
+        Get a chat of a user.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+
+        Returns:
+            Chat | None: The chat or None if the user has no chat with this ID.
+        """
+
+        return await self.db.get(self.model, (user_id, chat_id))
+
+    async def get_page_by_user_id(
+        self,
+        user_id: int,
+        limit: int,
+        after: tuple[datetime.datetime, int] | None = None,
+    ) -> Sequence[Chat]:
+        """
+        Get a page of a user's chats, the most recently active ones first.
+
+        Keyset pagination: the page starts right after the last chat of the previous page, so every page costs the
+        same regardless of how deep it is.
+
+        Args:
+            user_id (int): User id.
+            limit (int): The maximum number of chats.
+            after (tuple[datetime.datetime, int] | None): The time of the last message and the ID of the last chat
+                of the previous page. Defaults to None, which gets the first page.
+
+        Returns:
+            Sequence[Chat]: A sequence of chats.
+        """
+
+        stmt = select(self.model).where(self.model.user_id == user_id)
+
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(self.model.last_message_at, self.model.id)
+                < tuple_(*after)
+            )
+
+        return (
+            await self.db.scalars(
+                stmt.order_by(
+                    self.model.last_message_at.desc(), self.model.id.desc()
+                ).limit(limit)
+            )
+        ).all()
+
+    async def update_by_user_id_and_id(
+        self, user_id: int, chat_id: int, payload: dict
+    ) -> Chat | None:
+        """
+        Update a chat of a user.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+            payload (dict): The payload containing the fields to update, e.g. the title.
+
+        Returns:
+            Chat | None: The updated chat or None if the user has no chat with this ID.
+        """
+
+        return await self.db.scalar(
+            update(self.model)
+            .where(self.model.user_id == user_id, self.model.id == chat_id)
+            .values(payload)
+            .returning(self.model)
+        )
+
+    async def delete_by_user_id_and_id(
+        self, user_id: int, chat_id: int
+    ) -> bool:
+        """
+        Delete a chat of a user together with its messages.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+
+        Returns:
+            bool: Whether the chat was deleted.
+        """
+
+        result = await self.db.execute(
+            delete(self.model).where(
+                self.model.user_id == user_id, self.model.id == chat_id
+            )
+        )
+
+        return result.rowcount == 1
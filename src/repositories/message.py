@@ -0,0 +1,346 @@
+from typing import Sequence
+
+from sqlalchemy import (
+    ColumnElement,
+    Double,
+    Row,
+    Select,
+    select,
+    update,
+    func,
+    cast,
+    and_,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi import Depends
+
+from src.database.core import get_db
+
+from src.models.chat import Chat
+from src.models.message import Message, SEARCH_CONFIG
+
+from .base import BaseRepository
+
+
+class MessageRepository(BaseRepository[Message]):
+    """
+    Repository for message database related operations.
+    """
+
+    def __init__(self, db: AsyncSession = Depends(get_db)) -> None:
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db (AsyncSession): Database session.
+
+        Returns:
+            None
+        """
+
+        super().__init__(db, Message)
+
+    async def create_bulk_in_chat(
+        self, user_id: int, chat_id: int, messages: list[dict]
+    ) -> int | None:
+        """
+        Append messages to a chat of a user.
+
+        The chat's last sequence number is advanced by the number of messages in a single statement, which also
+        locks the chat's row until the transaction ends, so concurrent appends get consecutive, non-overlapping
+        sequence numbers. All messages are then inserted in a single batch.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+            messages (list[dict]): The messages, each containing the role, the content and optionally the model.
+
+        Returns:
+            int | None: The sequence number of the first appended message or None if the user has no chat with
+                this ID.
+        """
+
+        last_seq = await self.db.scalar(
+            update(Chat)
+            .where(Chat.user_id == user_id, Chat.id == chat_id)
+            .values(
+                last_seq=Chat.last_seq + len(messages),
+                last_message_at=func.now(),
+            )
+            .returning(Chat.last_seq)
+        )
+
+        if last_seq is None:
+            return None
+
+        first_seq = last_seq - len(messages) + 1
+
+        await self.db.execute(
+            insert(self.model),
+            [
+                {
+                    "user_id": user_id,
+                    "chat_id": chat_id,
+                    "seq": first_seq + index,
+                    **message,
+                }
+                for index, message in enumerate(messages)
+            ],
+        )
+
+        return first_seq
+
+    async def get_page_by_chat_id(
+        self,
+        user_id: int,
+        chat_id: int,
+        limit: int,
+        before_seq: int | None = None,
+        after_seq: int | None = None,
+    ) -> Sequence[Message]:
+        """
+        Get a page of messages of a user's chat, in the order they were sent.
+
+        Keyset pagination: without after_seq, the page ends right before before_seq (or with the last message),
+        otherwise it starts right after after_seq. Either way, it is a single range of the primary key.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+            limit (int): The maximum number of messages.
+            before_seq (int | None): The sequence number the page ends before. Defaults to None.
+            after_seq (int | None): The sequence number the page starts after. Defaults to None.
+
+        Returns:
+            Sequence[Message]: A sequence of messages ordered by their sequence number.
+        """
+
+        stmt = select(self.model).where(
+            self.model.user_id == user_id, self.model.chat_id == chat_id
+        )
+
+        if before_seq is not None:
+            stmt = stmt.where(self.model.seq < before_seq)
+        if after_seq is not None:
+            return (
+                await self.db.scalars(
+                    stmt.where(self.model.seq > after_seq)
+                    .order_by(self.model.seq)
+                    .limit(limit)
+                )
+            ).all()
+
+        messages = (
+            await self.db.scalars(
+                stmt.order_by(self.model.seq.desc()).limit(limit)
+            )
+        ).all()
+
+        return messages[::-1]
+
+    async def append_content(
+        self, user_id: int, chat_id: int, seq: int, content: str
+    ) -> None:
+        """
+        Append text to the content of a message, e.g. a batch of tokens of an answer that is still being generated.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+            seq (int): The message's sequence number.
+            content (str): The text to append.
+
+        Returns:
+            None
+        """
+
+        await self.db.execute(
+            update(self.model)
+            .where(
+                self.model.user_id == user_id,
+                self.model.chat_id == chat_id,
+                self.model.seq == seq,
+            )
+            .values(content=self.model.content + content)
+        )
+
+    async def finish_generating(
+        self, user_id: int, chat_id: int, seq: int
+    ) -> None:
+        """
+        Mark an answer as no longer being generated, once all of it that was generated is stored.
+
+        Args:
+            user_id (int): User id.
+            chat_id (int): Chat id.
+            seq (int): The answer's sequence number.
+
+        Returns:
+            None
+        """
+
+        await self.db.execute(
+            update(self.model)
+            .where(
+                self.model.user_id == user_id,
+                self.model.chat_id == chat_id,
+                self.model.seq == seq,
+            )
+            .values(is_generating=False)
+        )
+
+    def _select_with_chat_title(self, *columns) -> Select:
+        """
+        Build a statement selecting the messages together with the titles of their chats.
+
+        Args:
+            *columns: Additional columns to select.
+
+        Returns:
+            Select: The statement.
+        """
+
+        return select(
+            self.model.chat_id,
+            Chat.title.label("chat_title"),
+            self.model.seq,
+            self.model.role,
+            self.model.model,
+            self.model.created_at,
+            *columns,
+        ).join(
+            Chat,
+            and_(
+                Chat.user_id == self.model.user_id,
+                Chat.id == self.model.chat_id,
+            ),
+        )
+
+    @staticmethod
+    def _escape_html(content: ColumnElement[str]) -> ColumnElement[str]:
+        """
+        Escape the characters of a text that are special in HTML, like html.escape(text, quote=False) does.
+
+        The text search parser reads the resulting entities as entities rather than words, so they are neither
+        matched nor split.
+
+        Args:
+            content (ColumnElement[str]): The text.
+
+        Returns:
+            ColumnElement[str]: The escaped text.
+        """
+
+        for character, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+            content = func.replace(content, character, entity)
+
+        return content
+
+    async def search_by_user_id(
+        self,
+        user_id: int,
+        query: str,
+        limit: int,
+        api_provider_id: int | None = None,
+        after: tuple[float, int, int] | None = None,
+    ) -> Sequence[Row]:
+        """
+        Search the messages of all chats of a user by their content, the best matches first.
+
+        The query is a web search style query, e.g. `"exact phrase" or word -excluded`. Matches are found with the
+        GIN index of the search vectors and ranked with ts_rank. Keyset pagination: the page starts right after the
+        last match of the previous page. The snippets are only highlighted for the matches of the page, after the
+        content is HTML-escaped.
+
+        Args:
+            user_id (int): User id.
+            query (str): The query.
+            limit (int): The maximum number of matches.
+            api_provider_id (int | None): Only search the chats of this API provider. Defaults to None.
+            after (tuple[float, int, int] | None): The rank, the chat ID and the sequence number of the last match
+                of the previous page. Defaults to None, which gets the first page.
+
+        Returns:
+            Sequence[Row]: A sequence of rows with the chat ID, the chat title, the sequence number, the role, the
+                model, the creation time, the rank and the snippet of every matching message.
+        """
+
+        config = cast(SEARCH_CONFIG, REGCONFIG)
+        tsquery = func.websearch_to_tsquery(config, query)
+        # ts_rank returns a real. As a double it survives the round trip through the cursor exactly, so the keyset
+        # comparison neither repeats nor skips the matches at the boundary of a page.
+        rank = cast(func.ts_rank(self.model.search_vector, tsquery), Double)
+
+        stmt = self._select_with_chat_title(
+            self.model.content, rank.label("rank")
+        ).where(
+            self.model.user_id == user_id,
+            self.model.search_vector.bool_op("@@")(tsquery),
+        )
+
+        if api_provider_id is not None:
+            stmt = stmt.where(Chat.api_provider_id == api_provider_id)
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(rank, self.model.chat_id, self.model.seq)
+                < tuple_(*after)
+            )
+
+        page = (
+            stmt.order_by(
+                rank.desc(), self.model.chat_id.desc(), self.model.seq.desc()
+            )
+            .limit(limit)
+            .subquery()
+        )
+
+        return (
+            await self.db.execute(
+                select(
+                    page.c.chat_id,
+                    page.c.chat_title,
+                    page.c.seq,
+                    page.c.role,
+                    page.c.model,
+                    page.c.created_at,
+                    page.c.rank,
+                    func.ts_headline(
+                        config,
+                        self._escape_html(page.c.content),
+                        tsquery,
+                        "StartSel=<b>, StopSel=</b>",
+                    ).label("snippet"),
+                ).order_by(
+                    page.c.rank.desc(),
+                    page.c.chat_id.desc(),
+                    page.c.seq.desc(),
+                )
+            )
+        ).all()
+
+    async def get_all_with_chat_title_by_user_id(
+        self, user_id: int, api_provider_id: int | None = None
+    ) -> Sequence[Row]:
+        """
+        Get all messages of all chats of a user, e.g. to search them without the Postgres text search.
+
+        Args:
+            user_id (int): User id.
+            api_provider_id (int | None): Only get the messages of the chats of this API provider. Defaults to None.
+
+        Returns:
+            Sequence[Row]: A sequence of rows with the chat ID, the chat title, the sequence number, the role, the
+                model, the creation time and the content of every message.
+        """
+
+        stmt = self._select_with_chat_title(self.model.content).where(
+            self.model.user_id == user_id
+        )
+
+        if api_provider_id is not None:
+            stmt = stmt.where(Chat.api_provider_id == api_provider_id)
+
+        return (await self.db.execute(stmt)).all()
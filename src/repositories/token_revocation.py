@@ -0,0 +1,130 @@
+import datetime
+from typing import Sequence
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi import Depends
+
+from src.database.core import get_db
+
+from src.models.token_revocation import TokenRevocation
+from src.models.used_refresh_token import UsedRefreshToken
+
+from src.utils.revocation import token_revocation_list
+
+from .base import BaseRepository
+
+
+class TokenRevocationRepository(BaseRepository[TokenRevocation]):
+    """
+    Repository for token revocation database related operations.
+    """
+
+    def __init__(self, db: AsyncSession = Depends(get_db)) -> None:
+        """
+        Initialize the repository with a database session.
+
+        Args:
+            db (AsyncSession): Database session.
+
+        Returns:
+            None
+        """
+
+        super().__init__(db, TokenRevocation)
+
+    async def revoke_all_by_user_id(
+        self,
+        user_id: int,
+        revoked_at: datetime.datetime,
+        expires_at: datetime.datetime,
+    ) -> None:
+        """
+        Revoke all tokens of a user issued before the given time.
+        The worker's revocation list is updated once the transaction is committed, other workers pick the revocation
+        up when they poll for new ones.
+
+        Args:
+            user_id (int): User id.
+            revoked_at (datetime.datetime): The time before which the tokens were issued.
+            expires_at (datetime.datetime): The time after which all of these tokens have expired.
+
+        Returns:
+            None
+        """
+
+        await self.db.execute(
+            insert(self.model).values(
+                user_id=user_id, revoked_at=revoked_at, expires_at=expires_at
+            )
+        )
+        self.after_commit(
+            lambda: token_revocation_list.add(
+                user_id, revoked_at.timestamp(), expires_at.timestamp()
+            )
+        )
+
+    async def get_all_active_after_id(
+        self, last_id: int
+    ) -> Sequence[TokenRevocation]:
+        """
+        Get the revocations that have not expired yet and have an ID higher than the given one.
+
+        Args:
+            last_id (int): The ID after which to get the revocations.
+
+        Returns:
+            Sequence[TokenRevocation]: A sequence of revocations ordered by ID.
+        """
+
+        return (
+            await self.db.scalars(
+                select(self.model)
+                .where(
+                    self.model.id > last_id, self.model.expires_at > func.now()
+                )
+                .order_by(self.model.id)
+            )
+        ).all()
+
+    async def mark_refresh_token_as_used(
+        self, jti: str, user_id: int, expires_at: datetime.datetime
+    ) -> bool:
+        """
+        Mark a refresh token as used in a single statement, unless it was already used.
+
+        Args:
+            jti (str): The ID of the refresh token.
+            user_id (int): User id.
+            expires_at (datetime.datetime): The time after which the refresh token has expired.
+
+        Returns:
+            bool: Whether the refresh token was used for the first time.
+        """
+
+        result = await self.db.execute(
+            insert(UsedRefreshToken)
+            .values(jti=jti, user_id=user_id, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[UsedRefreshToken.jti])
+        )
+
+        return result.rowcount == 1
+
+    async def delete_expired(self) -> None:
+        """
+        Delete the revocations and used refresh tokens whose tokens have all expired.
+
+        Returns:
+            None
+        """
+
+        await self.db.execute(
+            delete(self.model).where(self.model.expires_at <= func.now())
+        )
+        await self.db.execute(
+            delete(UsedRefreshToken).where(
+                UsedRefreshToken.expires_at <= func.now()
+            )
+        )
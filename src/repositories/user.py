@@ -1,5 +1,6 @@
 from sqlalchemy import update
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import Depends
 
@@ -7,6 +8,8 @@ from src.database.core import get_db
 
 from src.models.user import User
 
+from src.utils.cache import user_profile_cache
+
 from .base import BaseRepository
 
 
@@ -16,12 +19,12 @@ class UserRepository(BaseRepository[User]):
     Repository for user database related operations.
     """
 
-    def __init__(self, db: Session = Depends(get_db)) -> None:
+    def __init__(self, db: AsyncSession = Depends(get_db)) -> None:
         """
         Initialize the repository with a database session.
 
         Args:
-            db (Session): Database session.
+            db (AsyncSession): Database session.
 
         Returns:
             None
@@ -29,7 +32,26 @@ class UserRepository(BaseRepository[User]):
 
         super().__init__(db, User)
 
-    def update_password_by_id(
+    async def create_if_email_not_exists(self, payload: dict) -> bool:
+        """
+        Create a new user in a single statement, unless a user with the same email already exists.
+
+        Args:
+            payload (dict): Payload containing the user's email, name and hashed password.
+
+        Returns:
+            bool: Whether the user was created.
+        """
+
+        result = await self.db.execute(
+            insert(self.model)
+            .values(payload)
+            .on_conflict_do_nothing(index_elements=[self.model.email])
+        )
+
+        return result.rowcount == 1
+
+    async def update_password_by_id(
         self, user_id: int, hashed_new_password: str
     ) -> None:
         """
@@ -43,14 +65,13 @@ class UserRepository(BaseRepository[User]):
             None
         """
 
-        self.db.execute(
+        await self.db.execute(
             update(self.model)
             .where(self.model.id == user_id)
             .values({self.model.password: hashed_new_password})
         )
-        self.db.commit()
 
-    def update_profile_by_id(self, user_id: int, payload: dict) -> None:
+    async def update_profile_by_id(self, user_id: int, payload: dict) -> None:
         """
         Update the user's profile by user id.
 
@@ -62,24 +83,27 @@ class UserRepository(BaseRepository[User]):
             None
         """
 
-        self.db.execute(
+        await self.db.execute(
             update(self.model).where(self.model.id == user_id).values(payload)
         )
-        self.db.commit()
+        self.after_commit(lambda: user_profile_cache.invalidate(user_id))
 
-    def update_passphrase_by_id(self, user_id: int, payload: dict) -> None:
+    async def update_passphrase_by_id(
+        self, user_id: int, payload: dict
+    ) -> None:
         """
-        Update the user's passphrase and salt by user id.
+        Update the user's passphrase, salt and passphrase verifier by user id.
 
         Args:
             user_id (int): User id.
-            payload (dict): The payload containing the salt and hashed passphrase.
+            payload (dict): The payload containing the salt, passphrase verifier, KDF parameters, encrypted data key
+                and (legacy) hashed passphrase.
 
         Returns:
             None
         """
 
-        self.db.execute(
+        await self.db.execute(
             update(self.model).where(self.model.id == user_id).values(payload)
         )
-        self.db.commit()
+        self.after_commit(lambda: user_profile_cache.invalidate(user_id))
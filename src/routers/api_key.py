@@ -1,10 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from src.dependencies import (
     AuthDependency,
     AuthServiceDependency,
     ApiKeyServiceDependency,
     ApiProviderServiceDependency,
+    throttle_by_user,
 )
 
 from src.schemas.api_key import (
@@ -12,13 +13,19 @@ from src.schemas.api_key import (
     ApiKeysPassphrase,
     ApiKeysUpdate,
     ApiKeysUpdateResponse,
+    ApiKeysUnlock,
+    ApiKeysUnlockResponse,
+    ApiKeysLock,
+    ApiKeysLockResponse,
 )
 
 
 router = APIRouter(prefix="/api-key", tags=["api-key"])
 
 
-@router.post("", response_model=ApiKeysResponse)
+@router.post(
+    "", response_model=ApiKeysResponse, dependencies=[Depends(throttle_by_user)]
+)
 async def get_api_keys(
     auth: AuthDependency,
     auth_service: AuthServiceDependency,
@@ -26,17 +33,20 @@ async def get_api_keys(
     payload: ApiKeysPassphrase,
 ):
     """
-    Verify the user's passphrase and retrieve all user's API keys from the database based on the user's ID.
+    Verify the user's passphrase or unlock token and retrieve all user's API keys from the database based on the
+    user's ID.
     """
 
-    fernet_key = auth_service.get_fernet_key(
-        auth.user_id, payload.passphrase.get_secret_value()
-    )
+    data_key = await auth_service.get_data_key(auth.user_id, payload)
 
-    return api_key_service.get_user_api_keys(auth.user_id, fernet_key)
+    return await api_key_service.get_user_api_keys(auth.user_id, data_key)
 
 
-@router.patch("", response_model=ApiKeysUpdateResponse)
+@router.patch(
+    "",
+    response_model=ApiKeysUpdateResponse,
+    dependencies=[Depends(throttle_by_user)],
+)
 async def update_api_keys(
     auth: AuthDependency,
     auth_service: AuthServiceDependency,
@@ -48,12 +58,45 @@ async def update_api_keys(
     Update the user's API keys in the database based on the user's ID.
     """
 
-    fernet_key = auth_service.get_fernet_key(
+    data_key = await auth_service.get_data_key(auth.user_id, payload)
+
+    api_provider_catalog = await api_provider_service.get_catalog()
+
+    return await api_key_service.update_user_api_keys(
+        auth.user_id, data_key, api_provider_catalog, payload
+    )
+
+
+@router.post(
+    "/unlock",
+    response_model=ApiKeysUnlockResponse,
+    dependencies=[Depends(throttle_by_user)],
+)
+async def unlock_api_keys(
+    auth: AuthDependency,
+    auth_service: AuthServiceDependency,
+    payload: ApiKeysUnlock,
+):
+    """
+    Verify the user's passphrase once and exchange it for a short-lived unlock token that can be used instead of
+    the passphrase to read and update the user's API keys.
+    """
+
+    return await auth_service.unlock_vault(
         auth.user_id, payload.passphrase.get_secret_value()
     )
 
-    db_all_api_providers = api_provider_service.get_all()
 
-    return api_key_service.update_user_api_keys(
-        auth.user_id, fernet_key, db_all_api_providers, payload
+@router.post("/lock", response_model=ApiKeysLockResponse)
+async def lock_api_keys(
+    auth: AuthDependency,
+    auth_service: AuthServiceDependency,
+    payload: ApiKeysLock,
+):
+    """
+    Invalidate the unlock token, so it can no longer be used to access the user's API keys.
+    """
+
+    return auth_service.lock_vault(
+        auth.user_id, payload.unlock_token.get_secret_value()
     )
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Header
 
 from src.dependencies import ApiProviderServiceDependency
 from src.schemas.api_provider import (
@@ -22,18 +24,27 @@ async def create_api_provider(
     Create a new API provider.
     """
 
-    return api_provider_service.create(payload)
+    return await api_provider_service.create(payload)
 
 
-@router.get("/all", response_model=ApiProvidersResponse)
+@router.get(
+    "/all",
+    response_model=ApiProvidersResponse,
+    responses={
+        304: {"description": "The API providers have not been modified."}
+    },
+)
 async def get_api_providers_names(
     api_provider_service: ApiProviderServiceDependency,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
     Get all API providers names.
+
+    Responds with 304 Not Modified if the ETag sent in the If-None-Match header is still current.
     """
 
-    return api_provider_service.get_all()
+    return await api_provider_service.get_all(if_none_match)
 
 
 @router.get("/{api_provider_id}", response_model=ApiProviderResponse)
@@ -44,7 +55,7 @@ async def get_api_provider_by_id(
     Get full information about an API provider by its ID.
     """
 
-    return api_provider_service.get_one_by_id(api_provider_id)
+    return await api_provider_service.get_one_by_id(api_provider_id)
 
 
 # TODO: Create permissions dependency for this endpoint to allow only admin users to delete API providers
@@ -56,4 +67,4 @@ async def delete_api_provider(
     Delete an API provider by its ID.
     """
 
-    return api_provider_service.delete_by_id(api_provider_id)
+    return await api_provider_service.delete_by_id(api_provider_id)
@@ -3,8 +3,14 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 
-from src.dependencies import AuthServiceDependency
+from src.dependencies import (
+    AuthServiceDependency,
+    TokenServiceDependency,
+    throttle_by_client,
+    throttle_login,
+)
 from src.schemas.auth import (
+    AuthRefresh,
     AuthRegister,
     AuthLoginResponse,
     AuthRegisterResponse,
@@ -14,16 +20,35 @@ from src.schemas.auth import (
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/login", response_model=AuthLoginResponse)
+@router.post(
+    "/login",
+    response_model=AuthLoginResponse,
+    dependencies=[Depends(throttle_login)],
+)
 async def login_user(
     payload: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_service: AuthServiceDependency,
 ):
-    return auth_service.get_authenticated(payload)
+    return await auth_service.get_authenticated(payload)
 
 
-@router.post("/register", response_model=AuthRegisterResponse)
+@router.post(
+    "/register",
+    response_model=AuthRegisterResponse,
+    dependencies=[Depends(throttle_by_client)],
+)
 async def register_user(
     payload: AuthRegister, auth_service: AuthServiceDependency
 ):
-    return auth_service.create(payload)
+    return await auth_service.create(payload)
+
+
+@router.post("/refresh", response_model=AuthLoginResponse)
+async def refresh_tokens(
+    payload: AuthRefresh, token_service: TokenServiceDependency
+):
+    """
+    Exchange a refresh token for new access and refresh tokens. Every refresh token can be used only once.
+    """
+
+    return await token_service.refresh(payload.refresh_token.get_secret_value())
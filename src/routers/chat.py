@@ -0,0 +1,243 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+
+from src.dependencies import (
+    AuthDependency,
+    AuthServiceDependency,
+    ApiProviderServiceDependency,
+    ApiKeyServiceDependency,
+    ChatServiceDependency,
+    MessageServiceDependency,
+    CompletionServiceDependency,
+    throttle_by_user,
+)
+from src.schemas.chat import (
+    Chat,
+    ChatCreate,
+    ChatUpdate,
+    ChatsResponse,
+    ChatDeleteResponse,
+    MessagesCreate,
+    MessagesResponse,
+    MessagesCreateResponse,
+    MessageSearchResponse,
+    ChatCompletionCreate,
+    ChatCompletionStopResponse,
+)
+
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+
+@router.post("", response_model=Chat)
+async def create_chat(
+    auth: AuthDependency,
+    chat_service: ChatServiceDependency,
+    api_provider_service: ApiProviderServiceDependency,
+    payload: ChatCreate,
+):
+    """
+    Create a new chat of the user.
+    """
+
+    api_provider_catalog = await api_provider_service.get_catalog()
+
+    return await chat_service.create_user_chat(
+        auth.user_id, api_provider_catalog, payload
+    )
+
+
+@router.get("", response_model=ChatsResponse)
+async def get_chats(
+    auth: AuthDependency,
+    chat_service: ChatServiceDependency,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    """
+    Get a page of the user's chats, the most recently active ones first. Pass the returned cursor to get the next
+    page.
+    """
+
+    return await chat_service.get_user_chats(auth.user_id, limit, cursor)
+
+
+@router.get("/search", response_model=MessageSearchResponse)
+async def search_messages(
+    auth: AuthDependency,
+    message_service: MessageServiceDependency,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    api_provider_id: int | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    """
+    Search the messages of all chats of the user, the best matches first, each with a snippet highlighting the
+    matching words. Pass the returned cursor to get the next page.
+
+    The query is written like one of a web search engine: words must all occur, "quoted words" must occur as a
+    phrase, or separates alternatives and -word excludes a word.
+    """
+
+    return await message_service.search_user_messages(
+        auth.user_id, q, limit, api_provider_id, cursor
+    )
+
+
+@router.get("/{chat_id}", response_model=Chat)
+async def get_chat(
+    auth: AuthDependency, chat_service: ChatServiceDependency, chat_id: int
+):
+    """
+    Get a chat of the user by its ID.
+    """
+
+    return await chat_service.get_user_chat(auth.user_id, chat_id)
+
+
+@router.patch("/{chat_id}", response_model=Chat)
+async def update_chat(
+    auth: AuthDependency,
+    chat_service: ChatServiceDependency,
+    chat_id: int,
+    payload: ChatUpdate,
+):
+    """
+    Update the title or the model of a chat of the user.
+    """
+
+    return await chat_service.update_user_chat(auth.user_id, chat_id, payload)
+
+
+@router.delete("/{chat_id}", response_model=ChatDeleteResponse)
+async def delete_chat(
+    auth: AuthDependency, chat_service: ChatServiceDependency, chat_id: int
+):
+    """
+    Delete a chat of the user together with its messages.
+    """
+
+    return await chat_service.delete_user_chat(auth.user_id, chat_id)
+
+
+@router.get("/{chat_id}/messages", response_model=MessagesResponse)
+async def get_messages(
+    auth: AuthDependency,
+    chat_service: ChatServiceDependency,
+    message_service: MessageServiceDependency,
+    chat_id: int,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    before_seq: Annotated[int | None, Query(ge=1)] = None,
+    after_seq: Annotated[int | None, Query(ge=0)] = None,
+):
+    """
+    Get a page of messages of a chat of the user, in the order they were sent.
+
+    Without any sequence number the latest messages are returned. Pass the sequence number of the first received
+    message as before_seq to page back through older messages, or the sequence number of the last received message
+    as after_seq to get the newer ones.
+    """
+
+    await chat_service.get_user_chat(auth.user_id, chat_id)
+
+    return await message_service.get_chat_messages(
+        auth.user_id, chat_id, limit, before_seq, after_seq
+    )
+
+
+@router.post("/{chat_id}/messages", response_model=MessagesCreateResponse)
+async def create_messages(
+    auth: AuthDependency,
+    message_service: MessageServiceDependency,
+    chat_id: int,
+    payload: MessagesCreate,
+):
+    """
+    Append up to 1000 messages to a chat of the user at once, e.g. when importing a conversation from another LLM.
+    """
+
+    return await message_service.create_chat_messages(
+        auth.user_id, chat_id, payload
+    )
+
+
+@router.post(
+    "/{chat_id}/completions",
+    response_class=StreamingResponse,
+    dependencies=[Depends(throttle_by_user)],
+)
+async def create_completion(
+    auth: AuthDependency,
+    auth_service: AuthServiceDependency,
+    chat_service: ChatServiceDependency,
+    api_provider_service: ApiProviderServiceDependency,
+    api_key_service: ApiKeyServiceDependency,
+    completion_service: CompletionServiceDependency,
+    chat_id: int,
+    payload: ChatCompletionCreate,
+):
+    """
+    Send a message to a chat of the user and stream the answer of the chat's API provider as Server-Sent Events.
+
+    The user's passphrase or unlock token is required to decrypt the user's API key for the API provider.
+    The stream consists of a "start" event with the sequence numbers of the message and of the answer, a "token"
+    event per received part of the answer and finally either a "done" or an "error" event. The answer keeps being
+    generated if the client disconnects, reconnect to GET /chat/{chat_id}/completions/{seq} to read the rest.
+    """
+
+    chat = await chat_service.get_user_chat(auth.user_id, chat_id)
+    base_url = completion_service.get_base_url(
+        await api_provider_service.get_catalog(), chat.api_provider_id
+    )
+    data_key = await auth_service.get_data_key(auth.user_id, payload)
+    api_key = await api_key_service.get_user_api_key(
+        auth.user_id, data_key, chat.api_provider_id
+    )
+
+    return await completion_service.create_chat_completion(
+        auth.user_id, chat, api_key, base_url, payload
+    )
+
+
+@router.get("/{chat_id}/completions/{seq}", response_class=StreamingResponse)
+async def resume_completion(
+    auth: AuthDependency,
+    completion_service: CompletionServiceDependency,
+    chat_id: int,
+    seq: int,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    last_event_id: Annotated[int | None, Header(ge=0)] = None,
+):
+    """
+    Stream an answer of a chat of the user again as Server-Sent Events, e.g. after the client reconnected.
+
+    The stream skips the characters of the answer the client already has: the ID of the last received token event,
+    sent by browsers in the Last-Event-ID header when they reconnect, or otherwise the offset. An answer that is
+    still being generated is followed until it ends. If another worker generates it and stops storing it without
+    finishing it, the stream ends with an "interrupted" event instead of a "done" event.
+    """
+
+    return await completion_service.resume_chat_completion(
+        auth.user_id,
+        chat_id,
+        seq,
+        last_event_id if last_event_id is not None else offset,
+    )
+
+
+@router.delete(
+    "/{chat_id}/completions/{seq}", response_model=ChatCompletionStopResponse
+)
+async def stop_completion(
+    auth: AuthDependency,
+    completion_service: CompletionServiceDependency,
+    chat_id: int,
+    seq: int,
+):
+    """
+    Stop generating an answer of a chat of the user. The part generated so far is kept.
+    """
+
+    return completion_service.stop_chat_completion(auth.user_id, chat_id, seq)
@@ -0,0 +1,362 @@
+import asyncio
+from functools import partial
+from contextlib import aclosing
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from pydantic import ValidationError
+
+from src.config import settings
+from src.database.core import SessionLocal, commit, discard
+from src.repositories.user import UserRepository
+from src.repositories.api_provider import ApiProviderRepository
+from src.repositories.api_key import ApiKeyRepository
+from src.repositories.chat import ChatRepository
+from src.repositories.message import MessageRepository
+from src.services.auth import AuthService
+from src.services.api_provider import ApiProviderService
+from src.services.api_key import ApiKeyService
+from src.services.chat import ChatService
+from src.services.message import MessageService
+from src.services.completion import CompletionService
+from src.schemas.auth import AuthCurrentUser
+from src.schemas.channel import (
+    ChannelAuth,
+    ChannelPing,
+    ChannelStart,
+    ChannelResume,
+    ChannelCredit,
+    ChannelCancel,
+    ChannelMessage,
+)
+
+from src.utils.channel import ChatChannel, StreamCredit, create_chat_channel
+from src.utils.throttle import throttle
+from src.utils.generation import generation_registry
+
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+# The number of messages loaded from the database at once while replaying a chat.
+_RESUME_PAGE_SIZE = 50
+
+
+async def _authenticate(
+    websocket: WebSocket, frame: ChannelAuth
+) -> AuthCurrentUser | None:
+    """
+    Authenticate the user of a chat channel with an access token, closing the connection if it is invalid.
+    """
+
+    try:
+        return await AuthService.get_current_user(
+            frame.token.get_secret_value()
+        )
+    except HTTPException as e:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason=e.detail
+        )
+        return None
+
+
+async def _run_completion(
+    channel: ChatChannel,
+    client_ip: str | None,
+    frame: ChannelStart,
+    credit: StreamCredit,
+) -> None:
+    """
+    Send a message to a chat of the user and stream the answer of the chat's API provider.
+
+    The answer is generated by a server-side task, so it keeps being generated if the stream is cancelled or the
+    connection drops. The database session is closed before the answer is streamed, so a slow client doesn't hold a
+    connection.
+    """
+
+    async with SessionLocal() as db:
+        chat_service = ChatService(ChatRepository(db))
+        api_provider_service = ApiProviderService(ApiProviderRepository(db))
+        auth_service = AuthService(UserRepository(db))
+        api_key_service = ApiKeyService(ApiKeyRepository(db))
+        completion_service = CompletionService(MessageRepository(db))
+
+        try:
+            await throttle.check(client_ip, f"user:{channel.user_id}")
+
+            chat = await chat_service.get_user_chat(
+                channel.user_id, frame.chat_id
+            )
+            base_url = completion_service.get_base_url(
+                await api_provider_service.get_catalog(), chat.api_provider_id
+            )
+            data_key = await auth_service.get_data_key(channel.user_id, frame)
+            api_key = await api_key_service.get_user_api_key(
+                channel.user_id, data_key, chat.api_provider_id
+            )
+            generation = await completion_service.start_generation(
+                channel.user_id, chat, api_key, base_url, frame
+            )
+            await commit(db)
+        except HTTPException as e:
+            await db.rollback()
+            await channel.send(
+                {"type": "error", "stream": frame.stream, "detail": e.detail}
+            )
+            return
+        finally:
+            # Gives back the generation's reserved slot if the work was not committed.
+            discard(db)
+
+        events = await completion_service.read_answer(
+            channel.user_id, chat.id, generation.seq
+        )
+
+    await channel.send(
+        {
+            "type": "start",
+            "stream": frame.stream,
+            "chat_id": chat.id,
+            "user_seq": generation.seq - 1,
+            "seq": generation.seq,
+            "model": generation.model,
+        }
+    )
+
+    async with aclosing(events):
+        async for event, data, event_id in events:
+            if event == "token":
+                await credit.acquire()
+                await channel.send(
+                    {
+                        "type": "token",
+                        "stream": frame.stream,
+                        "offset": event_id,
+                        **data,
+                    }
+                )
+            else:
+                await channel.send(
+                    {"type": event, "stream": frame.stream, **data}
+                )
+
+
+async def _run_resume(
+    channel: ChatChannel, frame: ChannelResume, credit: StreamCredit
+) -> None:
+    """
+    Replay the messages of a chat the client missed while it was disconnected, starting at a sequence number.
+    Answers still being generated are followed until they end.
+
+    Every page of messages is loaded with a session of its own, so a slow client doesn't hold a connection.
+    """
+
+    after_seq = frame.after_seq
+    offset = frame.offset
+
+    async with SessionLocal() as db:
+        try:
+            await ChatService(ChatRepository(db)).get_user_chat(
+                channel.user_id, frame.chat_id
+            )
+        except HTTPException as e:
+            await channel.send(
+                {"type": "error", "stream": frame.stream, "detail": e.detail}
+            )
+            return
+
+    while True:
+        async with SessionLocal() as db:
+            page = await MessageService(
+                MessageRepository(db)
+            ).get_chat_messages(
+                channel.user_id,
+                frame.chat_id,
+                _RESUME_PAGE_SIZE,
+                after_seq=after_seq,
+            )
+
+        for message in page.messages:
+            # An answer being generated by another worker is followed in the database.
+            is_generating = (
+                message.is_generating
+                or generation_registry.get(
+                    channel.user_id, frame.chat_id, message.seq
+                )
+                is not None
+            )
+
+            await credit.acquire()
+            await channel.send(
+                {
+                    "type": "message",
+                    "stream": frame.stream,
+                    "chat_id": frame.chat_id,
+                    "offset": offset,
+                    **message.model_dump(mode="json"),
+                    # Only the rest of a partially received message is sent. An answer being generated follows as
+                    # token frames instead.
+                    "content": (
+                        "" if is_generating else message.content[offset:]
+                    ),
+                    "generating": is_generating,
+                }
+            )
+
+            if is_generating:
+                async with SessionLocal() as db:
+                    events = await CompletionService(
+                        MessageRepository(db)
+                    ).read_answer(
+                        channel.user_id, frame.chat_id, message.seq, offset
+                    )
+
+                async with aclosing(events):
+                    async for event, data, event_id in events:
+                        if event == "token":
+                            await credit.acquire()
+                            await channel.send(
+                                {
+                                    "type": "token",
+                                    "stream": frame.stream,
+                                    "seq": message.seq,
+                                    "offset": event_id,
+                                    **data,
+                                }
+                            )
+                        elif event == "interrupted":
+                            await channel.send(
+                                {
+                                    "type": "interrupted",
+                                    "stream": frame.stream,
+                                    **data,
+                                }
+                            )
+
+            after_seq = message.seq
+            offset = 0
+
+        if not page.has_more:
+            break
+
+    await channel.send(
+        {"type": "done", "stream": frame.stream, "seq": after_seq}
+    )
+
+
+@router.websocket("/ws")
+async def chat_channel(websocket: WebSocket):
+    """
+    Multiplex several concurrent chat streams over a single WebSocket connection.
+
+    The first frame must authenticate the user with an access token: {"type": "auth", "token": "..."}. The token
+    can be replaced by a fresh one at any time with the same frame, since the connection may outlive it.
+    Afterwards the client sends:
+
+    - {"type": "start", "stream": ID, "chat_id": ..., "content": ..., "model": ..., "passphrase" or "unlock_token": ...}
+      to send a message to a chat and stream the answer as "start", "token" and finally "done" or "error" frames.
+    - {"type": "resume", "stream": ID, "chat_id": ..., "after_seq": ..., "offset": ...} to replay the messages
+      following the last completely received one as "message" frames, e.g. after a reconnect. The offset skips the
+      characters already received of the first replayed message. An answer still being generated is followed by
+      "token" frames until it ends, or until an "interrupted" frame if its worker stopped storing it.
+    - {"type": "credit", "stream": ID, "credit": N} to allow N more "token" or "message" frames of a stream. Every
+      stream starts with a limited credit and pauses once it runs out.
+    - {"type": "cancel", "stream": ID} to stop a stream. An answer keeps being generated, stop it with
+      DELETE /chat/{chat_id}/completions/{seq}.
+    - {"type": "ping"}, answered with {"type": "pong"}. The server pings the client periodically as well and
+      closes the connection once the client hasn't sent anything for too long.
+    """
+
+    await websocket.accept()
+
+    try:
+        frame = ChannelMessage.validate_json(
+            await asyncio.wait_for(
+                websocket.receive_text(),
+                settings.CHAT_CHANNEL_AUTH_TIMEOUT_IN_SECONDS,
+            )
+        )
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValidationError):
+        frame = None
+
+    if not isinstance(frame, ChannelAuth):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason="Could not authenticate user.",
+        )
+        return
+
+    auth = await _authenticate(websocket, frame)
+
+    if auth is None:
+        return
+
+    token = frame.token.get_secret_value()
+    client_ip = websocket.client.host if websocket.client else None
+    channel = create_chat_channel(websocket, auth.user_id)
+
+    await channel.send({"type": "ready"})
+    channel.start()
+
+    try:
+        while True:
+            try:
+                frame = ChannelMessage.validate_json(await channel.receive())
+            except ValidationError:
+                await channel.send(
+                    {"type": "error", "detail": "Invalid message."}
+                )
+                continue
+
+            if isinstance(frame, ChannelAuth):
+                new_auth = await _authenticate(websocket, frame)
+
+                if new_auth is None:
+                    break
+                if new_auth.user_id != auth.user_id:
+                    await websocket.close(
+                        code=status.WS_1008_POLICY_VIOLATION,
+                        reason="The token belongs to another user.",
+                    )
+                    break
+                token = frame.token.get_secret_value()
+            elif isinstance(frame, ChannelPing):
+                await channel.send({"type": "pong"})
+            elif isinstance(frame, (ChannelStart, ChannelResume)):
+                # The access token may have expired or been revoked since the connection was opened.
+                try:
+                    await AuthService.get_current_user(token)
+                except HTTPException as e:
+                    await websocket.close(
+                        code=status.WS_1008_POLICY_VIOLATION, reason=e.detail
+                    )
+                    break
+
+                run = (
+                    partial(_run_completion, channel, client_ip, frame)
+                    if isinstance(frame, ChannelStart)
+                    else partial(_run_resume, channel, frame)
+                )
+
+                if not channel.open_stream(frame.stream, run):
+                    await channel.send(
+                        {
+                            "type": "error",
+                            "stream": frame.stream,
+                            "detail": "This stream is already running or there are too many streams.",
+                        }
+                    )
+            elif isinstance(frame, ChannelCredit):
+                channel.grant(frame.stream, frame.credit)
+            elif isinstance(frame, ChannelCancel):
+                channel.cancel(frame.stream)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await channel.close()
@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+
+from src.database.core import engine
+from src.schemas.metrics import (
+    CacheMetricsResponse,
+    CryptoExecutorMetricsResponse,
+    DatabasePoolMetricsResponse,
+    ThrottleMetricsResponse,
+)
+from src.utils.cache import user_profile_cache
+from src.utils.token import token_util
+from src.utils.throttle import throttle
+from src.utils.crypto_executor import crypto_executor
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+# TODO: Create permissions dependency for this endpoint to allow only admin users to read metrics
+@router.get("/crypto-executor", response_model=CryptoExecutorMetricsResponse)
+async def get_crypto_executor_metrics():
+    """
+    Get the queue depth, wait time and rejection metrics of the crypto executor.
+    """
+
+    return crypto_executor.get_metrics()
+
+
+# TODO: Create permissions dependency for this endpoint to allow only admin users to read metrics
+@router.get("/database-pool", response_model=DatabasePoolMetricsResponse)
+async def get_database_pool_metrics():
+    """
+    Get the usage, checkout wait time and checkout failure metrics of the database connection pool.
+    """
+
+    return engine.pool.get_metrics()
+
+
+# TODO: Create permissions dependency for this endpoint to allow only admin users to read metrics
+@router.get("/user-profile-cache", response_model=CacheMetricsResponse)
+async def get_user_profile_cache_metrics():
+    """
+    Get the size, hit, miss, eviction and invalidation metrics of the user profile cache.
+    """
+
+    return user_profile_cache.get_metrics()
+
+
+# TODO: Create permissions dependency for this endpoint to allow only admin users to read metrics
+@router.get("/access-token-cache", response_model=CacheMetricsResponse)
+async def get_access_token_cache_metrics():
+    """
+    Get the size, hit, miss, eviction and invalidation metrics of the cache of verified tokens.
+    """
+
+    return token_util.cache.get_metrics()
+
+
+# TODO: Create permissions dependency for this endpoint to allow only admin users to read metrics
+@router.get("/throttle", response_model=ThrottleMetricsResponse)
+async def get_throttle_metrics():
+    """
+    Get the crypto executor load and the number of requests rejected by the throttle of CPU-heavy endpoints.
+    """
+
+    return throttle.get_metrics()
@@ -1,9 +1,14 @@
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header
 
 from src.dependencies import (
     AuthDependency,
+    AuthServiceDependency,
     UserServiceDependency,
     ApiKeyServiceDependency,
+    TokenServiceDependency,
+    throttle_by_user,
 )
 from src.schemas.user import (
     UserUpdatePassword,
@@ -13,34 +18,49 @@ from src.schemas.user import (
     UserUpdateProfileResponse,
     UserUpdatePassphraseResponse,
 )
+from src.schemas.api_key import ApiKeysPassphrase
 
 
 router = APIRouter(prefix="/user", tags=["user"])
 
 
-@router.get("", response_model=UserProfileResponse)
+@router.get(
+    "",
+    response_model=UserProfileResponse,
+    responses={304: {"description": "The profile has not been modified."}},
+)
 async def get_user_profile(
     auth: AuthDependency,
     user_service: UserServiceDependency,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
     Get the user's profile by user ID.
+
+    Responds with 304 Not Modified if the ETag sent in the If-None-Match header is still current.
     """
 
-    return user_service.get_profile(auth.user_id)
+    return await user_service.get_profile(auth.user_id, if_none_match)
 
 
-@router.patch("/update-password", response_model=UserUpdatePasswordResponse)
+@router.patch(
+    "/update-password",
+    response_model=UserUpdatePasswordResponse,
+    dependencies=[Depends(throttle_by_user)],
+)
 async def update_user_password(
     auth: AuthDependency,
     user_service: UserServiceDependency,
+    token_service: TokenServiceDependency,
     payload: UserUpdatePassword,
 ):
     """
-    Update the user's password by user ID.
+    Update the user's password by user ID and revoke all of the user's sessions, so the user has to log in again.
     """
 
-    return user_service.update_user_password(auth.user_id, payload)
+    response = await user_service.update_user_password(auth.user_id, payload)
+    await token_service.revoke_all_by_user_id(auth.user_id)
+    return response
 
 
 @router.patch("/update-profile", response_model=UserUpdateProfileResponse)
@@ -53,20 +73,41 @@ async def update_user_profile(
     Update the user's profile by user ID.
     """
 
-    return user_service.update_user_profile(auth.user_id, payload)
+    return await user_service.update_user_profile(auth.user_id, payload)
 
 
-@router.patch("/update-passphrase", response_model=UserUpdatePassphraseResponse)
+@router.patch(
+    "/update-passphrase",
+    response_model=UserUpdatePassphraseResponse,
+    dependencies=[Depends(throttle_by_user)],
+)
 async def update_user_passphrase(
     auth: AuthDependency,
+    auth_service: AuthServiceDependency,
     user_service: UserServiceDependency,
     api_key_service: ApiKeyServiceDependency,
+    token_service: TokenServiceDependency,
+    payload: ApiKeysPassphrase | None = None,
 ):
     """
-    Update the user's passphrase by user ID, delete all API keys associated with the user and return a strong, random
-    generated passphrase for the user so that they can save it in a secure place.
+    Update the user's passphrase by user ID and return a strong, random generated passphrase for the user so that
+    they can save it in a secure place.
+
+    If the current passphrase or unlock token is provided, the user's API keys are kept and re-wrapped with the new
+    passphrase. Otherwise, e.g. when the user forgot their passphrase, all API keys associated with the user are
+    deleted. Either way, all of the user's sessions are revoked, so the user has to log in again.
     """
 
-    passphrase = user_service.update_user_passphrase(auth.user_id)
-    api_key_service.delete_user_api_keys(auth.user_id)
+    data_key = (
+        await auth_service.get_data_key(auth.user_id, payload)
+        if payload
+        else None
+    )
+
+    passphrase = await user_service.update_user_passphrase(
+        auth.user_id, data_key
+    )
+    if data_key is None:
+        await api_key_service.delete_user_api_keys(auth.user_id)
+    await token_service.revoke_all_by_user_id(auth.user_id)
     return passphrase
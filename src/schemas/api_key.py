@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Optional, Self
 
-from pydantic import BaseModel, SecretStr, field_validator
+from pydantic import BaseModel, SecretStr, field_validator, model_validator
 
 
 class ApiKey(BaseModel):
@@ -12,16 +12,32 @@ class ApiKey(BaseModel):
 
 
 class ApiKeysPassphrase(BaseModel):
+    passphrase: Optional[SecretStr] = None
+    unlock_token: Optional[SecretStr] = None
+
+    @model_validator(mode="after")
+    def validate_passphrase_or_unlock_token(self) -> Self:
+        if (self.passphrase is None) == (self.unlock_token is None):
+            raise ValueError(
+                "Either passphrase or unlock token must be provided"
+            )
+        return self
+
+
+class ApiKeysUnlock(BaseModel):
     passphrase: SecretStr
 
 
+class ApiKeysLock(BaseModel):
+    unlock_token: SecretStr
+
+
 class ApiKeyCreate(BaseModel):
     key: str
     api_provider_id: int
 
 
-class ApiKeysUpdate(BaseModel):
-    passphrase: SecretStr
+class ApiKeysUpdate(ApiKeysPassphrase):
     api_keys: Optional[list[ApiKeyCreate]] = None
 
     @field_validator("api_keys")
@@ -45,3 +61,12 @@ class ApiKeysResponse(BaseModel):
 
 class ApiKeysUpdateResponse(BaseModel):
     message: str
+
+
+class ApiKeysUnlockResponse(BaseModel):
+    unlock_token: str
+    expires_in: int
+
+
+class ApiKeysLockResponse(BaseModel):
+    message: str = "Your API keys have been locked."
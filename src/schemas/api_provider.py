@@ -10,6 +10,10 @@ class ApiProvider(BaseModel):
     name: Annotated[str, Field(min_length=1, max_length=50)]
 
 
+class ApiProviderCatalogItem(ApiProvider):
+    lowercase_name: str
+
+
 class ApiProviderCreate(BaseModel):
     model_config = ConfigDict(str_strip_whitespace=True)
 
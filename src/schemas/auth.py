@@ -1,4 +1,4 @@
-from typing import Annotated, Self
+from typing import Annotated
 
 from pydantic import (
     BaseModel,
@@ -7,11 +7,8 @@ from pydantic import (
     Field,
     ValidationInfo,
     field_validator,
-    model_validator,
 )
 
-from src.utils.hash import hash_util
-
 
 class AuthLogin(BaseModel):
     user_id: int = Field(validation_alias="id")
@@ -21,7 +18,7 @@ class AuthLogin(BaseModel):
 class AuthRegister(BaseModel):
     email: EmailStr
     name: Annotated[str, Field(min_length=1, max_length=50)]
-    password: Annotated[SecretStr | str, Field(min_length=8)]
+    password: Annotated[SecretStr, Field(min_length=8)]
     password_2: Annotated[SecretStr, Field(min_length=8)]
 
     @field_validator("password_2")  # noqa
@@ -37,19 +34,19 @@ class AuthRegister(BaseModel):
             raise ValueError("Passwords do not match")
         return value
 
-    @model_validator(mode="after")
-    def hash_password(self) -> Self:
-        self.password = hash_util.create_hash(self.password.get_secret_value())
-        return self
-
 
 class AuthCurrentUser(BaseModel):
     email: EmailStr
     user_id: int
 
 
+class AuthRefresh(BaseModel):
+    refresh_token: SecretStr
+
+
 class AuthLoginResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
 
 
@@ -0,0 +1,64 @@
+from typing import Annotated, Literal, Union
+
+from pydantic import BaseModel, Field, SecretStr, TypeAdapter
+
+from src.schemas.chat import ChatCompletionCreate
+
+
+StreamId = Annotated[str, Field(min_length=1, max_length=64)]
+
+
+class ChannelAuth(BaseModel):
+    type: Literal["auth"]
+    token: SecretStr
+
+
+class ChannelPing(BaseModel):
+    type: Literal["ping"]
+
+
+class ChannelPong(BaseModel):
+    type: Literal["pong"]
+
+
+class ChannelStart(ChatCompletionCreate):
+    type: Literal["start"]
+    stream: StreamId
+    chat_id: int
+
+
+class ChannelResume(BaseModel):
+    type: Literal["resume"]
+    stream: StreamId
+    chat_id: int
+    # The sequence number of the last message received completely.
+    after_seq: Annotated[int, Field(ge=0)]
+    # The number of characters already received of the message following it.
+    offset: Annotated[int, Field(ge=0)] = 0
+
+
+class ChannelCredit(BaseModel):
+    type: Literal["credit"]
+    stream: StreamId
+    credit: Annotated[int, Field(ge=1)]
+
+
+class ChannelCancel(BaseModel):
+    type: Literal["cancel"]
+    stream: StreamId
+
+
+ChannelMessage = TypeAdapter(
+    Annotated[
+        Union[
+            ChannelAuth,
+            ChannelPing,
+            ChannelPong,
+            ChannelStart,
+            ChannelResume,
+            ChannelCredit,
+            ChannelCancel,
+        ],
+        Field(discriminator="type"),
+    ]
+)
@@ -0,0 +1,110 @@
+from typing import Annotated, Literal, Optional
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.schemas.api_key import ApiKeysPassphrase
+
+
+class ChatCreate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    title: Annotated[str, Field(min_length=1, max_length=255)]
+    api_provider_id: Optional[int] = None
+    model: Optional[Annotated[str, Field(min_length=1, max_length=100)]] = None
+
+
+class ChatUpdate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    title: Optional[Annotated[str, Field(min_length=1, max_length=255)]] = None
+    model: Optional[Annotated[str, Field(min_length=1, max_length=100)]] = None
+
+
+class Chat(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    api_provider_id: Optional[int] = None
+    model: Optional[str] = None
+    last_seq: int
+    last_message_at: datetime
+    created_at: datetime
+
+
+class ChatsResponse(BaseModel):
+    chats: list[Chat]
+    # Pass it as the cursor to get the next page, None if this is the last page.
+    next_cursor: Optional[str] = None
+
+
+class ChatDeleteResponse(BaseModel):
+    message: str = "Chat deleted successfully."
+
+
+class MessageCreate(BaseModel):
+    role: Literal["system", "user", "assistant"]
+    content: Annotated[str, Field(min_length=1)]
+    model: Optional[Annotated[str, Field(min_length=1, max_length=100)]] = None
+
+
+class MessagesCreate(BaseModel):
+    messages: Annotated[
+        list[MessageCreate], Field(min_length=1, max_length=1000)
+    ]
+
+
+class Message(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    seq: int
+    role: str
+    content: str
+    model: Optional[str] = None
+    # Whether the message is an answer that is still being generated.
+    is_generating: bool = False
+    created_at: datetime
+
+
+class MessagesResponse(BaseModel):
+    messages: list[Message]
+    # Whether there are more messages beyond this page, in the direction it was requested in.
+    has_more: bool
+
+
+class MessagesCreateResponse(BaseModel):
+    first_seq: int
+    last_seq: int
+
+
+class MessageSearchResult(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    chat_id: int
+    chat_title: str
+    seq: int
+    role: str
+    model: Optional[str] = None
+    created_at: datetime
+    # The higher, the better the message matches.
+    rank: float
+    # The part of the content matching the query, HTML-escaped, with the matching words wrapped in <b> tags. Safe to
+    # render as HTML text.
+    snippet: str
+
+
+class MessageSearchResponse(BaseModel):
+    results: list[MessageSearchResult]
+    # Pass it as the cursor to get the next page, None if this is the last page.
+    next_cursor: Optional[str] = None
+
+
+class ChatCompletionCreate(ApiKeysPassphrase):
+    content: Annotated[str, Field(min_length=1)]
+    # Overrides the chat's model for this completion only.
+    model: Optional[Annotated[str, Field(min_length=1, max_length=100)]] = None
+
+
+class ChatCompletionStopResponse(BaseModel):
+    message: str = "Answer stopped."
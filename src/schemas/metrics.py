@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+
+
+class CryptoExecutorMetricsResponse(BaseModel):
+    kind: str
+    max_workers: int
+    max_queue_size: int
+    in_flight: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    average_wait_time: float
+    max_wait_time: float
+
+
+class DatabasePoolMetricsResponse(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    checkout_failures: int
+    average_wait_time: float
+    max_wait_time: float
+    wait_time_histogram: dict[str, int]
+
+
+class CacheMetricsResponse(BaseModel):
+    enabled: bool
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class ThrottleMetricsResponse(BaseModel):
+    enabled: bool
+    load: float
+    max_load: float
+    throttled: int
+    shed: int
@@ -1,18 +1,20 @@
-from cryptography.fernet import Fernet
+import hmac
 
 from fastapi import Depends, HTTPException, status
 
 from src.repositories.api_key import ApiKeyRepository
 from src.schemas.api_key import (
     ApiKey,
+    ApiKeyCreate,
     ApiKeysResponse,
     ApiKeysUpdate,
     ApiKeysUpdateResponse,
 )
 
-from src.schemas.api_provider import ApiProvidersResponse
+from src.utils.catalog import ApiProviderCatalogSnapshot
 
-from src.utils.passphrase import passphrase_util
+from src.utils.cipher import cipher_util
+from src.utils.crypto_executor import crypto_executor
 
 from .base import BaseService
 
@@ -37,78 +39,143 @@ class ApiKeyService(BaseService[ApiKeyRepository]):
 
         super().__init__(repository)
 
-    def create(self, payload) -> None:
+    async def create(self, payload) -> None:
         """
         This method is implemented in AuthService, but not in ApiKeyService.
         """
 
         pass
 
-    def get_user_api_keys(
-        self, user_id: int, fernet_key: Fernet
+    @staticmethod
+    def _get_associated_data(user_id: int, api_provider_id: int) -> bytes:
+        """
+        Get the associated data an encrypted API key is bound to, so it cannot be decrypted after being moved
+        to another user or provider.
+
+        Args:
+            user_id (int): The user's ID.
+            api_provider_id (int): The API provider's ID.
+
+        Returns:
+            bytes: The associated data.
+        """
+
+        return f"api_keys:{user_id}:{api_provider_id}".encode()
+
+    async def get_user_api_keys(
+        self, user_id: int, data_key: bytes
     ) -> ApiKeysResponse:
         """
-        Get all user's API keys by user ID and decrypt them using the user's Fernet key.
+        Get all user's API keys by user ID and decrypt them using the user's data key.
 
         Args:
             user_id (int): The user's ID.
-            fernet_key (bytes): The user's Fernet key.
+            data_key (bytes): The user's data key.
 
         Returns:
             ApiKeysResponse: The API keys response containing the user's API keys.
         """
 
-        api_keys = self.repository.get_all_by_user_id(user_id)
+        api_keys = await self.repository.get_all_by_user_id(user_id)
 
         if api_keys:
+            decrypted_keys = await crypto_executor.decrypt_many(
+                data_key,
+                [
+                    (
+                        api_key.key,
+                        self._get_associated_data(
+                            user_id, api_key.api_provider_id
+                        ),
+                    )
+                    for api_key in api_keys
+                ],
+            )
             api_keys = [
                 ApiKey(
                     id=api_key.id,
-                    key=fernet_key.decrypt(
-                        passphrase_util.convert_hex_to_bytes(api_key.key)
-                    ),
+                    key=decrypted_key.decode(),
                     api_provider_id=api_key.api_provider.id,
                     api_provider_name=api_key.api_provider.name,
                     api_provider_lowercase_name=api_key.api_provider.lowercase_name,
                 )
-                for api_key in api_keys
+                for api_key, decrypted_key in zip(api_keys, decrypted_keys)
             ]
 
         return ApiKeysResponse(api_keys=api_keys)
 
-    def _set_api_key_operation(
+    async def get_user_api_key(
+        self, user_id: int, data_key: bytes, api_provider_id: int
+    ) -> str:
+        """
+        Get the user's API key for an API provider and decrypt it using the user's data key.
+
+        Args:
+            user_id (int): The user's ID.
+            data_key (bytes): The user's data key.
+            api_provider_id (int): The API provider's ID.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the user has no API key for the API provider.
+
+        Returns:
+            str: The decrypted API key.
+        """
+
+        encrypted_key = (
+            await self.repository.get_one_key_by_user_id_and_api_provider_id(
+                user_id, api_provider_id
+            )
+        )
+
+        if encrypted_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Please add your API key for this chat's API provider first.",
+            )
+
+        [decrypted_key] = await crypto_executor.decrypt_many(
+            data_key,
+            [
+                (
+                    encrypted_key,
+                    self._get_associated_data(user_id, api_provider_id),
+                )
+            ],
+        )
+
+        return decrypted_key.decode()
+
+    async def _set_api_key_operation(
         self,
         user_id: int,
-        fernet_key: Fernet,
-        db_all_api_providers: ApiProvidersResponse,
+        data_key: bytes,
+        api_provider_catalog: ApiProviderCatalogSnapshot,
         payload: ApiKeysUpdate,
-    ) -> tuple[list[dict], list[dict], list[dict]]:
+    ) -> tuple[list[dict], list[int] | None]:
         """
         Helper method to set the API key CRUD operation based on the payload.
 
         Args:
             user_id (int): The user's ID.
-            fernet_key (Fernet): The user's Fernet key.
-            db_all_api_providers (ApiProvidersResponse): All API providers.
+            data_key (bytes): The user's data key.
+            api_provider_catalog (ApiProviderCatalogSnapshot): The current snapshot of the API provider catalog.
             payload (ApiKeysUpdate): The API keys update payload.
 
         Returns:
-            tuple[list[dict], list[dict], list[dict]]: A tuple containing the API keys to create, update and delete.
+            tuple[list[dict], list[int] | None]: A tuple containing the new or changed API keys to insert or overwrite
+                and the IDs of the API providers whose keys are kept, or None if no key has to be deleted.
         """
 
-        db_api_keys = self.get_user_api_keys(user_id, fernet_key)
-
-        api_keys_to_create: list[dict] = []
-        api_keys_to_update: list[dict] = []
-        api_keys_to_delete: list[dict] = []
-
-        payload_provider_ids: set[int] = {
-            api_key.api_provider_id for api_key in payload.api_keys
-        }
-        db_provider_ids: set[int] = {
-            provider.id for provider in db_all_api_providers.api_providers
+        payload_api_keys = {
+            api_key.api_provider_id: api_key
+            for api_key in payload.api_keys or []
         }
-        invalid_provider_ids: set[int] = payload_provider_ids - db_provider_ids
+        invalid_provider_ids: list[int] = [
+            api_provider_id
+            for api_provider_id in payload_api_keys
+            if api_provider_catalog.get_by_id(api_provider_id) is None
+        ]
 
         if invalid_provider_ids:
             raise HTTPException(
@@ -116,50 +183,76 @@ class ApiKeyService(BaseService[ApiKeyRepository]):
                 detail=f"Invalid API provider ID(s): {', '.join(map(str, invalid_provider_ids))}",
             )
 
-        api_keys_to_delete = [
-            {"id": db_api_key.id}
-            for db_api_key in db_api_keys.api_keys
-            if db_api_key.api_provider_id not in payload_provider_ids
-        ]
-
-        for api_key in payload.api_keys:
-            encrypted_key = passphrase_util.convert_bytes_to_hex(
-                fernet_key.encrypt(api_key.key.encode())
+        db_api_keys = {
+            db_api_key.api_provider_id: db_api_key
+            for db_api_key in await self.repository.get_all_fingerprints_by_user_id(
+                user_id
             )
+        }
+
+        api_provider_ids_to_keep: list[int] | None = (
+            None
+            if db_api_keys.keys() <= payload_api_keys.keys()
+            else list(payload_api_keys)
+        )
 
-            existing_key = next(
+        # Fingerprinting is a single HMAC per key, cheap enough to run inline, unlike the encryption below.
+        fingerprints = cipher_util.fingerprint_many(
+            data_key,
+            [
                 (
-                    db_api_key
-                    for db_api_key in db_api_keys.api_keys
-                    if db_api_key.api_provider_id == api_key.api_provider_id
-                ),
-                None,
+                    api_key.key.encode(),
+                    self._get_associated_data(user_id, api_provider_id),
+                )
+                for api_provider_id, api_key in payload_api_keys.items()
+            ],
+        )
+
+        # Keys whose fingerprint matches the stored one haven't changed and are left alone. Keys stored before
+        # fingerprints were introduced have none, so they are rewritten once, which also re-encrypts them with
+        # the latest format.
+        changed_api_keys: list[tuple[ApiKeyCreate, bytes]] = [
+            (api_key, fingerprint)
+            for api_key, fingerprint in zip(
+                payload_api_keys.values(), fingerprints
             )
+            if (db_api_key := db_api_keys.get(api_key.api_provider_id)) is None
+            or db_api_key.fingerprint is None
+            or not hmac.compare_digest(db_api_key.fingerprint, fingerprint)
+        ]
 
-            if existing_key:
-                if existing_key.key != api_key.key:
-                    api_keys_to_update.append(
-                        {
-                            "id": existing_key.id,
-                            "key": encrypted_key,
-                        }
-                    )
-            else:
-                api_keys_to_create.append(
-                    {
-                        "key": encrypted_key,
-                        "user_id": user_id,
-                        "api_provider_id": api_key.api_provider_id,
-                    }
+        if not changed_api_keys:
+            return [], api_provider_ids_to_keep
+
+        encrypted_keys = await crypto_executor.encrypt_many(
+            data_key,
+            [
+                (
+                    api_key.key.encode(),
+                    self._get_associated_data(user_id, api_key.api_provider_id),
                 )
+                for api_key, _ in changed_api_keys
+            ],
+        )
+
+        api_keys_to_upsert: list[dict] = [
+            {
+                "api_provider_id": api_key.api_provider_id,
+                "key": encrypted_key,
+                "fingerprint": fingerprint,
+            }
+            for (api_key, fingerprint), encrypted_key in zip(
+                changed_api_keys, encrypted_keys
+            )
+        ]
 
-        return api_keys_to_create, api_keys_to_update, api_keys_to_delete
+        return api_keys_to_upsert, api_provider_ids_to_keep
 
-    def update_user_api_keys(
+    async def update_user_api_keys(
         self,
         user_id: int,
-        fernet_key: Fernet,
-        db_all_api_providers: ApiProvidersResponse,
+        data_key: bytes,
+        api_provider_catalog: ApiProviderCatalogSnapshot,
         payload: ApiKeysUpdate,
     ) -> ApiKeysUpdateResponse:
         """
@@ -167,29 +260,24 @@ class ApiKeyService(BaseService[ApiKeyRepository]):
 
         Args:
             user_id (int): The user's ID.
-            fernet_key (Fernet): The user's Fernet key.
-            db_all_api_providers (ApiProvidersResponse): All API providers.
+            data_key (bytes): The user's data key.
+            api_provider_catalog (ApiProviderCatalogSnapshot): The current snapshot of the API provider catalog.
             payload (ApiKeysUpdate): The API keys update payload.
 
         Returns:
             ApiKeysUpdateResponse: The API keys update response containing the message.
         """
 
-        api_keys_to_create, api_keys_to_update, api_keys_to_delete = (
-            self._set_api_key_operation(
-                user_id, fernet_key, db_all_api_providers, payload
+        api_keys_to_upsert, api_provider_ids_to_keep = (
+            await self._set_api_key_operation(
+                user_id, data_key, api_provider_catalog, payload
             )
         )
 
-        if api_keys_to_create or api_keys_to_update or api_keys_to_delete:
-            if api_keys_to_create:
-                self.repository.create_bulk(api_keys_to_create)
-            if api_keys_to_update:
-                self.repository.update_bulk(api_keys_to_update)
-            if api_keys_to_delete:
-                self.repository.delete_selected_by_user_id(
-                    user_id, api_keys_to_delete
-                )
+        if api_keys_to_upsert or api_provider_ids_to_keep is not None:
+            await self.repository.sync_by_user_id(
+                user_id, api_keys_to_upsert, api_provider_ids_to_keep
+            )
 
             return ApiKeysUpdateResponse(
                 message="API keys updated successfully."
@@ -199,7 +287,7 @@ class ApiKeyService(BaseService[ApiKeyRepository]):
                 message="Your API keys are already up to date. No changes were made."
             )
 
-    def delete_user_api_keys(self, user_id: int) -> None:
+    async def delete_user_api_keys(self, user_id: int) -> None:
         """
         Delete all API keys associated with the user by their ID.
 
@@ -210,4 +298,4 @@ class ApiKeyService(BaseService[ApiKeyRepository]):
             None
         """
 
-        self.repository.delete_all_by_user_id(user_id)
+        await self.repository.delete_all_by_user_id(user_id)
@@ -1,12 +1,15 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 
 from src.repositories.api_provider import ApiProviderRepository
 from src.schemas.api_provider import (
+    ApiProviderCatalogItem,
     ApiProviderCreate,
     ApiProviderCreateResponse,
-    ApiProvidersResponse,
 )
 
+from src.utils.etag import etag_util
+from src.utils.catalog import api_provider_catalog, ApiProviderCatalogSnapshot
+
 from .base import BaseService
 
 
@@ -30,7 +33,9 @@ class ApiProviderService(BaseService[ApiProviderRepository]):
 
         super().__init__(repository)
 
-    def create(self, payload: ApiProviderCreate) -> ApiProviderCreateResponse:
+    async def create(
+        self, payload: ApiProviderCreate
+    ) -> ApiProviderCreateResponse:
         """
         Create new API provider and store it in the database.
 
@@ -47,7 +52,7 @@ class ApiProviderService(BaseService[ApiProviderRepository]):
 
         # api_provider = self.repository.get_one_by_name(payload.lowercase_name)
         api_provider = (
-            self.repository.get_one_with_selected_attributes_by_condition(
+            await self.repository.get_one_with_selected_attributes_by_condition(
                 ["id"],
                 "lowercase_name",
                 payload.lowercase_name,
@@ -59,16 +64,87 @@ class ApiProviderService(BaseService[ApiProviderRepository]):
                 status_code=status.HTTP_409_CONFLICT,
                 detail=f"API provider {payload.name} already exists. Name must be unique.",
             )
-        self.repository.create(payload.model_dump())
+        await self.repository.create(payload.model_dump())
+        await self.repository.bump_catalog_version()
+        # Invalidated only once the change is visible, so a concurrent request can't cache the old catalog again.
+        self.repository.after_commit(api_provider_catalog.invalidate)
 
         return ApiProviderCreateResponse()
 
-    def get_all(self) -> ApiProvidersResponse:
+    async def delete_by_id(self, entity_id: int) -> None:
+        """
+        Delete an API provider by its ID and invalidate the API provider catalog.
+
+        Args:
+            entity_id (int): The ID of the API provider to delete.
+
+        Raises:
+            HTTPException: Raised with status code 404 if the API provider is not found.
+
+        Returns:
+            None
+        """
+
+        await super().delete_by_id(entity_id)
+        await self.repository.bump_catalog_version()
+        self.repository.after_commit(api_provider_catalog.invalidate)
+
+    async def refresh_catalog(
+        self, force: bool = False
+    ) -> ApiProviderCatalogSnapshot:
+        """
+        Reload the API provider catalog if its version in the database differs from the version of the current
+        snapshot.
+
+        Args:
+            force (bool): Whether to reload the catalog regardless of its version. Defaults to False.
+
+        Returns:
+            ApiProviderCatalogSnapshot: The current snapshot.
+        """
+
+        # The version is read before the API providers. If they change in between, the snapshot is tagged with
+        # the older version and simply reloaded again on the next refresh, never the other way around.
+        version = await self.repository.get_catalog_version()
+        snapshot = api_provider_catalog.snapshot
+
+        if not force and snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        return api_provider_catalog.load(
+            version,
+            [
+                ApiProviderCatalogItem.model_validate(api_provider)
+                for api_provider in await self.repository.get_all()
+            ],
+        )
+
+    async def get_catalog(self) -> ApiProviderCatalogSnapshot:
         """
-        Get all API providers.
+        Get the current snapshot of the API provider catalog, loading it only if there is none.
 
         Returns:
-            ApiProvidersResponse: A list of all available API providers.
+            ApiProviderCatalogSnapshot: The current snapshot.
         """
 
-        return ApiProvidersResponse(api_providers=self.repository.get_all())
+        return api_provider_catalog.snapshot or await self.refresh_catalog(
+            force=True
+        )
+
+    async def get_all(self, if_none_match: str | None = None) -> Response:
+        """
+        Get all API providers from the API provider catalog.
+
+        Args:
+            if_none_match (str | None): The value of the If-None-Match header sent by the client.
+
+        Returns:
+            Response: The response with the pre-serialized list of all available API providers, or an empty
+                304 response if the client's copy is up to date.
+        """
+
+        catalog = await self.get_catalog()
+
+        return etag_util.create_response(
+            if_none_match, catalog.etag, lambda: catalog.response_body
+        )
@@ -1,13 +1,17 @@
+import hmac
 from typing import Annotated
-from datetime import timedelta, datetime, UTC
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 
-from jose import jwt, JWTError
+from jose import JWTError
 
-from src.utils.hash import hash_util
+from src.utils.kdf import KdfParameters, LEGACY_KDF_PARAMETERS
 from src.utils.passphrase import passphrase_util
+from src.utils.crypto_executor import crypto_executor
+from src.utils.vault import vault_session_store
+from src.utils.token import token_util
+from src.utils.revocation import token_revocation_list
 
 from src.config import settings
 from src.repositories.user import UserRepository
@@ -17,6 +21,11 @@ from src.schemas.auth import (
     AuthRegisterResponse,
     AuthLoginResponse,
 )
+from src.schemas.api_key import (
+    ApiKeysPassphrase,
+    ApiKeysUnlockResponse,
+    ApiKeysLockResponse,
+)
 
 from .base import BaseService
 
@@ -43,29 +52,6 @@ class AuthService(BaseService[UserRepository]):
 
         super().__init__(repository)
 
-    @staticmethod
-    def _create_access_token(email: str, user_id: int) -> str:
-        """
-        Creates an access token for a user.
-
-        Args:
-            email (str): The user's email.
-            user_id (int): The user's ID.
-
-        Returns:
-            str: The access token.
-        """
-
-        encode = {"sub": email, "id": user_id}
-        expires = datetime.now(UTC) + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_IN_MINUTES
-        )
-        encode.update({"exp": expires})
-
-        return jwt.encode(
-            encode, settings.JWT_AUTH_SECRET_KEY, settings.ALGORITHM
-        )
-
     @staticmethod
     async def get_current_user(
         token: Annotated[str, Depends(_oauth2_bearer)]
@@ -73,6 +59,9 @@ class AuthService(BaseService[UserRepository]):
         """
         Retrieves the current user from the token.
 
+        The claims were written by the application itself and their signature was verified,
+        so the email is not validated again.
+
         Args:
             token (str): The user's token.
 
@@ -80,32 +69,43 @@ class AuthService(BaseService[UserRepository]):
             UserCurrent: The current user containing the email and user ID.
 
         Raises:
-            HTTPException: Raised with a 401 status code if the user cannot be authenticated or the token has expired.
+            HTTPException: Raised with a 401 status code if the user cannot be authenticated or the token has expired
+                or was revoked.
         """
 
         try:
-            payload = jwt.decode(
-                token, settings.JWT_AUTH_SECRET_KEY, settings.ALGORITHM
-            )
+            payload = token_util.decode(token)
             email: str = payload.get("sub")
             user_id: int = payload.get("id")
 
-            if email is None or user_id is None:
+            # Tokens issued before refresh tokens were introduced have no type.
+            if (
+                email is None
+                or user_id is None
+                or payload.get("type", "access") != "access"
+            ):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Could not authenticate user.",
                 )
-            return AuthCurrentUser(email=email, user_id=user_id)
+            if token_revocation_list.is_revoked(payload):
+                raise JWTError("Token has been revoked.")
+
+            return AuthCurrentUser.model_construct(email=email, user_id=user_id)
         except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Your session has expired. Please log in again.",
             )
 
-    def create(self, payload: AuthRegister) -> AuthRegisterResponse:
+    async def create(self, payload: AuthRegister) -> AuthRegisterResponse:
         """
         Creates a user.
 
+        The password is always hashed before the user is inserted, and an already registered email is silently
+        skipped by the insert itself. Registering a new and an existing email thus takes the same path and the same
+        time, so the response doesn't reveal whether the email is already in use.
+
         Args:
             payload (AuthRegister): The user's email, name and password.
 
@@ -114,15 +114,21 @@ class AuthService(BaseService[UserRepository]):
                 Message can be customized, but defaults to the one in the schema.
         """
 
-        user = self.repository.get_one_with_selected_attributes_by_condition(
-            ["id"], "email", payload.email
+        hashed_password = await crypto_executor.create_hash(
+            payload.password.get_secret_value()
+        )
+
+        await self.repository.create_if_email_not_exists(
+            {
+                "email": payload.email,
+                "name": payload.name,
+                "password": hashed_password,
+            }
         )
 
-        if not user:
-            self.repository.create(payload.model_dump(exclude={"password_2"}))
         return AuthRegisterResponse()
 
-    def get_authenticated(
+    async def get_authenticated(
         self, payload: OAuth2PasswordRequestForm
     ) -> AuthLoginResponse:
         """
@@ -135,27 +141,106 @@ class AuthService(BaseService[UserRepository]):
             HTTPException: Raised with a 401 status code if the user does not exist or the password is incorrect.
 
         Returns:
-            AuthLoginResponse: The access token and token type.
+            AuthLoginResponse: The access and refresh tokens and token type.
         """
 
-        user = self.repository.get_one_with_selected_attributes_by_condition(
-            ["id", "password"], "email", payload.username
+        user = (
+            await self.repository.get_one_with_selected_attributes_by_condition(
+                ["id", "password"], "email", payload.username
+            )
         )
 
-        if not user or not hash_util.verify_hash(
-            payload.password, user.password
-        ):
+        is_password_valid, new_password_hash = (
+            await crypto_executor.verify_and_update_hash(
+                payload.password, user.password
+            )
+            if user
+            else (False, None)
+        )
+
+        if not is_password_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Your email or password is incorrect. Please try again.",
             )
+        if new_password_hash:
+            # The password was hashed with outdated parameters, replace the hash while we know the password.
+            await self.repository.update_password_by_id(
+                user.id, new_password_hash
+            )
+
+        return AuthLoginResponse(
+            access_token=token_util.create_access_token(
+                payload.username, user.id
+            ),
+            refresh_token=token_util.create_refresh_token(
+                payload.username, user.id
+            ),
+            token_type="bearer",
+        )
+
+    async def _upgrade_passphrase(
+        self,
+        user_id: int,
+        passphrase: str,
+        key: bytes,
+        kdf_parameters: KdfParameters,
+        data_key: bytes,
+    ) -> None:
+        """
+        Store the passphrase verifier, KDF parameters and wrapped data key of a user whose passphrase was created
+        with a legacy bcrypt hash, outdated KDF parameters or before the data key was introduced.
+
+        If the user's KDF parameters are weaker than the current ones, a new key is derived with the current
+        parameters and a fresh salt. Either way only the data key is re-wrapped, the user's data stays untouched.
+
+        Args:
+            user_id (int): The user's ID.
+            passphrase (str): The user's verified passphrase.
+            key (bytes): The key derived with the user's current KDF parameters.
+            kdf_parameters (KdfParameters): The user's current KDF parameters.
+            data_key (bytes): The user's data encryption key.
+
+        Returns:
+            None
+        """
+
+        payload: dict = {"passphrase": None}
+
+        if kdf_parameters.is_weaker_than(passphrase_util.kdf_parameters):
+            salt = passphrase_util.generate_salt()
+            kdf_parameters = passphrase_util.kdf_parameters
+            key, verifier = await crypto_executor.derive_key_and_verifier(
+                passphrase.encode(), salt, kdf_parameters
+            )
+            payload["passphrase_salt"] = passphrase_util.convert_bytes_to_hex(
+                salt
+            )
+        else:
+            verifier = passphrase_util.derive_verifier(key)
+
+        payload.update(
+            {
+                "passphrase_verifier": passphrase_util.convert_bytes_to_hex(
+                    verifier
+                ),
+                "passphrase_kdf": kdf_parameters.encode(),
+                "encrypted_data_key": passphrase_util.wrap_data_key(
+                    key, data_key
+                ),
+            }
+        )
 
-        token = self._create_access_token(payload.username, user.id)
-        return AuthLoginResponse(access_token=token, token_type="bearer")
+        await self.repository.update_passphrase_by_id(user_id, payload)
 
-    def get_fernet_key(self, user_id: int, passphrase: str) -> bytes:
+    async def _derive_data_key(self, user_id: int, passphrase: str) -> bytes:
         """
-        Verify the user's passphrase and generate a Fernet key.
+        Verify the user's passphrase and unwrap the data key used to encrypt the user's API keys.
+
+        The key deriving the data key's wrapping key and the passphrase verifier come from a single key derivation
+        with the KDF parameters stored for the user. Users whose passphrase is still stored as a bcrypt hash, whose
+        KDF parameters are weaker than the current ones or who don't have a data key yet are upgraded transparently
+        after their passphrase is verified.
 
         Args:
             user_id (int): The user's ID.
@@ -165,21 +250,144 @@ class AuthService(BaseService[UserRepository]):
             HTTPException: Raised with a 400 status code if the passphrase is incorrect.
 
         Returns:
-            bytes: The Fernet key.
+            bytes: The data key.
         """
 
-        user = self.repository.get_one_with_selected_attributes_by_condition(
-            ["passphrase", "passphrase_salt"], "id", user_id
+        user = (
+            await self.repository.get_one_with_selected_attributes_by_condition(
+                [
+                    "passphrase",
+                    "passphrase_salt",
+                    "passphrase_verifier",
+                    "passphrase_kdf",
+                    "encrypted_data_key",
+                ],
+                "id",
+                user_id,
+            )
+        )
+
+        is_passphrase_valid = False
+        salt = passphrase_util.convert_hex_to_bytes(user.passphrase_salt or "")
+        kdf_parameters = (
+            KdfParameters.decode(user.passphrase_kdf)
+            if user.passphrase_kdf
+            else LEGACY_KDF_PARAMETERS
         )
 
-        if not hash_util.verify_hash(passphrase, user.passphrase):
+        if user.passphrase_verifier:
+            key, verifier = await crypto_executor.derive_key_and_verifier(
+                passphrase.encode(), salt, kdf_parameters
+            )
+            is_passphrase_valid = hmac.compare_digest(
+                verifier,
+                passphrase_util.convert_hex_to_bytes(user.passphrase_verifier),
+            )
+        elif user.passphrase and await crypto_executor.verify_hash(
+            passphrase, user.passphrase
+        ):
+            key = await crypto_executor.derive_key(
+                passphrase.encode(), salt, kdf_parameters
+            )
+            is_passphrase_valid = True
+
+        if not is_passphrase_valid:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Please check your passphrase and try again.",
             )
 
-        fernet_key = passphrase_util.generate_fernet_key(
-            passphrase.encode(),
-            passphrase_util.convert_hex_to_bytes(user.passphrase_salt),
+        if user.encrypted_data_key:
+            data_key = passphrase_util.unwrap_data_key(
+                key, user.encrypted_data_key
+            )
+        else:
+            # API keys stored before data keys were introduced are encrypted directly with the passphrase key,
+            # so it becomes the user's data key.
+            data_key = key
+
+        if (
+            not user.passphrase_verifier
+            or not user.encrypted_data_key
+            or kdf_parameters.is_weaker_than(passphrase_util.kdf_parameters)
+        ):
+            await self._upgrade_passphrase(
+                user_id, passphrase, key, kdf_parameters, data_key
+            )
+        return data_key
+
+    async def get_data_key(
+        self, user_id: int, payload: ApiKeysPassphrase
+    ) -> bytes:
+        """
+        Get the user's data key either from an unlocked vault session or by verifying the user's passphrase.
+
+        Args:
+            user_id (int): The user's ID.
+            payload (ApiKeysPassphrase): The payload containing either the passphrase or the unlock token.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the passphrase is incorrect.
+            HTTPException: Raised with a 403 status code if the unlock token is invalid or has expired.
+
+        Returns:
+            bytes: The data key.
+        """
+
+        if payload.unlock_token is not None:
+            data_key = vault_session_store.get(
+                user_id, payload.unlock_token.get_secret_value()
+            )
+
+            if data_key is None:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Your API keys are locked. Please unlock them with your passphrase again.",
+                )
+            return data_key
+
+        return await self._derive_data_key(
+            user_id, payload.passphrase.get_secret_value()
         )
-        return fernet_key
+
+    async def unlock_vault(
+        self, user_id: int, passphrase: str
+    ) -> ApiKeysUnlockResponse:
+        """
+        Verify the user's passphrase once and exchange it for an unlock token,
+        so the data key does not have to be derived again on every request.
+
+        Args:
+            user_id (int): The user's ID.
+            passphrase (str): The user's passphrase.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the passphrase is incorrect.
+
+        Returns:
+            ApiKeysUnlockResponse: The unlock token and its lifetime in seconds.
+        """
+
+        data_key = await self._derive_data_key(user_id, passphrase)
+        unlock_token = vault_session_store.create(user_id, data_key)
+
+        return ApiKeysUnlockResponse(
+            unlock_token=unlock_token,
+            expires_in=settings.VAULT_SESSION_TTL_IN_SECONDS,
+        )
+
+    @staticmethod
+    def lock_vault(user_id: int, unlock_token: str) -> ApiKeysLockResponse:
+        """
+        Lock the vault by dropping the data key stored behind the unlock token.
+
+        Args:
+            user_id (int): The user's ID.
+            unlock_token (str): The unlock token.
+
+        Returns:
+            ApiKeysLockResponse: A message informing that the API keys were locked.
+        """
+
+        vault_session_store.lock(user_id, unlock_token)
+        return ApiKeysLockResponse()
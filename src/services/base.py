@@ -31,7 +31,7 @@ class BaseService[T: BaseRepository](ABC):
         self.repository = repository
 
     @abstractmethod
-    def create(self, payload) -> None:
+    async def create(self, payload) -> None:
         """
         Create new entity and store it in the database.
 
@@ -47,7 +47,7 @@ class BaseService[T: BaseRepository](ABC):
 
         pass
 
-    def get_one_by_id(self, entity_id: int):
+    async def get_one_by_id(self, entity_id: int):
         """
         Get an entity by its ID.
 
@@ -59,14 +59,14 @@ class BaseService[T: BaseRepository](ABC):
         """
 
         try:
-            return self.repository.get_one_by_id(entity_id)
+            return await self.repository.get_one_by_id(entity_id)
         except NoResultFound:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Entity with ID {entity_id} not found",
             )
 
-    def delete_by_id(self, entity_id: int) -> None:
+    async def delete_by_id(self, entity_id: int) -> None:
         """
         Delete an entity by its ID.
 
@@ -81,7 +81,7 @@ class BaseService[T: BaseRepository](ABC):
         """
 
         try:
-            self.repository.delete_by_id(entity_id)
+            await self.repository.delete_by_id(entity_id)
         except NoResultFound:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,240 @@
+from datetime import datetime
+
+from fastapi import Depends, HTTPException, status
+
+from src.repositories.chat import ChatRepository
+from src.schemas.chat import (
+    Chat,
+    ChatCreate,
+    ChatUpdate,
+    ChatsResponse,
+    ChatDeleteResponse,
+)
+
+from src.utils.catalog import ApiProviderCatalogSnapshot
+from src.utils.cursor import cursor_util
+
+from .base import BaseService
+
+
+class ChatService(BaseService[ChatRepository]):
+    """
+    Service for chat related operations.
+    """
+
+    def __init__(
+        self, repository: ChatRepository = Depends(ChatRepository)
+    ) -> None:
+        """
+        Initializes the service with the repository.
+
+        Args:
+            repository (ChatRepository): The repository to use for chat operations.
+
+        Returns:
+            None
+        """
+
+        super().__init__(repository)
+
+    async def create(self, payload) -> None:
+        """
+        Chats always belong to a user, so they are created with create_user_chat instead.
+        """
+
+        pass
+
+    @staticmethod
+    def _validate_api_provider_id(
+        api_provider_catalog: ApiProviderCatalogSnapshot,
+        api_provider_id: int | None,
+    ) -> None:
+        """
+        Check whether the API provider of a chat exists.
+
+        Args:
+            api_provider_catalog (ApiProviderCatalogSnapshot): The current snapshot of the API provider catalog.
+            api_provider_id (int | None): The ID of the API provider, if any.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the API provider does not exist.
+
+        Returns:
+            None
+        """
+
+        if (
+            api_provider_id is not None
+            and api_provider_catalog.get_by_id(api_provider_id) is None
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid API provider ID: {api_provider_id}",
+            )
+
+    async def create_user_chat(
+        self,
+        user_id: int,
+        api_provider_catalog: ApiProviderCatalogSnapshot,
+        payload: ChatCreate,
+    ) -> Chat:
+        """
+        Create a new chat of a user.
+
+        Args:
+            user_id (int): The user's ID.
+            api_provider_catalog (ApiProviderCatalogSnapshot): The current snapshot of the API provider catalog.
+            payload (ChatCreate): The chat's title and optionally the API provider's ID and the model.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the API provider does not exist.
+
+        Returns:
+            Chat: The created chat.
+        """
+
+        self._validate_api_provider_id(
+            api_provider_catalog, payload.api_provider_id
+        )
+
+        chat = await self.repository.create_for_user(
+            user_id, payload.model_dump()
+        )
+
+        return Chat.model_validate(chat)
+
+    async def get_user_chat(self, user_id: int, chat_id: int) -> Chat:
+        """
+        Get a chat of a user.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the user has no chat with this ID.
+
+        Returns:
+            Chat: The chat.
+        """
+
+        chat = await self.repository.get_one_by_user_id_and_id(user_id, chat_id)
+
+        if chat is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found."
+            )
+        return Chat.model_validate(chat)
+
+    async def get_user_chats(
+        self, user_id: int, limit: int, cursor: str | None = None
+    ) -> ChatsResponse:
+        """
+        Get a page of a user's chats, the most recently active ones first.
+
+        Args:
+            user_id (int): The user's ID.
+            limit (int): The maximum number of chats.
+            cursor (str | None): The cursor returned with the previous page. Defaults to None, which gets the first
+                page.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the cursor is invalid.
+
+        Returns:
+            ChatsResponse: The chats and the cursor of the next page.
+        """
+
+        after = None
+
+        if cursor is not None:
+            values = cursor_util.decode(cursor)
+            try:
+                after = (datetime.fromisoformat(values[0]), int(values[1]))
+            except (IndexError, TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor.",
+                )
+
+        # One more chat than requested tells whether there is a next page.
+        chats = await self.repository.get_page_by_user_id(
+            user_id, limit + 1, after
+        )
+        next_cursor = (
+            cursor_util.encode(
+                [
+                    chats[limit - 1].last_message_at.isoformat(),
+                    chats[limit - 1].id,
+                ]
+            )
+            if len(chats) > limit
+            else None
+        )
+
+        return ChatsResponse(
+            chats=[Chat.model_validate(chat) for chat in chats[:limit]],
+            next_cursor=next_cursor,
+        )
+
+    async def update_user_chat(
+        self,
+        user_id: int,
+        chat_id: int,
+        payload: ChatUpdate,
+    ) -> Chat:
+        """
+        Update the title or the model of a user's chat.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            payload (ChatUpdate): The payload containing the optional fields to update.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the user has no chat with this ID.
+
+        Returns:
+            Chat: The updated chat.
+        """
+
+        updated_fields = payload.model_dump(exclude_none=True)
+
+        chat = (
+            await self.repository.update_by_user_id_and_id(
+                user_id, chat_id, updated_fields
+            )
+            if updated_fields
+            else await self.repository.get_one_by_user_id_and_id(
+                user_id, chat_id
+            )
+        )
+
+        if chat is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found."
+            )
+        return Chat.model_validate(chat)
+
+    async def delete_user_chat(
+        self, user_id: int, chat_id: int
+    ) -> ChatDeleteResponse:
+        """
+        Delete a chat of a user together with its messages.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the user has no chat with this ID.
+
+        Returns:
+            ChatDeleteResponse: A message informing that the chat was deleted.
+        """
+
+        if not await self.repository.delete_by_user_id_and_id(user_id, chat_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found."
+            )
+        return ChatDeleteResponse()
@@ -0,0 +1,668 @@
+import asyncio
+import logging
+from functools import partial
+from typing import AsyncIterator, Callable
+from contextlib import aclosing
+
+import anyio
+from openai import APIError, APIStatusError
+
+from fastapi import Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from src.config import settings
+from src.database.core import SessionLocal
+from src.models.message import Message
+from src.repositories.message import MessageRepository
+from src.schemas.chat import (
+    Chat,
+    ChatCompletionCreate,
+    ChatCompletionStopResponse,
+)
+
+from src.utils.catalog import ApiProviderCatalogSnapshot
+from src.utils.completion import completion_client
+from src.utils.generation import Generation, generation_registry
+from src.utils.sse import sse_util
+
+from .base import BaseService
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionService(BaseService[MessageRepository]):
+    """
+    Service for streaming chat completions of the API providers.
+    """
+
+    def __init__(
+        self, repository: MessageRepository = Depends(MessageRepository)
+    ) -> None:
+        """
+        Initializes the service with the repository.
+
+        Args:
+            repository (MessageRepository): The repository to use for message operations.
+
+        Returns:
+            None
+        """
+
+        super().__init__(repository)
+
+    async def create(self, payload) -> None:
+        """
+        Completions always belong to a chat, so they are created with create_chat_completion instead.
+        """
+
+        pass
+
+    @staticmethod
+    async def _append_content(
+        user_id: int, chat_id: int, seq: int, content: str
+    ) -> bool:
+        """
+        Append a batch of tokens to the answer, using a session of its own, since the answer is generated
+        independently of any request.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+            content (str): The batch of tokens.
+
+        Returns:
+            bool: Whether the batch was stored.
+        """
+
+        try:
+            async with SessionLocal() as db:
+                await MessageRepository(db).append_content(
+                    user_id, chat_id, seq, content
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to store a part of an answer")
+            return False
+
+        return True
+
+    @staticmethod
+    async def _finish_answer(user_id: int, chat_id: int, seq: int) -> None:
+        """
+        Mark the answer as no longer being generated, using a session of its own.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+
+        Returns:
+            None
+        """
+
+        try:
+            async with SessionLocal() as db:
+                await MessageRepository(db).finish_generating(
+                    user_id, chat_id, seq
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to mark an answer as finished")
+
+    @staticmethod
+    async def _load_answer(
+        user_id: int, chat_id: int, seq: int
+    ) -> Message | None:
+        """
+        Load the stored answer, using a session of its own.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+
+        Returns:
+            Message | None: The answer or None if there is none.
+        """
+
+        async with SessionLocal() as db:
+            messages = await MessageRepository(db).get_page_by_chat_id(
+                user_id, chat_id, 1, after_seq=seq - 1
+            )
+
+        return messages[0] if messages and messages[0].seq == seq else None
+
+    async def _load_content(self, user_id: int, chat_id: int, seq: int) -> str:
+        """
+        Load the stored part of an answer, using a session of its own.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+
+        Returns:
+            str: The stored part of the answer.
+        """
+
+        answer = await self._load_answer(user_id, chat_id, seq)
+
+        return answer.content if answer is not None else ""
+
+    async def stream_answer(
+        self,
+        user_id: int,
+        chat_id: int,
+        seq: int,
+        api_key: str,
+        base_url: str,
+        model: str,
+        messages: list[dict],
+        on_stored: Callable[[int], None] | None = None,
+    ) -> AsyncIterator[tuple[str, dict, int | None]]:
+        """
+        Stream the answer of the API provider and store it in batches.
+
+        Every token is passed on as soon as it arrives. The tokens are buffered and appended to the answer once the
+        buffer is large or old enough, while at most one write is in flight, so writing never delays the stream.
+        A batch that failed to be stored is retried with the next one. Whatever was received is stored, even if the
+        stream is cancelled or the API provider fails, and the answer is marked as no longer being generated
+        afterwards.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+            api_key (str): The user's decrypted API key.
+            base_url (str): The base URL of the API provider's OpenAI-compatible API.
+            model (str): The model to generate the answer with.
+            messages (list[dict]): The conversation, ending with the user's new message.
+            on_stored (Callable[[int], None] | None): Called with the stored length of the answer after every
+                stored batch. Defaults to None.
+
+        Yields:
+            tuple[str, dict, int | None]: The type, data and ID of the "token" events, followed by a "done" or an
+                "error" event. The ID of a token event is the length of the answer received so far.
+        """
+
+        buffer: list[str] = []
+        buffer_size = 0
+        offset = 0
+        write: asyncio.Task | None = None
+        loop = asyncio.get_running_loop()
+        flushed_at = loop.time()
+
+        async def store(content: str, length: int) -> None:
+            nonlocal buffer, buffer_size
+
+            if await self._append_content(user_id, chat_id, seq, content):
+                if on_stored is not None:
+                    on_stored(length)
+            else:
+                buffer.insert(0, content)
+                buffer_size += len(content)
+
+        def flush() -> None:
+            nonlocal buffer, buffer_size, write, flushed_at
+
+            write = asyncio.create_task(store("".join(buffer), offset))
+            buffer = []
+            buffer_size = 0
+            flushed_at = loop.time()
+
+        async def drain() -> None:
+            if write is not None:
+                await write
+            if buffer:
+                flush()
+                await write
+
+        finished = False
+
+        async def finish() -> None:
+            nonlocal finished
+
+            await drain()
+            if not finished:
+                finished = True
+                await self._finish_answer(user_id, chat_id, seq)
+
+        try:
+            stream = await completion_client.create(
+                api_key, base_url
+            ).chat.completions.create(
+                model=model, messages=messages, stream=True
+            )
+
+            # Closes the connection to the API provider if the stream is cancelled.
+            async with stream:
+                async for chunk in stream:
+                    token = (
+                        chunk.choices[0].delta.content
+                        if chunk.choices
+                        else None
+                    )
+
+                    if not token:
+                        continue
+
+                    offset += len(token)
+                    buffer.append(token)
+                    buffer_size += len(token)
+
+                    yield "token", {"content": token}, offset
+
+                    if (write is None or write.done()) and (
+                        buffer_size
+                        >= settings.COMPLETION_FLUSH_SIZE_IN_CHARACTERS
+                        or loop.time() - flushed_at
+                        >= settings.COMPLETION_FLUSH_INTERVAL_IN_SECONDS
+                    ):
+                        flush()
+
+            # The answer is stored completely before it is reported as done.
+            await finish()
+            yield "done", {"seq": seq, "length": offset}, None
+        except APIError as e:
+            logger.info("The API provider failed to stream an answer: %s", e)
+            await finish()
+            yield "error", {
+                "detail": (
+                    f"The API provider rejected the request with status code {e.status_code}."
+                    if isinstance(e, APIStatusError)
+                    else "The API provider could not be reached. Please try again later."
+                )
+            }, None
+        finally:
+            # Runs even if the stream was cancelled.
+            with anyio.CancelScope(shield=True):
+                await finish()
+
+    @staticmethod
+    def get_base_url(
+        api_provider_catalog: ApiProviderCatalogSnapshot,
+        api_provider_id: int | None,
+    ) -> str:
+        """
+        Get the base URL of the OpenAI-compatible API of a chat's API provider.
+
+        Args:
+            api_provider_catalog (ApiProviderCatalogSnapshot): The current snapshot of the API provider catalog.
+            api_provider_id (int | None): The ID of the chat's API provider, if any.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if completions are not supported for the API provider.
+
+        Returns:
+            str: The base URL.
+        """
+
+        api_provider = (
+            api_provider_catalog.get_by_id(api_provider_id)
+            if api_provider_id is not None
+            else None
+        )
+        base_url = (
+            completion_client.get_base_url(api_provider.lowercase_name)
+            if api_provider is not None
+            else None
+        )
+
+        if base_url is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Completions are not supported for this chat's API provider.",
+            )
+        return base_url
+
+    async def start_chat_completion(
+        self, user_id: int, chat: Chat, payload: ChatCompletionCreate
+    ) -> tuple[int, str, list[dict]]:
+        """
+        Store the user's message and an empty answer, which is filled in while it is streamed, and build the
+        conversation to send to the API provider.
+
+        Args:
+            user_id (int): The user's ID.
+            chat (Chat): The user's chat.
+            payload (ChatCompletionCreate): The user's message and optionally the model to answer it with.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if neither the payload nor the chat specify a model.
+            HTTPException: Raised with a 404 status code if the chat was deleted in the meantime.
+
+        Returns:
+            tuple[int, str, list[dict]]: The sequence number of the user's message, the model and the conversation.
+                The answer's sequence number follows the one of the user's message.
+        """
+
+        model = payload.model or chat.model
+
+        if model is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Please choose a model for this chat first.",
+            )
+
+        history = await self.repository.get_page_by_chat_id(
+            user_id, chat.id, settings.COMPLETION_MAX_HISTORY_MESSAGES
+        )
+        messages = [
+            {"role": message.role, "content": message.content}
+            for message in history
+            # Answers that failed before their first token are empty.
+            if message.content
+        ]
+        messages.append({"role": "user", "content": payload.content})
+
+        first_seq = await self.repository.create_bulk_in_chat(
+            user_id,
+            chat.id,
+            [
+                {
+                    "role": "user",
+                    "content": payload.content,
+                    "model": None,
+                    "is_generating": False,
+                },
+                {
+                    "role": "assistant",
+                    "content": "",
+                    "model": model,
+                    "is_generating": True,
+                },
+            ],
+        )
+
+        if first_seq is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found."
+            )
+        return first_seq, model, messages
+
+    async def start_generation(
+        self,
+        user_id: int,
+        chat: Chat,
+        api_key: str,
+        base_url: str,
+        payload: ChatCompletionCreate,
+    ) -> Generation:
+        """
+        Send a message to a chat of the user and generate the answer of the chat's API provider in a server-side
+        task, which keeps running if the client disconnects.
+
+        The generation starts once the user's message and the empty answer are committed. The user's slot for it is
+        reserved right away and given back if the work is not committed.
+
+        Args:
+            user_id (int): The user's ID.
+            chat (Chat): The user's chat.
+            api_key (str): The user's decrypted API key for the chat's API provider.
+            base_url (str): The base URL of the API provider's OpenAI-compatible API.
+            payload (ChatCompletionCreate): The user's message and optionally the model to answer it with.
+
+        Raises:
+            HTTPException: Raised with a 429 status code if the user is generating too many answers at once.
+            HTTPException: Raised with a 400 status code if neither the payload nor the chat specify a model.
+
+        Returns:
+            Generation: The generation, to be read from.
+        """
+
+        if not generation_registry.try_reserve(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many answers are being generated at once. Please wait for one of them to finish.",
+            )
+        # The slot is taken over by the generation once it starts.
+        self.repository.after_rollback(
+            partial(generation_registry.release, user_id)
+        )
+
+        first_seq, model, messages = await self.start_chat_completion(
+            user_id, chat, payload
+        )
+        generation = generation_registry.create(
+            user_id, chat.id, first_seq + 1, model
+        )
+        events = self.stream_answer(
+            user_id,
+            chat.id,
+            generation.seq,
+            api_key,
+            base_url,
+            model,
+            messages,
+            generation.mark_stored,
+        )
+        self.repository.after_commit(
+            lambda: generation_registry.start(generation, events)
+        )
+
+        return generation
+
+    async def read_answer(
+        self, user_id: int, chat_id: int, seq: int, offset: int = 0
+    ) -> AsyncIterator[tuple[str, dict, int | None]]:
+        """
+        Read an answer from an offset on. An answer that is still being generated by this worker is followed until
+        it ends, missed tokens are replayed from memory or, if they are too old, from the database. An answer that is
+        being generated by another worker is followed in the database, as its batches are stored. Any other answer is
+        read from the database.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+            offset (int): The number of characters of the answer the client already has. Defaults to 0.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the user's chat has no answer with this sequence number.
+
+        Returns:
+            AsyncIterator[tuple[str, dict, int | None]]: The type, data and ID of the "token" events, followed by a
+                "done" or an "error" event, or by an "interrupted" event if an answer followed in the database stopped
+                growing without being finished.
+        """
+
+        generation = generation_registry.get(user_id, chat_id, seq)
+
+        if generation is not None:
+            return generation.read(
+                offset, partial(self._load_content, user_id, chat_id, seq)
+            )
+
+        messages = await self.repository.get_page_by_chat_id(
+            user_id, chat_id, 1, after_seq=seq - 1
+        )
+
+        if (
+            not messages
+            or messages[0].seq != seq
+            or messages[0].role != "assistant"
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Answer not found.",
+            )
+
+        return self._follow_answer(messages[0], offset)
+
+    async def _follow_answer(
+        self, answer: Message, offset: int
+    ) -> AsyncIterator[tuple[str, dict, int | None]]:
+        """
+        Read a stored answer from an offset on. While the answer is being generated by another worker, it is reloaded
+        every flush interval until it is finished. If it doesn't grow within the completion timeout, its worker is
+        assumed to be gone and the answer is reported as interrupted instead of done.
+
+        Args:
+            answer (Message): The stored answer.
+            offset (int): The number of characters of the answer the client already has.
+
+        Returns:
+            AsyncIterator[tuple[str, dict, int | None]]: The type, data and ID of the "token" events, followed by a
+                "done" or an "interrupted" event.
+        """
+
+        user_id, chat_id, seq = answer.user_id, answer.chat_id, answer.seq
+        content, is_generating = answer.content, answer.is_generating
+        loop = asyncio.get_running_loop()
+        grown_at = loop.time()
+
+        while True:
+            if offset < len(content):
+                yield "token", {"content": content[offset:]}, len(content)
+                offset = len(content)
+                grown_at = loop.time()
+
+            if not is_generating:
+                yield "done", {"seq": seq, "length": len(content)}, None
+                return
+
+            if loop.time() - grown_at >= settings.COMPLETION_TIMEOUT_IN_SECONDS:
+                yield "interrupted", {"seq": seq, "length": len(content)}, None
+                return
+
+            await asyncio.sleep(settings.COMPLETION_FLUSH_INTERVAL_IN_SECONDS)
+
+            answer = await self._load_answer(user_id, chat_id, seq)
+
+            if answer is None:
+                yield "interrupted", {"seq": seq, "length": len(content)}, None
+                return
+
+            content, is_generating = answer.content, answer.is_generating
+
+    @staticmethod
+    def _create_event_stream(
+        start: dict, events: AsyncIterator[tuple[str, dict, int | None]]
+    ) -> StreamingResponse:
+        """
+        Create a text/event-stream response.
+
+        Args:
+            start (dict): The data of the "start" event the response begins with.
+            events (AsyncIterator[tuple[str, dict, int | None]]): The type, data and ID of the following events.
+
+        Returns:
+            StreamingResponse: The response.
+        """
+
+        async def stream() -> AsyncIterator[str]:
+            yield sse_util.format_event(start, event="start")
+            async with aclosing(events):
+                async for event, data, event_id in events:
+                    yield sse_util.format_event(data, event, event_id)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            # Keeps reverse proxies from buffering the events.
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def create_chat_completion(
+        self,
+        user_id: int,
+        chat: Chat,
+        api_key: str,
+        base_url: str,
+        payload: ChatCompletionCreate,
+    ) -> StreamingResponse:
+        """
+        Send a message to a chat of the user and stream the answer of the chat's API provider as Server-Sent Events.
+
+        The answer keeps being generated and stored if the client disconnects, see resume_chat_completion.
+
+        Args:
+            user_id (int): The user's ID.
+            chat (Chat): The user's chat.
+            api_key (str): The user's decrypted API key for the chat's API provider.
+            base_url (str): The base URL of the API provider's OpenAI-compatible API.
+            payload (ChatCompletionCreate): The user's message and optionally the model to answer it with.
+
+        Raises:
+            HTTPException: Raised with a 429 status code if the user is generating too many answers at once.
+            HTTPException: Raised with a 400 status code if neither the payload nor the chat specify a model.
+
+        Returns:
+            StreamingResponse: The text/event-stream response. It starts with a "start" event holding the sequence
+                numbers of the user's message and of the answer.
+        """
+
+        generation = await self.start_generation(
+            user_id, chat, api_key, base_url, payload
+        )
+
+        return self._create_event_stream(
+            {
+                "user_seq": generation.seq - 1,
+                "seq": generation.seq,
+                "model": generation.model,
+            },
+            # The generation is registered only once it starts, after the request is committed.
+            generation.read(
+                0,
+                partial(self._load_content, user_id, chat.id, generation.seq),
+            ),
+        )
+
+    async def resume_chat_completion(
+        self, user_id: int, chat_id: int, seq: int, offset: int
+    ) -> StreamingResponse:
+        """
+        Stream an answer as Server-Sent Events again from an offset on, e.g. after the client reconnected.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+            offset (int): The number of characters of the answer the client already has, which is the ID of the last
+                received token event.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the user's chat has no answer with this sequence number.
+
+        Returns:
+            StreamingResponse: The text/event-stream response. It starts with a "start" event holding the sequence
+                number of the answer and the offset.
+        """
+
+        return self._create_event_stream(
+            {"seq": seq, "offset": offset},
+            await self.read_answer(user_id, chat_id, seq, offset),
+        )
+
+    @staticmethod
+    def stop_chat_completion(
+        user_id: int, chat_id: int, seq: int
+    ) -> ChatCompletionStopResponse:
+        """
+        Stop generating an answer. The part generated so far is kept.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the answer is not being generated by this worker.
+
+        Returns:
+            ChatCompletionStopResponse: A message informing that the answer was stopped.
+        """
+
+        generation = generation_registry.get(user_id, chat_id, seq)
+
+        if generation is None or generation.is_finished:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="This answer is not being generated.",
+            )
+        generation.cancel()
+
+        return ChatCompletionStopResponse()
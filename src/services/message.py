@@ -0,0 +1,242 @@
+from typing import Sequence
+
+from fastapi import Depends, HTTPException, status
+
+from src.config import settings
+from src.repositories.message import MessageRepository
+from src.schemas.chat import (
+    Message,
+    MessagesCreate,
+    MessagesResponse,
+    MessagesCreateResponse,
+    MessageSearchResult,
+    MessageSearchResponse,
+)
+from src.utils.cursor import cursor_util
+from src.utils.search import InvertedIndex
+
+from .base import BaseService
+
+
+class MessageService(BaseService[MessageRepository]):
+    """
+    Service for chat message related operations.
+    """
+
+    def __init__(
+        self, repository: MessageRepository = Depends(MessageRepository)
+    ) -> None:
+        """
+        Initializes the service with the repository.
+
+        Args:
+            repository (MessageRepository): The repository to use for message operations.
+
+        Returns:
+            None
+        """
+
+        super().__init__(repository)
+
+    async def create(self, payload) -> None:
+        """
+        Messages always belong to a chat, so they are created with create_chat_messages instead.
+        """
+
+        pass
+
+    async def create_chat_messages(
+        self, user_id: int, chat_id: int, payload: MessagesCreate
+    ) -> MessagesCreateResponse:
+        """
+        Append messages to a chat of a user, e.g. when importing a conversation from another LLM.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            payload (MessagesCreate): The messages in the order they were sent.
+
+        Raises:
+            HTTPException: Raised with a 404 status code if the user has no chat with this ID.
+
+        Returns:
+            MessagesCreateResponse: The sequence numbers of the first and the last appended message.
+        """
+
+        first_seq = await self.repository.create_bulk_in_chat(
+            user_id,
+            chat_id,
+            [message.model_dump() for message in payload.messages],
+        )
+
+        if first_seq is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found."
+            )
+        return MessagesCreateResponse(
+            first_seq=first_seq,
+            last_seq=first_seq + len(payload.messages) - 1,
+        )
+
+    async def get_chat_messages(
+        self,
+        user_id: int,
+        chat_id: int,
+        limit: int,
+        before_seq: int | None = None,
+        after_seq: int | None = None,
+    ) -> MessagesResponse:
+        """
+        Get a page of messages of a user's chat, in the order they were sent.
+
+        Without any sequence number the latest messages are returned. Pass the sequence number of the first message
+        as before_seq to page back through older messages, or the sequence number of the last received message as
+        after_seq to get the newer ones.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            limit (int): The maximum number of messages.
+            before_seq (int | None): The sequence number the page ends before. Defaults to None.
+            after_seq (int | None): The sequence number the page starts after. Defaults to None.
+
+        Returns:
+            MessagesResponse: The messages and whether there are more of them in the requested direction.
+        """
+
+        # One more message than requested tells whether there are more of them.
+        messages = await self.repository.get_page_by_chat_id(
+            user_id, chat_id, limit + 1, before_seq, after_seq
+        )
+        has_more = len(messages) > limit
+
+        if has_more:
+            messages = (
+                messages[:limit] if after_seq is not None else messages[1:]
+            )
+
+        return MessagesResponse(
+            messages=[Message.model_validate(message) for message in messages],
+            has_more=has_more,
+        )
+
+    async def _search_in_memory(
+        self,
+        user_id: int,
+        query: str,
+        limit: int,
+        api_provider_id: int | None = None,
+        after: tuple[float, int, int] | None = None,
+    ) -> Sequence[dict]:
+        """
+        Search the messages of a user with an inverted index built from all of them, instead of the Postgres text
+        search. Only meant for testing and development, since every search loads all messages of the user.
+
+        Args:
+            user_id (int): The user's ID.
+            query (str): The query.
+            limit (int): The maximum number of matches.
+            api_provider_id (int | None): Only search the chats of this API provider. Defaults to None.
+            after (tuple[float, int, int] | None): The rank, the chat ID and the sequence number of the last match
+                of the previous page. Defaults to None.
+
+        Returns:
+            Sequence[dict]: The matches, ordered like the ones of the Postgres text search.
+        """
+
+        messages = {
+            (message.chat_id, message.seq): message
+            for message in await self.repository.get_all_with_chat_title_by_user_id(
+                user_id, api_provider_id
+            )
+        }
+        index = InvertedIndex()
+
+        for key, message in messages.items():
+            index.add(key, message.content)
+
+        matches = sorted(
+            (
+                (rank, *key)
+                for key, rank in index.search(query).items()
+                if after is None or (rank, *key) < after
+            ),
+            reverse=True,
+        )[:limit]
+
+        return [
+            {
+                **messages[(chat_id, seq)]._asdict(),
+                "rank": rank,
+                "snippet": index.highlight(
+                    messages[(chat_id, seq)].content, query
+                ),
+            }
+            for rank, chat_id, seq in matches
+        ]
+
+    async def search_user_messages(
+        self,
+        user_id: int,
+        query: str,
+        limit: int,
+        api_provider_id: int | None = None,
+        cursor: str | None = None,
+    ) -> MessageSearchResponse:
+        """
+        Search the messages of all chats of a user by their content, the best matches first.
+
+        Args:
+            user_id (int): The user's ID.
+            query (str): The web search style query, e.g. `"exact phrase" or word -excluded`.
+            limit (int): The maximum number of matches.
+            api_provider_id (int | None): Only search the chats of this API provider. Defaults to None.
+            cursor (str | None): The cursor returned with the previous page. Defaults to None, which gets the first
+                page.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the cursor is invalid.
+
+        Returns:
+            MessageSearchResponse: The matching messages and the cursor of the next page.
+        """
+
+        after = None
+
+        if cursor is not None:
+            values = cursor_util.decode(cursor)
+            try:
+                after = (float(values[0]), int(values[1]), int(values[2]))
+            except (IndexError, TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor.",
+                )
+
+        search = (
+            self._search_in_memory
+            if settings.SEARCH_BACKEND == "memory"
+            else self.repository.search_by_user_id
+        )
+        # One more match than requested tells whether there is a next page.
+        results = [
+            MessageSearchResult.model_validate(result)
+            for result in await search(
+                user_id, query, limit + 1, api_provider_id, after
+            )
+        ]
+        next_cursor = (
+            cursor_util.encode(
+                [
+                    results[limit - 1].rank,
+                    results[limit - 1].chat_id,
+                    results[limit - 1].seq,
+                ]
+            )
+            if len(results) > limit
+            else None
+        )
+
+        return MessageSearchResponse(
+            results=results[:limit], next_cursor=next_cursor
+        )
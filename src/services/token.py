@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta, UTC
+
+from fastapi import Depends, HTTPException, status
+
+from jose import JWTError
+
+from src.config import settings
+from src.repositories.token_revocation import TokenRevocationRepository
+from src.schemas.auth import AuthLoginResponse
+
+from src.utils.token import token_util
+from src.utils.revocation import token_revocation_list
+
+from .base import BaseService
+
+
+class TokenService(BaseService[TokenRevocationRepository]):
+    """
+    Service for refresh token and token revocation related operations.
+    """
+
+    # Revocations with IDs slightly lower than the last loaded one are loaded again, so a revocation committed after
+    # a concurrently inserted one with a higher ID is not missed.
+    _POLL_ID_LOOKBACK = 100
+
+    def __init__(
+        self,
+        repository: TokenRevocationRepository = Depends(
+            TokenRevocationRepository
+        ),
+    ) -> None:
+        """
+        Initializes the service with the repository.
+
+        Args:
+            repository (TokenRevocationRepository): The repository to use for token revocation operations.
+
+        Returns:
+            None
+        """
+
+        super().__init__(repository)
+
+    async def create(self, payload) -> None:
+        """
+        This method is implemented in AuthService, but not in TokenService.
+        """
+
+        pass
+
+    async def refresh(self, refresh_token: str) -> AuthLoginResponse:
+        """
+        Exchange a refresh token for new access and refresh tokens.
+
+        Refresh tokens are rotated: every refresh token can be used only once, which is enforced by the database,
+        so the same token used concurrently by two requests is still exchanged only once.
+
+        Args:
+            refresh_token (str): The refresh token.
+
+        Raises:
+            HTTPException: Raised with a 401 status code if the refresh token is invalid, has expired, was revoked
+                or was already used.
+
+        Returns:
+            AuthLoginResponse: The new access and refresh tokens and token type.
+        """
+
+        try:
+            claims = token_util.decode(refresh_token)
+        except JWTError:
+            claims = {}
+
+        if (
+            claims.get("type") != "refresh"
+            or claims.get("jti") is None
+            or claims.get("sub") is None
+            or claims.get("id") is None
+            or token_revocation_list.is_revoked(claims)
+            or not await self.repository.mark_refresh_token_as_used(
+                claims["jti"],
+                claims["id"],
+                datetime.fromtimestamp(claims["exp"], UTC),
+            )
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Your session has expired. Please log in again.",
+            )
+
+        return AuthLoginResponse(
+            access_token=token_util.create_access_token(
+                claims["sub"], claims["id"]
+            ),
+            refresh_token=token_util.create_refresh_token(
+                claims["sub"], claims["id"]
+            ),
+            token_type="bearer",
+        )
+
+    async def revoke_all_by_user_id(self, user_id: int) -> None:
+        """
+        Revoke all access and refresh tokens of a user issued until now, e.g. after the user changed their password.
+
+        Args:
+            user_id (int): The user's ID.
+
+        Returns:
+            None
+        """
+
+        revoked_at = datetime.now(UTC)
+        # Once the longest living token issued before the revocation has expired, the revocation isn't needed.
+        expires_at = revoked_at + max(
+            timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_IN_MINUTES),
+            timedelta(days=settings.REFRESH_TOKEN_EXPIRE_IN_DAYS),
+        )
+
+        await self.repository.revoke_all_by_user_id(
+            user_id, revoked_at, expires_at
+        )
+
+    async def refresh_revocation_list(self) -> None:
+        """
+        Load the revocations added since the last refresh into the worker's revocation list and drop the expired ones.
+
+        Returns:
+            None
+        """
+
+        revocations = await self.repository.get_all_active_after_id(
+            max(token_revocation_list.last_id - self._POLL_ID_LOOKBACK, 0)
+        )
+
+        for revocation in revocations:
+            token_revocation_list.add(
+                revocation.user_id,
+                revocation.revoked_at.timestamp(),
+                revocation.expires_at.timestamp(),
+            )
+            token_revocation_list.last_id = max(
+                token_revocation_list.last_id, revocation.id
+            )
+
+        token_revocation_list.prune()
+
+    async def delete_expired(self) -> None:
+        """
+        Delete the revocations and used refresh tokens whose tokens have all expired.
+
+        Returns:
+            None
+        """
+
+        await self.repository.delete_expired()
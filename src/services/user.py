@@ -1,9 +1,12 @@
 from sqlalchemy.exc import IntegrityError
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 
-from src.utils.hash import hash_util
+from src.utils.etag import etag_util
+from src.utils.cache import user_profile_cache
 from src.utils.passphrase import passphrase_util
+from src.utils.crypto_executor import crypto_executor
+from src.utils.vault import vault_session_store
 
 from src.repositories.user import UserRepository
 
@@ -39,40 +42,82 @@ class UserService(BaseService[UserRepository]):
 
         super().__init__(repository)
 
-    def create(self, payload) -> None:
+    async def create(self, payload) -> None:
         """
         This method is implemented in AuthService, but not in UserService.
         """
 
         pass
 
-    def get_profile(self, user_id: int) -> UserProfileResponse:
+    async def get_profile(
+        self, user_id: int, if_none_match: str | None = None
+    ) -> Response:
         """
-        Get a user's profile by ID.
+        Get a user's profile by ID. The ETag of the profile is derived from the time the user was last updated.
+        Profiles are served from a cache invalidated whenever the user's profile or passphrase is updated.
 
         Args:
             user_id (int): The ID of the user to get.
+            if_none_match (str | None): The value of the If-None-Match header sent by the client.
+
+        Raises:
+            HTTPException: Raised with status code 404 if the user is not found.
 
         Returns:
-            UserProfileResponse: The user's profile response containing the user's email, name, avatar and passphrase.
+            Response: The user's profile response containing the user's email, name, avatar and passphrase,
+                or an empty 304 response if the client's copy is up to date.
         """
 
-        user = self.repository.get_one_with_selected_attributes_by_condition(
-            ["email", "name", "avatar", "passphrase"], "id", user_id
+        cached_profile: tuple[str, UserProfileResponse] | None = (
+            user_profile_cache.get(user_id)
         )
 
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+        if cached_profile is None:
+            user = await self.repository.get_one_with_selected_attributes_by_condition(
+                [
+                    "email",
+                    "name",
+                    "avatar",
+                    "passphrase",
+                    "passphrase_verifier",
+                    "updated_at",
+                ],
+                "id",
+                user_id,
+            )
+
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found.",
+                )
+
+            cached_profile = (
+                etag_util.generate_etag(user_id, user.updated_at.isoformat()),
+                UserProfileResponse(
+                    email=user.email,
+                    name=user.name,
+                    avatar=user.avatar,
+                    is_passphrase=(
+                        True
+                        if user.passphrase or user.passphrase_verifier
+                        else False
+                    ),
+                ),
             )
-        return UserProfileResponse(
-            email=user.email,
-            name=user.name,
-            avatar=user.avatar,
-            is_passphrase=True if user.passphrase else False,
+            user_profile_cache.set(user_id, cached_profile)
+
+        etag, profile = cached_profile
+
+        return etag_util.create_response(
+            if_none_match,
+            etag,
+            lambda: profile.model_dump_json(by_alias=True),
+            # The profile is personal data, so it must not be stored by shared caches.
+            cache_control="private, no-cache",
         )
 
-    def update_user_password(
+    async def update_user_password(
         self, user_id: int, payload: UserUpdatePassword
     ) -> UserUpdatePasswordResponse:
         """
@@ -91,15 +136,17 @@ class UserService(BaseService[UserRepository]):
                 Message can be customized, but defaults to the one in the schema.
         """
 
-        user = self.repository.get_one_with_selected_attributes_by_condition(
-            ["password"], "id", user_id
+        user = (
+            await self.repository.get_one_with_selected_attributes_by_condition(
+                ["password"], "id", user_id
+            )
         )
 
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
             )
-        if not hash_util.verify_hash(
+        if not await crypto_executor.verify_hash(
             payload.current_password.get_secret_value(), user.password
         ):
             raise HTTPException(
@@ -107,14 +154,16 @@ class UserService(BaseService[UserRepository]):
                 detail="Please check your credentials and try again.",
             )
 
-        hashed_new_password = hash_util.create_hash(
+        hashed_new_password = await crypto_executor.create_hash(
             payload.new_password.get_secret_value()
         )
 
-        self.repository.update_password_by_id(user_id, hashed_new_password)
+        await self.repository.update_password_by_id(
+            user_id, hashed_new_password
+        )
         return UserUpdatePasswordResponse()
 
-    def update_user_profile(
+    async def update_user_profile(
         self, user_id: int, payload: UserUpdateProfile
     ) -> UserUpdateProfileResponse:
         """
@@ -132,8 +181,10 @@ class UserService(BaseService[UserRepository]):
                 Also contains the updated name, email and avatar if available.
         """
 
-        user = self.repository.get_one_with_selected_attributes_by_condition(
-            ["name", "email", "avatar"], "id", user_id
+        user = (
+            await self.repository.get_one_with_selected_attributes_by_condition(
+                ["name", "email", "avatar"], "id", user_id
+            )
         )
 
         if not user:
@@ -152,7 +203,11 @@ class UserService(BaseService[UserRepository]):
 
         if is_updated:
             try:
-                self.repository.update_profile_by_id(user_id, updated_fields)
+                # The savepoint keeps the failed update from aborting the whole request's transaction.
+                async with self.repository.savepoint():
+                    await self.repository.update_profile_by_id(
+                        user_id, updated_fields
+                    )
             except IntegrityError:
                 # Pass the exception to prevent leaking sensitive information like already existing email
                 pass
@@ -174,31 +229,53 @@ class UserService(BaseService[UserRepository]):
             )
         return UserUpdateProfileResponse(**updated_fields)
 
-    def update_user_passphrase(
-        self, user_id: int
+    async def update_user_passphrase(
+        self, user_id: int, data_key: bytes | None = None
     ) -> UserUpdatePassphraseResponse:
         """
         Create a new passphrase and return it for the user.
-        The passphrase is hashed and stored in the database with a salt. It can be used later for creating fernet keys.
+        Only the passphrase verifier, the salt and the data key wrapped with a key derived from the passphrase are
+        stored in the database. The user's data is encrypted with the data key, so rotating the passphrase only
+        re-wraps the data key. All vault sessions unlocked with the old passphrase are locked.
 
         Args:
             user_id (int): The ID of the user to update.
+            data_key (bytes | None): The user's current data key. If None, a new data key is generated and the data
+                encrypted with the old one can no longer be decrypted.
 
         Returns:
             UserUpdatePassphraseResponse: The response containing the new passphrase.
         """
 
         passphrase = passphrase_util.generate_strong_passphrase()
-        passphrase_salt = passphrase_util.convert_bytes_to_hex(
-            passphrase_util.generate_salt()
+        passphrase_salt = passphrase_util.generate_salt()
+        key, passphrase_verifier = (
+            await crypto_executor.derive_key_and_verifier(
+                passphrase.encode(),
+                passphrase_salt,
+                passphrase_util.kdf_parameters,
+            )
         )
-        hashed_passphrase = hash_util.create_hash(passphrase)
 
-        self.repository.update_passphrase_by_id(
+        if data_key is None:
+            data_key = passphrase_util.generate_data_key()
+
+        await self.repository.update_passphrase_by_id(
             user_id,
             {
-                "passphrase": hashed_passphrase,
-                "passphrase_salt": passphrase_salt,
+                "passphrase": None,
+                "passphrase_salt": passphrase_util.convert_bytes_to_hex(
+                    passphrase_salt
+                ),
+                "passphrase_verifier": passphrase_util.convert_bytes_to_hex(
+                    passphrase_verifier
+                ),
+                "passphrase_kdf": passphrase_util.kdf_parameters.encode(),
+                "encrypted_data_key": passphrase_util.wrap_data_key(
+                    key, data_key
+                ),
             },
         )
+        vault_session_store.lock_all(user_id)
+
         return UserUpdatePassphraseResponse(passphrase=passphrase)
@@ -0,0 +1,144 @@
+import time
+from typing import Any, Hashable
+from collections import OrderedDict
+
+from src.config import settings
+
+
+class TTLCache:
+    """
+    A bounded in-memory cache whose entries expire after a fixed time to live.
+    Once the cache is full, the least recently used entry is evicted.
+
+    The cache lives in the memory of a single worker process.
+    """
+
+    def __init__(
+        self, max_size: int, ttl_in_seconds: float, enabled: bool = True
+    ) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_size (int): The maximum number of entries.
+            ttl_in_seconds (float): The time after which an entry expires.
+            enabled (bool): Whether the cache stores anything. A disabled cache misses on every lookup.
+                Defaults to True.
+
+        Returns:
+            None
+        """
+
+        self.max_size = max_size
+        self.ttl_in_seconds = ttl_in_seconds
+        self.enabled = enabled
+
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+        self._invalidations: int = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Get the value stored under the key.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            Any | None: The value or None if it is not cached or has expired.
+        """
+
+        entry = self._entries.get(key) if self.enabled else None
+
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+
+        return entry[1]
+
+    def set(
+        self, key: Hashable, value: Any, ttl_in_seconds: float | None = None
+    ) -> None:
+        """
+        Store the value under the key, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (Hashable): The key.
+            value (Any): The value.
+            ttl_in_seconds (float | None): The time after which this entry expires, if it should expire sooner
+                than the cache's time to live. Defaults to None.
+
+        Returns:
+            None
+        """
+
+        if not self.enabled:
+            return
+
+        if ttl_in_seconds is None or ttl_in_seconds > self.ttl_in_seconds:
+            ttl_in_seconds = self.ttl_in_seconds
+
+        self._entries[key] = (time.monotonic() + ttl_in_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove the value stored under the key.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            None
+        """
+
+        if self._entries.pop(key, None) is not None:
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Remove all values.
+
+        Returns:
+            None
+        """
+
+        self._entries.clear()
+
+    def get_metrics(self) -> dict:
+        """
+        Get the metrics of the cache.
+
+        Returns:
+            dict: Whether the cache is enabled, its size as well as the number of hits, misses, evictions and
+                invalidations.
+        """
+
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+        }
+
+
+# Caches the ETag and the profile response of users, keyed by the user's ID.
+user_profile_cache = TTLCache(
+    settings.USER_PROFILE_CACHE_MAX_SIZE,
+    settings.USER_PROFILE_CACHE_TTL_IN_SECONDS,
+    settings.USER_PROFILE_CACHE_ENABLED,
+)
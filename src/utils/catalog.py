@@ -0,0 +1,120 @@
+from src.utils.etag import etag_util
+from src.schemas.api_provider import (
+    ApiProviderCatalogItem,
+    ApiProvidersResponse,
+)
+
+
+class ApiProviderCatalogSnapshot:
+    """
+    An immutable copy of all API providers at a given catalog version, indexed by ID and by lowercase name.
+    """
+
+    def __init__(
+        self, version: int, api_providers: list[ApiProviderCatalogItem]
+    ) -> None:
+        """
+        Initializes the snapshot.
+
+        Args:
+            version (int): The version of the catalog the API providers were loaded at.
+            api_providers (list[ApiProviderCatalogItem]): All API providers.
+
+        Returns:
+            None
+        """
+
+        self.version = version
+        self.api_providers = tuple(
+            sorted(api_providers, key=lambda api_provider: api_provider.id)
+        )
+        self._by_id = {
+            api_provider.id: api_provider for api_provider in self.api_providers
+        }
+        self._by_lowercase_name = {
+            api_provider.lowercase_name: api_provider
+            for api_provider in self.api_providers
+        }
+        # The response is serialized once per snapshot and its ETag is derived from the serialized content,
+        # so it changes exactly when the content does.
+        self.response_body = ApiProvidersResponse(
+            api_providers=list(self.api_providers)
+        ).model_dump_json()
+        self.etag = etag_util.generate_etag(self.response_body)
+
+    def get_by_id(self, api_provider_id: int) -> ApiProviderCatalogItem | None:
+        """
+        Get an API provider by its ID.
+
+        Args:
+            api_provider_id (int): The ID of the API provider.
+
+        Returns:
+            ApiProviderCatalogItem | None: The API provider or None if it does not exist.
+        """
+
+        return self._by_id.get(api_provider_id)
+
+    def get_by_lowercase_name(
+        self, lowercase_name: str
+    ) -> ApiProviderCatalogItem | None:
+        """
+        Get an API provider by its lowercase name.
+
+        Args:
+            lowercase_name (str): The lowercase name of the API provider.
+
+        Returns:
+            ApiProviderCatalogItem | None: The API provider or None if it does not exist.
+        """
+
+        return self._by_lowercase_name.get(lowercase_name)
+
+
+class ApiProviderCatalog:
+    """
+    Holds the current in-memory snapshot of the API providers of a single worker process.
+
+    API providers almost never change, so they are read from the database only when the catalog version stored in
+    the database differs from the version of the snapshot. Every change of the API providers bumps that version.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty catalog.
+
+        Returns:
+            None
+        """
+
+        self.snapshot: ApiProviderCatalogSnapshot | None = None
+
+    def load(
+        self, version: int, api_providers: list[ApiProviderCatalogItem]
+    ) -> ApiProviderCatalogSnapshot:
+        """
+        Replace the current snapshot with a new one.
+
+        Args:
+            version (int): The version of the catalog the API providers were loaded at.
+            api_providers (list[ApiProviderCatalogItem]): All API providers.
+
+        Returns:
+            ApiProviderCatalogSnapshot: The new snapshot.
+        """
+
+        self.snapshot = ApiProviderCatalogSnapshot(version, api_providers)
+        return self.snapshot
+
+    def invalidate(self) -> None:
+        """
+        Drop the current snapshot, so it is loaded again on the next access.
+
+        Returns:
+            None
+        """
+
+        self.snapshot = None
+
+
+api_provider_catalog = ApiProviderCatalog()
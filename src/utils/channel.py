@@ -0,0 +1,332 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+from starlette.websockets import WebSocketState
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class StreamCredit:
+    """
+    The flow control window of a stream: the number of frames the client is still willing to receive.
+
+    Every frame carrying a part of the stream takes one credit, and the client grants more credit once it processed
+    the frames. Without credit the stream waits, so a slow client never makes the server buffer more frames than it
+    granted.
+    """
+
+    def __init__(self, initial_credit: int, max_credit: int) -> None:
+        """
+        Initializes the window.
+
+        Args:
+            initial_credit (int): The credit the stream starts with.
+            max_credit (int): The maximum credit the client can grant.
+
+        Returns:
+            None
+        """
+
+        self.max_credit = max_credit
+
+        self._credit = min(initial_credit, max_credit)
+        self._granted = asyncio.Event()
+
+    @property
+    def credit(self) -> int:
+        """
+        The current credit.
+        """
+
+        return self._credit
+
+    def grant(self, credit: int) -> None:
+        """
+        Add credit granted by the client, capped at the maximum credit.
+
+        Args:
+            credit (int): The granted credit.
+
+        Returns:
+            None
+        """
+
+        self._credit = min(self._credit + credit, self.max_credit)
+        self._granted.set()
+
+    async def acquire(self) -> None:
+        """
+        Take one credit, waiting until the client grants some if there is none left.
+
+        Returns:
+            None
+        """
+
+        while self._credit <= 0:
+            self._granted.clear()
+            await self._granted.wait()
+
+        self._credit -= 1
+
+
+class ChatChannel:
+    """
+    A WebSocket connection of a single user, multiplexing several concurrent streams.
+
+    Every stream is identified by an ID chosen by the client and runs as a task of its own, which sends its frames
+    tagged with that ID. The channel pings the client periodically and closes the connection once the client hasn't
+    sent anything, not even a pong, for too long.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        max_streams: int,
+        initial_credit: int,
+        max_credit: int,
+        ping_interval_in_seconds: float,
+        idle_timeout_in_seconds: float,
+    ) -> None:
+        """
+        Initializes the channel.
+
+        Args:
+            websocket (WebSocket): The accepted WebSocket connection.
+            user_id (int): The ID of the authenticated user.
+            max_streams (int): The maximum number of concurrent streams.
+            initial_credit (int): The credit every stream starts with.
+            max_credit (int): The maximum credit of a stream.
+            ping_interval_in_seconds (float): The time between two pings.
+            idle_timeout_in_seconds (float): The time after which the connection is closed if the client hasn't sent
+                anything, not even a pong.
+
+        Returns:
+            None
+        """
+
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_streams = max_streams
+        self.initial_credit = initial_credit
+        self.max_credit = max_credit
+        self.ping_interval_in_seconds = ping_interval_in_seconds
+        self.idle_timeout_in_seconds = idle_timeout_in_seconds
+
+        self._loop = asyncio.get_running_loop()
+        self._received_at = self._loop.time()
+        # Frames of concurrent streams must not interleave on the connection.
+        self._send_lock = asyncio.Lock()
+        self._streams: dict[str, tuple[asyncio.Task, StreamCredit]] = {}
+        self._heartbeat: asyncio.Task | None = None
+
+    async def send(self, frame: dict) -> None:
+        """
+        Send a frame to the client.
+
+        Args:
+            frame (dict): The JSON serializable frame.
+
+        Returns:
+            None
+        """
+
+        async with self._send_lock:
+            await self.websocket.send_json(frame)
+
+    async def receive(self) -> str:
+        """
+        Receive a frame from the client.
+
+        Raises:
+            WebSocketDisconnect: Raised once the client disconnected.
+
+        Returns:
+            str: The text of the frame.
+        """
+
+        # The connection may have been closed by the heartbeat.
+        if self.websocket.application_state == WebSocketState.DISCONNECTED:
+            raise WebSocketDisconnect(status.WS_1001_GOING_AWAY)
+
+        text = await self.websocket.receive_text()
+        self._received_at = self._loop.time()
+
+        return text
+
+    async def _keep_alive(self) -> None:
+        """
+        Ping the client periodically and close the connection once the client is idle for too long.
+
+        Returns:
+            None
+        """
+
+        while True:
+            await asyncio.sleep(
+                min(self.ping_interval_in_seconds, self.idle_timeout_in_seconds)
+            )
+
+            if (
+                self._loop.time() - self._received_at
+                >= self.idle_timeout_in_seconds
+            ):
+                await self.websocket.close(
+                    code=status.WS_1001_GOING_AWAY,
+                    reason="The connection was idle for too long.",
+                )
+                return
+            await self.send({"type": "ping"})
+
+    def start(self) -> None:
+        """
+        Start sending the heartbeat.
+
+        Returns:
+            None
+        """
+
+        self._heartbeat = asyncio.create_task(self._keep_alive())
+
+    def open_stream(
+        self,
+        stream_id: str,
+        run: Callable[[StreamCredit], Awaitable[None]],
+    ) -> bool:
+        """
+        Start a stream as a task of its own. The stream is removed once the task finishes.
+
+        Args:
+            stream_id (str): The ID of the stream chosen by the client.
+            run (Callable[[StreamCredit], Awaitable[None]]): Runs the stream, taking a credit for every frame
+                carrying a part of it.
+
+        Returns:
+            bool: Whether the stream was started. It isn't if a stream with this ID is still running or there are
+                too many concurrent streams.
+        """
+
+        if stream_id in self._streams or len(self._streams) >= self.max_streams:
+            return False
+
+        credit = StreamCredit(self.initial_credit, self.max_credit)
+        task = asyncio.create_task(self._run_stream(stream_id, run, credit))
+        self._streams[stream_id] = (task, credit)
+        task.add_done_callback(lambda _: self._streams.pop(stream_id, None))
+
+        return True
+
+    async def _run_stream(
+        self,
+        stream_id: str,
+        run: Callable[[StreamCredit], Awaitable[None]],
+        credit: StreamCredit,
+    ) -> None:
+        """
+        Run a stream and report its failure to the client.
+
+        Args:
+            stream_id (str): The ID of the stream.
+            run (Callable[[StreamCredit], Awaitable[None]]): Runs the stream.
+            credit (StreamCredit): The flow control window of the stream.
+
+        Returns:
+            None
+        """
+
+        try:
+            await run(credit)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to run a stream of a chat channel")
+            try:
+                await self.send(
+                    {
+                        "type": "error",
+                        "stream": stream_id,
+                        "detail": "Something went wrong. Please try again later.",
+                    }
+                )
+            except Exception:
+                # The client is gone.
+                pass
+
+    def grant(self, stream_id: str, credit: int) -> None:
+        """
+        Grant credit to a running stream. Credit for an unknown stream is ignored, since the stream may have just
+        finished.
+
+        Args:
+            stream_id (str): The ID of the stream.
+            credit (int): The granted credit.
+
+        Returns:
+            None
+        """
+
+        stream = self._streams.get(stream_id)
+
+        if stream is not None:
+            stream[1].grant(credit)
+
+    def cancel(self, stream_id: str) -> None:
+        """
+        Cancel a running stream.
+
+        Args:
+            stream_id (str): The ID of the stream.
+
+        Returns:
+            None
+        """
+
+        stream = self._streams.get(stream_id)
+
+        if stream is not None:
+            stream[0].cancel()
+
+    async def close(self) -> None:
+        """
+        Stop the heartbeat and cancel all streams, waiting for them to clean up.
+
+        Returns:
+            None
+        """
+
+        tasks = [task for task, _ in self._streams.values()]
+
+        if self._heartbeat is not None:
+            tasks.append(self._heartbeat)
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def create_chat_channel(websocket: WebSocket, user_id: int) -> ChatChannel:
+    """
+    Create a chat channel configured by the settings.
+
+    Args:
+        websocket (WebSocket): The accepted WebSocket connection.
+        user_id (int): The ID of the authenticated user.
+
+    Returns:
+        ChatChannel: The channel.
+    """
+
+    return ChatChannel(
+        websocket,
+        user_id,
+        settings.CHAT_CHANNEL_MAX_STREAMS,
+        settings.CHAT_CHANNEL_INITIAL_CREDIT,
+        settings.CHAT_CHANNEL_MAX_CREDIT,
+        settings.CHAT_CHANNEL_PING_INTERVAL_IN_SECONDS,
+        settings.CHAT_CHANNEL_IDLE_TIMEOUT_IN_SECONDS,
+    )
@@ -0,0 +1,165 @@
+import os
+import hmac
+import base64
+import hashlib
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+
+class CipherUtil:
+    """
+    A utility class for encrypting small secrets, such as API keys, with the user's data key.
+
+    Encrypted values are stored as raw bytes prefixed with a single version byte:
+
+    - version 0: a legacy Fernet token (base64-decoded), only ever decrypted,
+    - version 1: a 12-byte nonce followed by the AES-256-GCM ciphertext and tag.
+    """
+
+    VERSION_FERNET = 0
+    VERSION_AES_GCM = 1
+    NONCE_SIZE = 12
+
+    @staticmethod
+    def derive_aes_gcm_key(data_key: bytes) -> AESGCM:
+        """
+        Derives the AES-GCM key from the user's url-safe base64-encoded data key,
+        so the same key material is never used by two different ciphers.
+
+        Args:
+            data_key (bytes): The user's data key.
+
+        Returns:
+            AESGCM: The AES-GCM cipher.
+        """
+
+        hkdf = HKDFExpand(
+            algorithm=hashes.SHA256(),
+            length=32,
+            info=b"chattyai aes-gcm data key",
+        )
+
+        return AESGCM(hkdf.derive(base64.urlsafe_b64decode(data_key)))
+
+    @staticmethod
+    def derive_fingerprint_key(data_key: bytes) -> bytes:
+        """
+        Derives the HMAC key used to fingerprint values from the user's url-safe base64-encoded data key.
+
+        Args:
+            data_key (bytes): The user's data key.
+
+        Returns:
+            bytes: The HMAC key.
+        """
+
+        hkdf = HKDFExpand(
+            algorithm=hashes.SHA256(),
+            length=32,
+            info=b"chattyai api key fingerprint",
+        )
+
+        return hkdf.derive(base64.urlsafe_b64decode(data_key))
+
+    def fingerprint_many(
+        self, data_key: bytes, values: list[tuple[bytes, bytes]]
+    ) -> list[bytes]:
+        """
+        Computes a keyed fingerprint of multiple values, so a submitted value can be compared with the stored one
+        without decrypting it. Without the user's data key the fingerprint reveals nothing about the value.
+
+        Args:
+            data_key (bytes): The user's data key.
+            values (list[tuple[bytes, bytes]]): Pairs of the plaintext and the associated data it is bound to.
+
+        Returns:
+            list[bytes]: The fingerprints.
+        """
+
+        fingerprint_key = self.derive_fingerprint_key(data_key)
+
+        return [
+            hmac.digest(
+                fingerprint_key,
+                associated_data + b"\x00" + plaintext,
+                hashlib.sha256,
+            )
+            for plaintext, associated_data in values
+        ]
+
+    def encrypt_many(
+        self, data_key: bytes, values: list[tuple[bytes, bytes]]
+    ) -> list[bytes]:
+        """
+        Encrypts multiple values with the user's data key using the latest format.
+
+        Args:
+            data_key (bytes): The user's data key.
+            values (list[tuple[bytes, bytes]]): Pairs of the plaintext and the associated data the ciphertext is
+                bound to, e.g. the ID of the row it is stored in.
+
+        Returns:
+            list[bytes]: The encrypted values.
+        """
+
+        aes_gcm = self.derive_aes_gcm_key(data_key)
+        encrypted_values: list[bytes] = []
+
+        for plaintext, associated_data in values:
+            nonce = os.urandom(self.NONCE_SIZE)
+            encrypted_values.append(
+                bytes((self.VERSION_AES_GCM,))
+                + nonce
+                + aes_gcm.encrypt(nonce, plaintext, associated_data)
+            )
+
+        return encrypted_values
+
+    def decrypt_many(
+        self, data_key: bytes, values: list[tuple[bytes, bytes]]
+    ) -> list[bytes]:
+        """
+        Decrypts multiple values encrypted with the user's data key in any of the supported formats.
+
+        Args:
+            data_key (bytes): The user's data key.
+            values (list[tuple[bytes, bytes]]): Pairs of the encrypted value and the associated data it is bound to.
+
+        Raises:
+            ValueError: Raised if the version of the encrypted value is not supported.
+
+        Returns:
+            list[bytes]: The decrypted values.
+        """
+
+        aes_gcm: AESGCM | None = None
+        fernet: Fernet | None = None
+        decrypted_values: list[bytes] = []
+
+        for value, associated_data in values:
+            version, payload = value[0], value[1:]
+
+            if version == self.VERSION_AES_GCM:
+                aes_gcm = aes_gcm or self.derive_aes_gcm_key(data_key)
+                decrypted_values.append(
+                    aes_gcm.decrypt(
+                        payload[: self.NONCE_SIZE],
+                        payload[self.NONCE_SIZE :],
+                        associated_data,
+                    )
+                )
+            elif version == self.VERSION_FERNET:
+                fernet = fernet or Fernet(data_key)
+                decrypted_values.append(
+                    fernet.decrypt(base64.urlsafe_b64encode(payload))
+                )
+            else:
+                raise ValueError(f"Unsupported ciphertext version: {version}")
+
+        return decrypted_values
+
+
+cipher_util = CipherUtil()
@@ -0,0 +1,88 @@
+import httpx
+from openai import AsyncOpenAI
+
+from src.config import settings
+
+
+class CompletionClient:
+    """
+    Creates the clients of OpenAI-compatible API providers.
+
+    All clients share a single HTTP connection pool, so a completion doesn't pay for a new connection and TLS
+    handshake with the API provider on every request.
+    """
+
+    def __init__(
+        self, base_urls: dict[str, str], timeout_in_seconds: float
+    ) -> None:
+        """
+        Initializes the completion client. The HTTP connection pool is created lazily on the first request.
+
+        Args:
+            base_urls (dict[str, str]): The base URLs of the OpenAI-compatible APIs, keyed by the lowercase names
+                of the API providers.
+            timeout_in_seconds (float): The time after which a request to an API provider is aborted.
+
+        Returns:
+            None
+        """
+
+        self.base_urls = base_urls
+        self.timeout_in_seconds = timeout_in_seconds
+
+        self._http_client: httpx.AsyncClient | None = None
+
+    def get_base_url(self, api_provider_lowercase_name: str) -> str | None:
+        """
+        Get the base URL of an API provider's OpenAI-compatible API.
+
+        Args:
+            api_provider_lowercase_name (str): The lowercase name of the API provider.
+
+        Returns:
+            str | None: The base URL or None if completions are not supported for the API provider.
+        """
+
+        return self.base_urls.get(api_provider_lowercase_name)
+
+    def create(self, api_key: str, base_url: str) -> AsyncOpenAI:
+        """
+        Create a client of an OpenAI-compatible API.
+
+        Args:
+            api_key (str): The user's API key.
+            base_url (str): The base URL of the API.
+
+        Returns:
+            AsyncOpenAI: The client. It must not be closed, since it shares the connection pool.
+        """
+
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=self.timeout_in_seconds
+            )
+
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self._http_client,
+            # A stream cannot be retried once it started, so failures are reported to the user instead.
+            max_retries=0,
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the HTTP connection pool.
+
+        Returns:
+            None
+        """
+
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+completion_client = CompletionClient(
+    settings.COMPLETION_BASE_URLS, settings.COMPLETION_TIMEOUT_IN_SECONDS
+)
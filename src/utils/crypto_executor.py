@@ -0,0 +1,313 @@
+import os
+import time
+import asyncio
+from typing import Any, Callable
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.utils.kdf import KdfParameters
+from src.utils.hash import hash_util
+from src.utils.cipher import cipher_util
+from src.utils.passphrase import passphrase_util
+
+
+# The functions below are executed inside the pool's workers. They are defined on the module level, so they can be
+# pickled by reference when the process pool is used.
+
+
+def _initialize_worker(bcrypt_rounds: int) -> None:
+    # Worker processes don't share memory with the application, so the calibrated parameters are passed explicitly.
+    hash_util.configure(bcrypt_rounds)
+
+
+def _run_timed(func: Callable, *args) -> tuple[float, Any]:
+    return time.monotonic(), func(*args)
+
+
+def _create_hash(secret: str) -> str:
+    return hash_util.create_hash(secret)
+
+
+def _verify_hash(secret: str, compare_hash: str) -> bool:
+    return hash_util.verify_hash(secret, compare_hash)
+
+
+def _verify_and_update_hash(
+    secret: str, compare_hash: str
+) -> tuple[bool, str | None]:
+    return hash_util.verify_and_update(secret, compare_hash)
+
+
+def _derive_key(
+    passphrase: bytes, salt: bytes, kdf_parameters: KdfParameters
+) -> bytes:
+    return passphrase_util.derive_key(passphrase, salt, kdf_parameters)
+
+
+def _derive_key_and_verifier(
+    passphrase: bytes, salt: bytes, kdf_parameters: KdfParameters
+) -> tuple[bytes, bytes]:
+    return passphrase_util.derive_key_and_verifier(
+        passphrase, salt, kdf_parameters
+    )
+
+
+def _encrypt_many(
+    data_key: bytes, values: list[tuple[bytes, bytes]]
+) -> list[bytes]:
+    return cipher_util.encrypt_many(data_key, values)
+
+
+def _decrypt_many(
+    data_key: bytes, values: list[tuple[bytes, bytes]]
+) -> list[bytes]:
+    return cipher_util.decrypt_many(data_key, values)
+
+
+class CryptoExecutor:
+    """
+    A bounded pool for running CPU-heavy cryptographic operations (bcrypt, PBKDF2, etc.) outside the event loop.
+
+    Jobs that cannot be started immediately wait in a queue. Once the queue is full, new jobs are rejected with
+    a 503 status code and a Retry-After header instead of piling up.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        max_workers: int | None,
+        max_queue_size: int,
+        retry_after_in_seconds: int,
+    ) -> None:
+        """
+        Initializes the crypto executor. The underlying pool is created lazily on the first submitted job.
+
+        Args:
+            kind (str): The kind of the pool, either "thread" or "process".
+            max_workers (int | None): The number of workers. Defaults to the number of CPUs if None.
+            max_queue_size (int): The number of jobs allowed to wait for a free worker.
+            retry_after_in_seconds (int): The value of the Retry-After header sent when the executor is saturated.
+
+        Returns:
+            None
+        """
+
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported crypto executor kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_size = max_queue_size
+        self.retry_after_in_seconds = retry_after_in_seconds
+
+        self._executor: Executor | None = None
+        self._in_flight: int = 0
+        self._completed: int = 0
+        self._rejected: int = 0
+        self._total_wait_time: float = 0.0
+        self._max_wait_time: float = 0.0
+
+    def _get_executor(self) -> Executor:
+        """
+        Get the underlying pool, creating it if it does not exist yet.
+
+        Returns:
+            Executor: The thread or process pool.
+        """
+
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_initialize_worker,
+                    initargs=(hash_util.bcrypt_rounds,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="crypto"
+                )
+        return self._executor
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of jobs waiting for a free worker.
+        """
+
+        return max(self._in_flight - self.max_workers, 0)
+
+    @property
+    def is_saturated(self) -> bool:
+        """
+        Whether all workers are busy and the queue is full.
+        """
+
+        return self._in_flight >= self.max_workers + self.max_queue_size
+
+    @property
+    def load(self) -> float:
+        """
+        The share of the workers and queue slots in use, between 0 and 1.
+        """
+
+        return min(
+            self._in_flight / (self.max_workers + self.max_queue_size), 1.0
+        )
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Run a function in the pool and wait for its result without blocking the event loop.
+
+        Args:
+            func (Callable): The function to run. Must be picklable if the process pool is used.
+            *args: The arguments to pass to the function.
+
+        Raises:
+            HTTPException: Raised with status code 503 if the executor is saturated.
+
+        Returns:
+            Any: The result of the function.
+        """
+
+        if self.is_saturated:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is busy right now. Please try again later.",
+                headers={"Retry-After": str(self.retry_after_in_seconds)},
+            )
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+
+        self._in_flight += 1
+        try:
+            future = self._get_executor().submit(_run_timed, func, *args)
+        except BaseException:
+            # E.g. the executor was shut down or a worker process died, so no job will ever release the slot.
+            self._release()
+            raise
+        # The slot is released only when the job has really finished, even if the awaiting request was cancelled.
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._release)
+        )
+
+        started_at, result = await asyncio.wrap_future(future)
+
+        wait_time = max(started_at - submitted_at, 0.0)
+        self._completed += 1
+        self._total_wait_time += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+
+        return result
+
+    def get_metrics(self) -> dict:
+        """
+        Get the metrics of the executor.
+
+        Returns:
+            dict: The current queue depth, the number of jobs in flight, completed and rejected jobs as well as
+                the average and maximum time jobs spent waiting in the queue (in seconds).
+        """
+
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "average_wait_time": (
+                self._total_wait_time / self._completed
+                if self._completed
+                else 0.0
+            ),
+            "max_wait_time": self._max_wait_time,
+        }
+
+    def shutdown(self) -> None:
+        """
+        Shut down the underlying pool, waiting for the running jobs to finish.
+
+        Returns:
+            None
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def create_hash(self, secret: str) -> str:
+        """
+        Awaitable version of HashUtil.create_hash.
+        """
+
+        return await self.run(_create_hash, secret)
+
+    async def verify_hash(self, secret: str, compare_hash: str) -> bool:
+        """
+        Awaitable version of HashUtil.verify_hash.
+        """
+
+        return await self.run(_verify_hash, secret, compare_hash)
+
+    async def verify_and_update_hash(
+        self, secret: str, compare_hash: str
+    ) -> tuple[bool, str | None]:
+        """
+        Awaitable version of HashUtil.verify_and_update.
+        """
+
+        return await self.run(_verify_and_update_hash, secret, compare_hash)
+
+    async def derive_key(
+        self, passphrase: bytes, salt: bytes, kdf_parameters: KdfParameters
+    ) -> bytes:
+        """
+        Awaitable version of PassphraseUtil.derive_key.
+        """
+
+        return await self.run(_derive_key, passphrase, salt, kdf_parameters)
+
+    async def derive_key_and_verifier(
+        self, passphrase: bytes, salt: bytes, kdf_parameters: KdfParameters
+    ) -> tuple[bytes, bytes]:
+        """
+        Awaitable version of PassphraseUtil.derive_key_and_verifier.
+        """
+
+        return await self.run(
+            _derive_key_and_verifier, passphrase, salt, kdf_parameters
+        )
+
+    async def encrypt_many(
+        self, data_key: bytes, values: list[tuple[bytes, bytes]]
+    ) -> list[bytes]:
+        """
+        Awaitable version of CipherUtil.encrypt_many, encrypting all values in a single job.
+        """
+
+        return await self.run(_encrypt_many, data_key, values)
+
+    async def decrypt_many(
+        self, data_key: bytes, values: list[tuple[bytes, bytes]]
+    ) -> list[bytes]:
+        """
+        Awaitable version of CipherUtil.decrypt_many, decrypting all values in a single job.
+        """
+
+        return await self.run(_decrypt_many, data_key, values)
+
+
+crypto_executor = CryptoExecutor(
+    settings.CRYPTO_EXECUTOR_KIND,
+    settings.CRYPTO_EXECUTOR_MAX_WORKERS,
+    settings.CRYPTO_EXECUTOR_MAX_QUEUE_SIZE,
+    settings.CRYPTO_EXECUTOR_RETRY_AFTER_IN_SECONDS,
+)
@@ -0,0 +1,61 @@
+import json
+import base64
+import binascii
+
+from fastapi import HTTPException, status
+
+
+class CursorUtil:
+    """
+    A utility class for the opaque cursors of keyset paginated lists.
+    """
+
+    @staticmethod
+    def encode(values: list) -> str:
+        """
+        Encode the values identifying the last item of a page into a cursor pointing at the next page.
+
+        Args:
+            values (list): The JSON serializable values, e.g. the sort key and the ID of the last item.
+
+        Returns:
+            str: The cursor.
+        """
+
+        return (
+            base64.urlsafe_b64encode(json.dumps(values).encode())
+            .rstrip(b"=")
+            .decode()
+        )
+
+    @staticmethod
+    def decode(cursor: str) -> list:
+        """
+        Decode a cursor created by encode.
+
+        Args:
+            cursor (str): The cursor.
+
+        Raises:
+            HTTPException: Raised with a 400 status code if the cursor is invalid.
+
+        Returns:
+            list: The values.
+        """
+
+        try:
+            values = json.loads(
+                base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            )
+        except (ValueError, binascii.Error):
+            values = None
+
+        if not isinstance(values, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor.",
+            )
+        return values
+
+
+cursor_util = CursorUtil()
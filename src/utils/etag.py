@@ -0,0 +1,85 @@
+import hashlib
+from typing import Callable
+
+from fastapi import Response, status
+
+
+class ETagUtil:
+    """
+    A utility class for answering conditional GET requests with ETags.
+    """
+
+    @staticmethod
+    def generate_etag(*parts) -> str:
+        """
+        Generate a strong ETag from the parts identifying a version of a resource.
+
+        Args:
+            *parts: The parts, e.g. the ID and the last modification time of the resource.
+
+        Returns:
+            str: The quoted ETag.
+        """
+
+        digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
+
+        return f'"{digest[:32]}"'
+
+    @staticmethod
+    def matches(if_none_match: str | None, etag: str) -> bool:
+        """
+        Check whether the If-None-Match header matches the ETag, using the weak comparison required for it.
+
+        Args:
+            if_none_match (str | None): The value of the If-None-Match header.
+            etag (str): The current ETag of the resource.
+
+        Returns:
+            bool: Whether the client's copy of the resource is up to date.
+        """
+
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+
+        return any(
+            candidate.strip().removeprefix("W/") == etag
+            for candidate in if_none_match.split(",")
+        )
+
+    def create_response(
+        self,
+        if_none_match: str | None,
+        etag: str,
+        get_body: Callable[[], bytes | str],
+        cache_control: str = "no-cache",
+    ) -> Response:
+        """
+        Create a 304 Not Modified response if the client's copy is up to date, otherwise a JSON response with
+        the body. The body is only built and serialized when it is actually sent.
+
+        Args:
+            if_none_match (str | None): The value of the If-None-Match header.
+            etag (str): The current ETag of the resource.
+            get_body (Callable[[], bytes | str]): Function returning the serialized JSON body.
+            cache_control (str): The value of the Cache-Control header. Defaults to "no-cache", so clients always
+                revalidate their copy.
+
+        Returns:
+            Response: The response.
+        """
+
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+
+        if self.matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        return Response(
+            content=get_body(), media_type="application/json", headers=headers
+        )
+
+
+etag_util = ETagUtil()
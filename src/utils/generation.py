@@ -0,0 +1,412 @@
+import asyncio
+import logging
+from collections import Counter, deque
+from typing import AsyncIterator, Awaitable, Callable
+
+from src.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class Generation:
+    """
+    An answer being generated by a server-side task, independent of the connections of the clients reading it.
+
+    The latest tokens are kept in a ring buffer, so a client that reconnects gets the tokens it missed from memory.
+    Tokens are dropped from the buffer only once they were stored, so older ones can always be read from the
+    database instead.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        chat_id: int,
+        seq: int,
+        model: str,
+        buffer_size: int,
+    ) -> None:
+        """
+        Initializes the generation.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+            model (str): The model generating the answer.
+            buffer_size (int): The number of characters of the latest tokens kept in memory.
+
+        Returns:
+            None
+        """
+
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.seq = seq
+        self.model = model
+        self.buffer_size = buffer_size
+
+        # The length of the answer generated and stored so far.
+        self.length = 0
+        self.stored_length = 0
+        # The "done" or "error" event that ended the generation.
+        self.result: tuple[str, dict] | None = None
+        # The task generating the answer, once it was started.
+        self.task: asyncio.Task | None = None
+
+        # The latest tokens together with the length of the answer up to and including them.
+        self._tokens: deque[tuple[int, str]] = deque()
+        self._buffered_size = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def key(self) -> tuple[int, int, int]:
+        """
+        The key of the generation: the user's ID, the chat's ID and the sequence number of the answer.
+        """
+
+        return self.user_id, self.chat_id, self.seq
+
+    @property
+    def is_finished(self) -> bool:
+        """
+        Whether the generation has ended.
+        """
+
+        return self.result is not None
+
+    def _notify(self) -> None:
+        """
+        Wake up all readers waiting for a change.
+
+        Returns:
+            None
+        """
+
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _trim(self) -> None:
+        """
+        Drop the oldest tokens that don't fit into the buffer anymore, as long as they were stored.
+
+        Returns:
+            None
+        """
+
+        while (
+            self._buffered_size > self.buffer_size
+            and self._tokens[0][0] <= self.stored_length
+        ):
+            self._buffered_size -= len(self._tokens.popleft()[1])
+
+    def append(self, token: str) -> None:
+        """
+        Add a generated token.
+
+        Args:
+            token (str): The token.
+
+        Returns:
+            None
+        """
+
+        self.length += len(token)
+        self._tokens.append((self.length, token))
+        self._buffered_size += len(token)
+        self._trim()
+        self._notify()
+
+    def mark_stored(self, length: int) -> None:
+        """
+        Record that the answer was stored up to the given length.
+
+        Args:
+            length (int): The stored length of the answer.
+
+        Returns:
+            None
+        """
+
+        self.stored_length = max(self.stored_length, length)
+        self._trim()
+
+    def finish(self, event: str, data: dict) -> None:
+        """
+        End the generation.
+
+        Args:
+            event (str): The type of the final event, "done" or "error".
+            data (dict): The data of the final event.
+
+        Returns:
+            None
+        """
+
+        if self.result is None:
+            self.result = (event, data)
+            self._notify()
+
+    def _get_buffered_start(self) -> int:
+        """
+        Get the offset of the answer the buffer starts at.
+
+        Returns:
+            int: The offset.
+        """
+
+        if not self._tokens:
+            return self.length
+
+        length, token = self._tokens[0]
+
+        return length - len(token)
+
+    async def read(
+        self, offset: int, load_content: Callable[[], Awaitable[str]]
+    ) -> AsyncIterator[tuple[str, dict, int | None]]:
+        """
+        Read the answer from an offset on, following it until the generation ends.
+
+        Tokens that piled up while the reader was busy are merged into a single event.
+
+        Args:
+            offset (int): The number of characters of the answer the reader already has.
+            load_content (Callable[[], Awaitable[str]]): Loads the stored answer, if the offset lies before the
+                buffer.
+
+        Yields:
+            tuple[str, dict, int | None]: The type, data and ID of the "token" events, followed by the final event.
+                The ID of a token event is the length of the answer up to and including it.
+        """
+
+        while True:
+            changed = self._changed
+            start = self._get_buffered_start()
+
+            if offset < start:
+                # Everything before the buffer was stored, unless storing it failed.
+                content = await load_content()
+                yield "token", {"content": content[offset:start]}, start
+                offset = start
+                continue
+            if offset < self.length:
+                content = "".join(
+                    token[max(offset - (length - len(token)), 0) :]
+                    for length, token in self._tokens
+                    if length > offset
+                )
+                offset = self.length
+                yield "token", {"content": content}, offset
+                continue
+            if self.result is not None:
+                event, data = self.result
+                yield event, data, None
+                return
+
+            await changed.wait()
+
+    def cancel(self) -> None:
+        """
+        Stop the generation. The part of the answer generated so far is kept.
+
+        Returns:
+            None
+        """
+
+        if self.task is not None:
+            self.task.cancel()
+
+
+class GenerationRegistry:
+    """
+    Runs the generations of a single worker process and keeps them readable for a while after they ended, so
+    clients reconnecting shortly afterwards still get the final event from memory.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int,
+        retention_in_seconds: float,
+        max_generations_per_user: int,
+    ) -> None:
+        """
+        Initializes the registry.
+
+        Args:
+            buffer_size (int): The number of characters of the latest tokens every generation keeps in memory.
+            retention_in_seconds (float): The time an ended generation is kept.
+            max_generations_per_user (int): The maximum number of concurrent generations of a user.
+
+        Returns:
+            None
+        """
+
+        self.buffer_size = buffer_size
+        self.retention_in_seconds = retention_in_seconds
+        self.max_generations_per_user = max_generations_per_user
+
+        self._generations: dict[tuple[int, int, int], Generation] = {}
+        self._running: Counter[int] = Counter()
+
+    def try_reserve(self, user_id: int) -> bool:
+        """
+        Reserve one of the user's concurrent generations, if the user has any left. Checking and taking the slot
+        happen at once, so concurrent requests of the user cannot exceed the limit. The slot is given back once the
+        started generation ends, or with release if it is never started.
+
+        Args:
+            user_id (int): The user's ID.
+
+        Returns:
+            bool: Whether a slot was reserved.
+        """
+
+        if self._running[user_id] >= self.max_generations_per_user:
+            return False
+
+        self._running[user_id] += 1
+
+        return True
+
+    def release(self, user_id: int) -> None:
+        """
+        Give back a slot reserved with try_reserve.
+
+        Args:
+            user_id (int): The user's ID.
+
+        Returns:
+            None
+        """
+
+        self._running[user_id] -= 1
+        if self._running[user_id] <= 0:
+            del self._running[user_id]
+
+    def create(
+        self, user_id: int, chat_id: int, seq: int, model: str
+    ) -> Generation:
+        """
+        Create a generation, to be started once the answer it generates is committed.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+            model (str): The model generating the answer.
+
+        Returns:
+            Generation: The generation.
+        """
+
+        return Generation(user_id, chat_id, seq, model, self.buffer_size)
+
+    def start(
+        self,
+        generation: Generation,
+        events: AsyncIterator[tuple[str, dict, int | None]],
+    ) -> None:
+        """
+        Start a generation as a task of its own, in a slot reserved with try_reserve.
+
+        Args:
+            generation (Generation): The generation.
+            events (AsyncIterator[tuple[str, dict, int | None]]): The events of the answer, as produced by
+                CompletionService.stream_answer.
+
+        Returns:
+            None
+        """
+
+        self._generations[generation.key] = generation
+        generation.task = asyncio.create_task(self._run(generation, events))
+
+    def get(self, user_id: int, chat_id: int, seq: int) -> Generation | None:
+        """
+        Get a running or recently ended generation.
+
+        Args:
+            user_id (int): The user's ID.
+            chat_id (int): The chat's ID.
+            seq (int): The sequence number of the answer.
+
+        Returns:
+            Generation | None: The generation or None if there is none.
+        """
+
+        return self._generations.get((user_id, chat_id, seq))
+
+    async def _run(
+        self,
+        generation: Generation,
+        events: AsyncIterator[tuple[str, dict, int | None]],
+    ) -> None:
+        """
+        Consume the events of the answer and record them in the generation.
+
+        Args:
+            generation (Generation): The generation.
+            events (AsyncIterator[tuple[str, dict, int | None]]): The events of the answer.
+
+        Returns:
+            None
+        """
+
+        try:
+            async for event, data, _ in events:
+                if event == "token":
+                    generation.append(data["content"])
+                else:
+                    generation.finish(event, data)
+        except asyncio.CancelledError:
+            # Closing the events stores the rest of the answer.
+            await events.aclose()
+            generation.finish(
+                "done",
+                {
+                    "seq": generation.seq,
+                    "length": generation.length,
+                    "stopped": True,
+                },
+            )
+        except Exception:
+            logger.exception("Failed to generate an answer")
+            generation.finish(
+                "error",
+                {"detail": "Something went wrong. Please try again later."},
+            )
+        finally:
+            self.release(generation.user_id)
+            asyncio.get_running_loop().call_later(
+                self.retention_in_seconds,
+                self._generations.pop,
+                generation.key,
+                None,
+            )
+
+    async def cancel_all(self) -> None:
+        """
+        Stop all running generations, waiting for them to store what was generated so far.
+
+        Returns:
+            None
+        """
+
+        tasks = [
+            generation.task
+            for generation in self._generations.values()
+            if generation.task is not None and not generation.task.done()
+        ]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+generation_registry = GenerationRegistry(
+    settings.GENERATION_BUFFER_SIZE_IN_CHARACTERS,
+    settings.GENERATION_RETENTION_IN_SECONDS,
+    settings.GENERATION_MAX_PER_USER,
+)
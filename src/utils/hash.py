@@ -1,21 +1,47 @@
 from passlib.context import CryptContext
 
+from src.config import settings
+
 
 class HashUtil:
     """
     A utility class for hashing and verifying secrets.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, rounds: int) -> None:
         """
         Initializes the hash utility class with the bcrypt context.
 
+        Args:
+            rounds (int): The number of bcrypt rounds (log2 of the cost) used for new hashes.
+
         Returns:
             None
         """
 
+        self.bcrypt_rounds = rounds
         self.bcrypt_context = CryptContext(
-            schemes=["bcrypt"], deprecated="auto"
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+        )
+
+    def configure(self, rounds: int) -> None:
+        """
+        Changes the number of bcrypt rounds used for new hashes.
+        Hashes created with fewer rounds are reported as needing an update.
+
+        Args:
+            rounds (int): The number of bcrypt rounds.
+
+        Returns:
+            None
+        """
+
+        self.bcrypt_rounds = rounds
+        self.bcrypt_context.update(
+            bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds
         )
 
     def create_hash(self, secret: str) -> str:
@@ -45,5 +71,22 @@ class HashUtil:
 
         return self.bcrypt_context.verify(secret, compare_hash)
 
+    def verify_and_update(
+        self, secret: str, compare_hash: str
+    ) -> tuple[bool, str | None]:
+        """
+        Verifies a secret against a hash and rehashes it if the hash was created with outdated parameters.
+
+        Args:
+            secret (str): The secret to verify.
+            compare_hash (str): The hash to compare the secret against.
+
+        Returns:
+            tuple[bool, str | None]: Whether the secret matches the hash and the new hash if the old one needs to be
+                replaced.
+        """
+
+        return self.bcrypt_context.verify_and_update(secret, compare_hash)
+
 
-hash_util = HashUtil()
+hash_util = HashUtil(settings.PASSWORD_HASH_BCRYPT_ROUNDS)
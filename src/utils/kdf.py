@@ -0,0 +1,219 @@
+import time
+import hashlib
+from typing import Self, Callable
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+
+# The largest scrypt cost the calibration is allowed to pick, 2^20 with r=8 needs 1 GiB of memory per derivation.
+_SCRYPT_MAX_LOG_N = 20
+_BCRYPT_MAX_ROUNDS = 31
+
+
+class KdfParameters:
+    """
+    The algorithm, version and cost parameters of the key derivation function used to derive a key from a passphrase.
+
+    The parameters are stored next to every user's passphrase salt in a compact string form, e.g.
+    "$pbkdf2-sha256$v=1$i=600000" or "$scrypt$v=1$ln=15,r=8,p=1", so each user's key can always be derived again
+    with the same cost, even after the server-wide defaults change.
+    """
+
+    VERSION = 1
+    ALGORITHMS = ("pbkdf2-sha256", "scrypt")
+
+    def __init__(self, algorithm: str, version: int = VERSION, **params: int):
+        """
+        Initializes the KDF parameters.
+
+        Args:
+            algorithm (str): The name of the algorithm, either "pbkdf2-sha256" or "scrypt".
+            version (int): The version of the derivation scheme. Defaults to the current version.
+            **params (int): The cost parameters: "i" (iterations) for PBKDF2, "ln" (log2 of N), "r" and "p" for scrypt.
+
+        Returns:
+            None
+        """
+
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unsupported KDF algorithm: {algorithm}")
+        if version != self.VERSION:
+            raise ValueError(f"Unsupported KDF version: {version}")
+
+        self.algorithm = algorithm
+        self.version = version
+        self.params = params
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KdfParameters):
+            return NotImplemented
+        return self.encode() == other.encode()
+
+    def __hash__(self) -> int:
+        return hash(self.encode())
+
+    def __repr__(self) -> str:
+        return f"KdfParameters({self.encode()!r})"
+
+    def is_weaker_than(self, other: Self) -> bool:
+        """
+        Checks whether the parameters should be upgraded to the other parameters,
+        i.e. whether they use another algorithm or scheme version, or a lower cost.
+
+        Args:
+            other (KdfParameters): The parameters to compare against.
+
+        Returns:
+            bool: Whether the parameters are weaker than the other parameters.
+        """
+
+        if (self.algorithm, self.version) != (other.algorithm, other.version):
+            return True
+
+        return any(
+            self.params.get(name, 0) < value
+            for name, value in other.params.items()
+        )
+
+    def encode(self) -> str:
+        """
+        Encodes the parameters to the string stored in the database.
+
+        Returns:
+            str: The encoded parameters.
+        """
+
+        params = ",".join(
+            f"{name}={value}" for name, value in self.params.items()
+        )
+
+        return f"${self.algorithm}$v={self.version}${params}"
+
+    @classmethod
+    def decode(cls, encoded: str) -> Self:
+        """
+        Decodes the parameters from the string stored in the database.
+
+        Args:
+            encoded (str): The encoded parameters.
+
+        Returns:
+            KdfParameters: The decoded parameters.
+        """
+
+        _, algorithm, version, params = encoded.split("$")
+        params = dict(param.split("=") for param in params.split(","))
+
+        return cls(
+            algorithm,
+            int(version.removeprefix("v=")),
+            **{name: int(value) for name, value in params.items()},
+        )
+
+    def derive(self, passphrase: bytes, salt: bytes, length: int = 32) -> bytes:
+        """
+        Derives a key from the passphrase and salt.
+
+        Args:
+            passphrase (bytes): The passphrase to derive the key from.
+            salt (bytes): The salt to use in the key derivation.
+            length (int): The length of the key in bytes. Defaults to 32.
+
+        Returns:
+            bytes: The derived key.
+        """
+
+        if self.algorithm == "scrypt":
+            n, r, p = 2 ** self.params["ln"], self.params["r"], self.params["p"]
+
+            return hashlib.scrypt(
+                passphrase,
+                salt=salt,
+                n=n,
+                r=r,
+                p=p,
+                maxmem=256 * n * r * p,
+                dklen=length,
+            )
+
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=length,
+            salt=salt,
+            iterations=self.params["i"],
+        )
+        return kdf.derive(passphrase)
+
+
+# Parameters of the users whose passphrase was created before the parameters were stored per user.
+LEGACY_KDF_PARAMETERS = KdfParameters("pbkdf2-sha256", i=600000)
+
+
+def _measure(func: Callable, *args) -> float:
+    started_at = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started_at
+
+
+def calibrate_kdf_parameters(
+    minimum: KdfParameters, target_in_seconds: float
+) -> KdfParameters:
+    """
+    Picks the highest cost of the KDF whose single derivation still fits the target latency on this machine.
+    The cost is never lower than the minimum.
+
+    Args:
+        minimum (KdfParameters): The minimal parameters, also defining the algorithm to calibrate.
+        target_in_seconds (float): The target latency of a single derivation.
+
+    Returns:
+        KdfParameters: The calibrated parameters.
+    """
+
+    elapsed = _measure(minimum.derive, b"calibration", b"\x00" * 16)
+
+    if minimum.algorithm == "scrypt":
+        # The cost of scrypt doubles with every increment of log2(N).
+        log_n = minimum.params["ln"]
+        while log_n < _SCRYPT_MAX_LOG_N and elapsed * 2 <= target_in_seconds:
+            log_n += 1
+            elapsed *= 2
+
+        return KdfParameters("scrypt", **{**minimum.params, "ln": log_n})
+
+    # The cost of PBKDF2 grows linearly with the number of iterations. The result is rounded down to a hundred
+    # thousand, so workers calibrating on the same hardware agree on the parameters despite measurement noise.
+    iterations = int(minimum.params["i"] * target_in_seconds / elapsed)
+    iterations = max(minimum.params["i"], iterations // 100000 * 100000)
+
+    return KdfParameters("pbkdf2-sha256", i=iterations)
+
+
+def calibrate_bcrypt_rounds(
+    create_hash: Callable[[str], str],
+    minimum_rounds: int,
+    target_in_seconds: float,
+) -> int:
+    """
+    Picks the highest number of bcrypt rounds whose single hash still fits the target latency on this machine.
+    The number of rounds is never lower than the minimum.
+
+    Args:
+        create_hash (Callable[[str], str]): Function hashing a secret with the minimal number of rounds.
+        minimum_rounds (int): The minimal number of rounds.
+        target_in_seconds (float): The target latency of a single hash.
+
+    Returns:
+        int: The calibrated number of rounds.
+    """
+
+    elapsed = _measure(create_hash, "calibration")
+
+    # The cost of bcrypt doubles with every additional round.
+    rounds = minimum_rounds
+    while rounds < _BCRYPT_MAX_ROUNDS and elapsed * 2 <= target_in_seconds:
+        rounds += 1
+        elapsed *= 2
+
+    return rounds
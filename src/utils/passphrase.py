@@ -6,7 +6,10 @@ import binascii
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
+
+from src.config import settings
+from src.utils.kdf import KdfParameters
 
 
 class PassphraseUtil:
@@ -15,6 +18,19 @@ class PassphraseUtil:
     salts, converting bytes to hex and vice versa.
     """
 
+    def __init__(self, kdf_parameters: KdfParameters) -> None:
+        """
+        Initializes the passphrase utility class with the KDF parameters used for new passphrases.
+
+        Args:
+            kdf_parameters (KdfParameters): The KDF parameters used for new passphrases.
+
+        Returns:
+            None
+        """
+
+        self.kdf_parameters = kdf_parameters
+
     @staticmethod
     def convert_bytes_to_hex(data: bytes) -> str:
         """
@@ -80,25 +96,152 @@ class PassphraseUtil:
         return salt
 
     @staticmethod
-    def generate_fernet_key(passphrase: bytes, salt: bytes) -> Fernet:
+    def derive_key(
+        passphrase: bytes, salt: bytes, kdf_parameters: KdfParameters
+    ) -> bytes:
         """
-        Generates a Fernet key from a passphrase and salt.
+        Derives an url-safe base64-encoded key from a passphrase and salt, which the key encryption key and the
+        passphrase verifier are derived from.
 
         Args:
-            passphrase (bytes): The passphrase to generate the key from.
-            salt (bytes): The salt to use in the key generation.
+            passphrase (bytes): The passphrase to derive the key from.
+            salt (bytes): The salt to use in the key derivation.
+            kdf_parameters (KdfParameters): The KDF parameters to derive the key with.
 
         Returns:
-            bytes: The generated key.
+            bytes: The derived key.
         """
 
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(), length=32, salt=salt, iterations=600000
+        key = base64.urlsafe_b64encode(kdf_parameters.derive(passphrase, salt))
+
+        return key
+
+    @staticmethod
+    def derive_verifier(key: bytes) -> bytes:
+        """
+        Derives a passphrase verifier from a key returned by derive_key.
+
+        The verifier is expanded from the key with HKDF, so it can be stored in the database and compared against
+        without revealing the key itself.
+
+        Args:
+            key (bytes): The key derived from the passphrase.
+
+        Returns:
+            bytes: The passphrase verifier.
+        """
+
+        hkdf = HKDFExpand(
+            algorithm=hashes.SHA256(),
+            length=32,
+            info=b"chattyai passphrase verifier",
+        )
+        verifier = hkdf.derive(base64.urlsafe_b64decode(key))
+
+        return verifier
+
+    @staticmethod
+    def derive_key_encryption_key(key: bytes) -> bytes:
+        """
+        Derives an url-safe base64-encoded key encryption key from a key returned by derive_key.
+
+        The key encryption key is used only to wrap the user's data encryption key, so changing the passphrase
+        requires re-wrapping a single data key instead of re-encrypting all the user's data.
+
+        Args:
+            key (bytes): The key derived from the passphrase.
+
+        Returns:
+            bytes: The key encryption key.
+        """
+
+        hkdf = HKDFExpand(
+            algorithm=hashes.SHA256(),
+            length=32,
+            info=b"chattyai key encryption key",
+        )
+        key_encryption_key = base64.urlsafe_b64encode(
+            hkdf.derive(base64.urlsafe_b64decode(key))
         )
-        key = base64.urlsafe_b64encode(kdf.derive(passphrase))
 
-        f_key = Fernet(key)
-        return f_key
+        return key_encryption_key
 
+    @staticmethod
+    def generate_data_key() -> bytes:
+        """
+        Generates a random url-safe base64-encoded data encryption key.
+
+        Returns:
+            bytes: The generated data encryption key.
+        """
+
+        return Fernet.generate_key()
+
+    def wrap_data_key(self, key: bytes, data_key: bytes) -> str:
+        """
+        Encrypts the data encryption key with the key encryption key derived from the passphrase key.
+
+        Args:
+            key (bytes): The key derived from the passphrase.
+            data_key (bytes): The data encryption key.
+
+        Returns:
+            str: The hexadecimal representation of the encrypted data encryption key.
+        """
+
+        key_encryption_key = Fernet(self.derive_key_encryption_key(key))
+
+        return self.convert_bytes_to_hex(key_encryption_key.encrypt(data_key))
+
+    def unwrap_data_key(self, key: bytes, encrypted_data_key: str) -> bytes:
+        """
+        Decrypts the data encryption key with the key encryption key derived from the passphrase key.
+
+        Args:
+            key (bytes): The key derived from the passphrase.
+            encrypted_data_key (str): The hexadecimal representation of the encrypted data encryption key.
+
+        Returns:
+            bytes: The data encryption key.
+        """
+
+        key_encryption_key = Fernet(self.derive_key_encryption_key(key))
+
+        return key_encryption_key.decrypt(
+            self.convert_hex_to_bytes(encrypted_data_key)
+        )
+
+    def derive_key_and_verifier(
+        self, passphrase: bytes, salt: bytes, kdf_parameters: KdfParameters
+    ) -> tuple[bytes, bytes]:
+        """
+        Derives both the key and the passphrase verifier with a single run of the slow key derivation function.
+
+        Args:
+            passphrase (bytes): The passphrase to derive the key from.
+            salt (bytes): The salt to use in the key derivation.
+            kdf_parameters (KdfParameters): The KDF parameters to derive the key with.
+
+        Returns:
+            tuple[bytes, bytes]: The derived key and the passphrase verifier.
+        """
 
-passphrase_util = PassphraseUtil()
+        key = self.derive_key(passphrase, salt, kdf_parameters)
+
+        return key, self.derive_verifier(key)
+
+
+passphrase_util = PassphraseUtil(
+    KdfParameters(
+        settings.PASSPHRASE_KDF_ALGORITHM,
+        **(
+            {
+                "ln": settings.PASSPHRASE_KDF_SCRYPT_LOG_N,
+                "r": settings.PASSPHRASE_KDF_SCRYPT_R,
+                "p": settings.PASSPHRASE_KDF_SCRYPT_P,
+            }
+            if settings.PASSPHRASE_KDF_ALGORITHM == "scrypt"
+            else {"i": settings.PASSPHRASE_KDF_PBKDF2_ITERATIONS}
+        ),
+    )
+)
@@ -0,0 +1,78 @@
+import time
+
+
+class TokenRevocationList:
+    """
+    Holds the token revocations of a single worker process in memory, so checking whether a token is revoked costs
+    no database query.
+
+    Instead of the ID of every revoked token, it holds a single point in time per user before which all tokens of
+    the user were revoked, e.g. because the user changed their password. A revocation is dropped once every token
+    it affects has expired.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty revocation list.
+
+        Returns:
+            None
+        """
+
+        # Maps the ID of a user to the time before which their tokens were revoked and the time the revocation
+        # expires at, both as UNIX timestamps.
+        self._revoked_before: dict[int, tuple[float, float]] = {}
+        # The highest ID of the revocations loaded from the database.
+        self.last_id: int = 0
+
+    def add(self, user_id: int, revoked_at: float, expires_at: float) -> None:
+        """
+        Revoke all tokens of a user issued before the given time.
+
+        Args:
+            user_id (int): The user's ID.
+            revoked_at (float): The UNIX timestamp before which the tokens were issued.
+            expires_at (float): The UNIX timestamp after which all of these tokens have expired.
+
+        Returns:
+            None
+        """
+
+        current = self._revoked_before.get(user_id)
+
+        if current is None or current[0] < revoked_at:
+            self._revoked_before[user_id] = (revoked_at, expires_at)
+
+    def is_revoked(self, claims: dict) -> bool:
+        """
+        Check whether a token is revoked.
+
+        Args:
+            claims (dict): The verified claims of the token.
+
+        Returns:
+            bool: Whether the token is revoked.
+        """
+
+        revocation = self._revoked_before.get(claims["id"])
+
+        # Tokens issued before the issued at claim was introduced are revoked by every revocation.
+        return revocation is not None and claims.get("iat", 0) <= revocation[0]
+
+    def prune(self) -> None:
+        """
+        Drop the revocations whose tokens have all expired.
+
+        Returns:
+            None
+        """
+
+        now = time.time()
+        self._revoked_before = {
+            user_id: revocation
+            for user_id, revocation in self._revoked_before.items()
+            if revocation[1] > now
+        }
+
+
+token_revocation_list = TokenRevocationList()
@@ -0,0 +1,157 @@
+import re
+import html
+import math
+from collections import Counter, defaultdict
+from typing import Hashable
+
+
+class InvertedIndex:
+    """
+    An in-memory full-text index, searching documents the way the messages are searched in Postgres: a document
+    matches if it contains all words of the query, ranked by how often it contains them.
+
+    Serves as a fallback where the Postgres text search cannot be used, e.g. to test against another database. Unlike
+    Postgres, it neither stems words nor understands the operators of the query, and its ranks differ.
+    """
+
+    _WORD_PATTERN = re.compile(r"\w+")
+    # The most frequent English words, which Postgres doesn't index either.
+    _STOP_WORDS = frozenset(
+        "a an and are as at be but by for from has have he her his i if in into is it its me my no not of on or our"
+        " she so that the their them then there these they this to was we were what when which who will with you"
+        " your".split()
+    )
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty index.
+
+        Returns:
+            None
+        """
+
+        # Maps every word to the documents containing it and how often they contain it.
+        self._postings: defaultdict[str, dict[Hashable, int]] = defaultdict(
+            dict
+        )
+        self._size = 0
+
+    def tokenize(self, text: str) -> list[str]:
+        """
+        Split a text into the lowercase words it is indexed or searched by, leaving out the stop words.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            list[str]: The words in the order they occur.
+        """
+
+        return [
+            word
+            for word in self._WORD_PATTERN.findall(text.lower())
+            if word not in self._STOP_WORDS
+        ]
+
+    def add(self, key: Hashable, text: str) -> None:
+        """
+        Add a document to the index.
+
+        Args:
+            key (Hashable): The key identifying the document.
+            text (str): The text of the document.
+
+        Returns:
+            None
+        """
+
+        for word, count in Counter(self.tokenize(text)).items():
+            self._postings[word][key] = count
+
+        self._size += 1
+
+    def search(self, query: str) -> dict[Hashable, float]:
+        """
+        Find the documents containing all words of a query.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            dict[Hashable, float]: Maps the keys of the matching documents to their ranks, the higher the better.
+        """
+
+        words = set(self.tokenize(query))
+
+        if not words:
+            return {}
+
+        # Intersecting the shortest posting lists first keeps the candidates few.
+        postings = sorted(
+            (self._postings.get(word, {}) for word in words), key=len
+        )
+        keys = set(postings[0])
+
+        for posting in postings[1:]:
+            keys.intersection_update(posting)
+
+        # Words occurring in fewer documents weigh more, repetitions weigh less and less.
+        return {
+            key: sum(
+                math.log(1 + posting[key])
+                * math.log(1 + self._size / len(posting))
+                for posting in postings
+            )
+            for key in keys
+        }
+
+    def highlight(self, text: str, query: str, max_words: int = 35) -> str:
+        """
+        Cut the part of a text around the first word of a query out of it and wrap the words of the query in <b>
+        tags, like ts_headline does in Postgres. The text is HTML-escaped, so only the tags are markup.
+
+        Args:
+            text (str): The text.
+            query (str): The query.
+            max_words (int): The maximum number of words of the snippet. Defaults to 35.
+
+        Returns:
+            str: The snippet.
+        """
+
+        words = set(self.tokenize(query))
+        matches = list(self._WORD_PATTERN.finditer(text))
+        first = next(
+            (
+                index
+                for index, match in enumerate(matches)
+                if match.group().lower() in words
+            ),
+            0,
+        )
+        start = max(min(first - max_words // 2, len(matches) - max_words), 0)
+        window = matches[start : start + max_words]
+
+        if not window:
+            return html.escape(text, quote=False)
+
+        parts = []
+        # A snippet at the start or the end of the text keeps the text's leading or trailing punctuation.
+        position = window[0].start() if start > 0 else 0
+        end = (
+            window[-1].end() if start + max_words < len(matches) else len(text)
+        )
+
+        for match in window:
+            if match.group().lower() in words:
+                parts.append(text[position : match.start()])
+                parts.append(f"<b>{match.group()}</b>")
+                position = match.end()
+
+        parts.append(text[position:end])
+
+        # Every other part is a word of the query, wrapped in tags.
+        return "".join(
+            part if index % 2 else html.escape(part, quote=False)
+            for index, part in enumerate(parts)
+        )
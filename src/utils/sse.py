@@ -0,0 +1,38 @@
+import json
+
+
+class SseUtil:
+    """
+    A utility class for formatting Server-Sent Events.
+    """
+
+    @staticmethod
+    def format_event(
+        data: dict, event: str | None = None, event_id: int | str | None = None
+    ) -> str:
+        """
+        Format an event of a text/event-stream response.
+
+        Args:
+            data (dict): The JSON serializable data of the event.
+            event (str | None): The type of the event. Defaults to None, which clients treat as "message".
+            event_id (int | str | None): The ID of the event, sent back by reconnecting clients in the Last-Event-ID
+                header. Defaults to None.
+
+        Returns:
+            str: The formatted event.
+        """
+
+        lines = []
+
+        if event_id is not None:
+            lines.append(f"id: {event_id}\n")
+        if event is not None:
+            lines.append(f"event: {event}\n")
+        # JSON escapes newlines, so the data always fits into a single data line.
+        lines.append(f"data: {json.dumps(data)}\n\n")
+
+        return "".join(lines)
+
+
+sse_util = SseUtil()
@@ -0,0 +1,314 @@
+import math
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.utils.crypto_executor import CryptoExecutor, crypto_executor
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketBackend(ABC):
+    """
+    Base abstract class for the storages of token buckets.
+    """
+
+    @abstractmethod
+    async def consume(
+        self, key: str, capacity: float, refill_rate: float, cost: float
+    ) -> float:
+        """
+        Take tokens out of a bucket, if it holds enough of them. A bucket starts full and refills continuously.
+
+        Args:
+            key (str): The key of the bucket.
+            capacity (float): The maximum number of tokens the bucket holds.
+            refill_rate (float): The number of tokens added to the bucket per second.
+            cost (float): The number of tokens to take out of the bucket.
+
+        Returns:
+            float: 0 if the tokens were taken out, otherwise the number of seconds until the bucket holds enough
+                tokens.
+        """
+
+        pass
+
+
+class InMemoryTokenBucketBackend(TokenBucketBackend):
+    """
+    Keeps the token buckets in the memory of a single worker process.
+    Once there are too many buckets, the least recently used one is dropped, which refills it.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """
+        Initializes the backend.
+
+        Args:
+            max_size (int): The maximum number of buckets.
+
+        Returns:
+            None
+        """
+
+        self.max_size = max_size
+        # Maps the key of a bucket to its number of tokens and the time they were counted at.
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def consume(
+        self, key: str, capacity: float, refill_rate: float, cost: float
+    ) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+        if tokens >= cost:
+            tokens -= cost
+            wait_time = 0.0
+        else:
+            wait_time = (cost - tokens) / refill_rate
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_size:
+            self._buckets.popitem(last=False)
+
+        return wait_time
+
+
+class RedisTokenBucketBackend(TokenBucketBackend):
+    """
+    Keeps the token buckets in Redis, so they are shared by all workers and instances of the application.
+    Requires the optional redis package. If Redis cannot be reached, the buckets of the worker are used instead.
+    """
+
+    # Refills and takes the tokens atomically, using the clock of Redis, so all clients agree on the time.
+    # The wait time is returned as a string, since Redis truncates numbers returned by scripts to integers.
+    _CONSUME_SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local refill_rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local time = redis.call("TIME")
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * refill_rate)
+    local wait_time = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        wait_time = (cost - tokens) / refill_rate
+    end
+    redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+    redis.call("EXPIRE", KEYS[1], math.ceil(capacity / refill_rate) + 1)
+    return tostring(wait_time)
+    """
+
+    def __init__(self, url: str, fallback: TokenBucketBackend) -> None:
+        """
+        Initializes the backend.
+
+        Args:
+            url (str): The URL of the Redis server.
+            fallback (TokenBucketBackend): The backend used while Redis cannot be reached.
+
+        Raises:
+            RuntimeError: Raised if the redis package is not installed.
+
+        Returns:
+            None
+        """
+
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis package is required to share the throttling state, install it with `pip install redis`."
+            ) from e
+
+        self.fallback = fallback
+        self._client = Redis.from_url(url)
+        self._consume_script = self._client.register_script(
+            self._CONSUME_SCRIPT
+        )
+
+    async def consume(
+        self, key: str, capacity: float, refill_rate: float, cost: float
+    ) -> float:
+        try:
+            wait_time = await self._consume_script(
+                keys=[f"throttle:{key}"], args=[capacity, refill_rate, cost]
+            )
+        except Exception:
+            logger.exception("Failed to consume tokens from Redis")
+            return await self.fallback.consume(key, capacity, refill_rate, cost)
+
+        return float(wait_time)
+
+
+class Throttle:
+    """
+    Limits the rate of requests to CPU-heavy endpoints with token buckets per client IP address and per account.
+
+    Every request costs more tokens the busier the crypto executor is, so clients are throttled sooner under load.
+    Once the executor is close to saturation, requests are rejected before taking any tokens or doing any work.
+    """
+
+    def __init__(
+        self,
+        backend: TokenBucketBackend,
+        executor: CryptoExecutor,
+        ip_capacity: float,
+        ip_refill_per_minute: float,
+        account_capacity: float,
+        account_refill_per_minute: float,
+        max_load: float,
+        enabled: bool = True,
+    ) -> None:
+        """
+        Initializes the throttle.
+
+        Args:
+            backend (TokenBucketBackend): The storage of the token buckets.
+            executor (CryptoExecutor): The executor whose load is taken into account.
+            ip_capacity (float): The number of requests a client IP address can burst.
+            ip_refill_per_minute (float): The sustained number of requests per minute of a client IP address.
+            account_capacity (float): The number of requests an account can burst.
+            account_refill_per_minute (float): The sustained number of requests per minute of an account.
+            max_load (float): The load of the executor, between 0 and 1, from which requests are rejected.
+            enabled (bool): Whether requests are throttled. Defaults to True.
+
+        Returns:
+            None
+        """
+
+        self.backend = backend
+        self.executor = executor
+        self.ip_capacity = ip_capacity
+        self.ip_refill_rate = ip_refill_per_minute / 60
+        self.account_capacity = account_capacity
+        self.account_refill_rate = account_refill_per_minute / 60
+        self.max_load = max_load
+        self.enabled = enabled
+
+        self._throttled: int = 0
+        self._shed: int = 0
+
+    async def _consume(
+        self, key: str, capacity: float, refill_rate: float, cost: float
+    ) -> None:
+        """
+        Take tokens out of a bucket.
+
+        Args:
+            key (str): The key of the bucket.
+            capacity (float): The maximum number of tokens the bucket holds.
+            refill_rate (float): The number of tokens added to the bucket per second.
+            cost (float): The number of tokens to take out of the bucket.
+
+        Raises:
+            HTTPException: Raised with a 429 status code if the bucket doesn't hold enough tokens.
+
+        Returns:
+            None
+        """
+
+        wait_time = await self.backend.consume(
+            key, capacity, refill_rate, min(cost, capacity)
+        )
+
+        if wait_time > 0:
+            self._throttled += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts. Please try again later.",
+                headers={"Retry-After": str(math.ceil(wait_time))},
+            )
+
+    async def check(self, ip: str | None, account: str | None = None) -> None:
+        """
+        Admit a request or reject it, if the executor is close to saturation or the client sent too many requests.
+
+        Args:
+            ip (str | None): The client's IP address.
+            account (str | None): The account the request acts on, e.g. the email of a login attempt or the ID of
+                the authenticated user. Defaults to None.
+
+        Raises:
+            HTTPException: Raised with a 503 status code if the executor is close to saturation.
+            HTTPException: Raised with a 429 status code if the client's IP address or the account sent too many
+                requests.
+
+        Returns:
+            None
+        """
+
+        if not self.enabled:
+            return
+
+        load = self.executor.load
+
+        if load >= self.max_load:
+            self._shed += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is busy right now. Please try again later.",
+                headers={
+                    "Retry-After": str(self.executor.retry_after_in_seconds)
+                },
+            )
+
+        # A request costs 1 token on an idle executor, 2 when it is half loaded and so on.
+        cost = 1 / max(1 - load, 0.1)
+
+        if ip is not None:
+            await self._consume(
+                f"ip:{ip}", self.ip_capacity, self.ip_refill_rate, cost
+            )
+        if account is not None:
+            await self._consume(
+                f"account:{account}",
+                self.account_capacity,
+                self.account_refill_rate,
+                cost,
+            )
+
+    def get_metrics(self) -> dict:
+        """
+        Get the metrics of the throttle.
+
+        Returns:
+            dict: Whether throttling is enabled, the current load of the executor and the number of requests
+                rejected because of too many requests and because of the load.
+        """
+
+        return {
+            "enabled": self.enabled,
+            "load": self.executor.load,
+            "max_load": self.max_load,
+            "throttled": self._throttled,
+            "shed": self._shed,
+        }
+
+
+_in_memory_backend = InMemoryTokenBucketBackend(settings.THROTTLE_MAX_BUCKETS)
+
+throttle = Throttle(
+    (
+        RedisTokenBucketBackend(settings.THROTTLE_REDIS_URL, _in_memory_backend)
+        if settings.THROTTLE_REDIS_URL
+        else _in_memory_backend
+    ),
+    crypto_executor,
+    settings.THROTTLE_IP_CAPACITY,
+    settings.THROTTLE_IP_REFILL_PER_MINUTE,
+    settings.THROTTLE_ACCOUNT_CAPACITY,
+    settings.THROTTLE_ACCOUNT_REFILL_PER_MINUTE,
+    settings.THROTTLE_MAX_LOAD,
+    settings.THROTTLE_ENABLED,
+)
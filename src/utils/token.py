@@ -0,0 +1,243 @@
+import hmac
+import json
+import time
+import uuid
+import base64
+import hashlib
+import binascii
+from datetime import datetime, timedelta, UTC
+
+from jose import jwt, JWTError
+
+from src.config import settings
+from src.utils.cache import TTLCache
+
+
+class TokenUtil:
+    """
+    A utility class for creating and verifying the JWT access and refresh tokens of users.
+
+    Tokens signed with HMAC are verified with a precomputed key, and the claims of verified tokens are cached
+    until the tokens expire, so a user sending the same token again skips the verification altogether.
+    """
+
+    _HASH_FUNCTIONS = {
+        "HS256": hashlib.sha256,
+        "HS384": hashlib.sha384,
+        "HS512": hashlib.sha512,
+    }
+
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        expire_in_minutes: int,
+        refresh_expire_in_days: int,
+        cache_max_size: int,
+        cache_enabled: bool = True,
+    ) -> None:
+        """
+        Initializes the token utility class.
+
+        Args:
+            secret_key (str): The key the tokens are signed with.
+            algorithm (str): The algorithm the tokens are signed with.
+            expire_in_minutes (int): The lifetime of the access tokens.
+            refresh_expire_in_days (int): The lifetime of the refresh tokens.
+            cache_max_size (int): The maximum number of cached claims.
+            cache_enabled (bool): Whether the claims of verified tokens are cached. Defaults to True.
+
+        Returns:
+            None
+        """
+
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.expire_in_minutes = expire_in_minutes
+        self.refresh_expire_in_days = refresh_expire_in_days
+        self.cache = TTLCache(
+            cache_max_size, expire_in_minutes * 60, cache_enabled
+        )
+
+        hash_function = self._HASH_FUNCTIONS.get(algorithm)
+        # The key is expanded into the HMAC's inner and outer state once, every verification continues from a copy.
+        # Other algorithms are verified by python-jose.
+        self._hmac = (
+            hmac.new(secret_key.encode(), digestmod=hash_function)
+            if hash_function
+            else None
+        )
+
+    def encode(self, claims: dict) -> str:
+        """
+        Create a signed token.
+
+        Args:
+            claims (dict): The claims of the token.
+
+        Returns:
+            str: The token.
+        """
+
+        return jwt.encode(claims, self.secret_key, self.algorithm)
+
+    def _create_token(
+        self, token_type: str, email: str, user_id: int, expires_in: timedelta
+    ) -> str:
+        """
+        Create a signed token of a user with a unique ID.
+
+        Args:
+            token_type (str): The type of the token, either "access" or "refresh".
+            email (str): The user's email.
+            user_id (int): The user's ID.
+            expires_in (timedelta): The lifetime of the token.
+
+        Returns:
+            str: The token.
+        """
+
+        issued_at = datetime.now(UTC)
+
+        return self.encode(
+            {
+                "sub": email,
+                "id": user_id,
+                "jti": uuid.uuid4().hex,
+                "type": token_type,
+                # Not rounded to whole seconds like the expiration time, so tokens issued right after all tokens of
+                # the user were revoked are not revoked as well, see TokenRevocationList.
+                "iat": issued_at.timestamp(),
+                "exp": issued_at + expires_in,
+            }
+        )
+
+    def create_access_token(self, email: str, user_id: int) -> str:
+        """
+        Create an access token for a user.
+
+        Args:
+            email (str): The user's email.
+            user_id (int): The user's ID.
+
+        Returns:
+            str: The access token.
+        """
+
+        return self._create_token(
+            "access", email, user_id, timedelta(minutes=self.expire_in_minutes)
+        )
+
+    def create_refresh_token(self, email: str, user_id: int) -> str:
+        """
+        Create a refresh token for a user, which can be exchanged for new access and refresh tokens once.
+
+        Args:
+            email (str): The user's email.
+            user_id (int): The user's ID.
+
+        Returns:
+            str: The refresh token.
+        """
+
+        return self._create_token(
+            "refresh",
+            email,
+            user_id,
+            timedelta(days=self.refresh_expire_in_days),
+        )
+
+    @staticmethod
+    def _decode_segment(segment: bytes) -> bytes:
+        """
+        Decode a base64url encoded segment of a token, whose padding is stripped.
+
+        Args:
+            segment (bytes): The segment.
+
+        Returns:
+            bytes: The decoded segment.
+        """
+
+        return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+    def _verify(self, token: str) -> dict:
+        """
+        Verify the signature and the expiration time of a token signed with HMAC.
+
+        Args:
+            token (str): The token.
+
+        Raises:
+            JWTError: Raised if the token is malformed, its signature is invalid or it has expired.
+
+        Returns:
+            dict: The claims of the token.
+        """
+
+        try:
+            signing_input, signature = token.encode().rsplit(b".", 1)
+            header, payload = signing_input.split(b".")
+            header = json.loads(self._decode_segment(header))
+            signature = self._decode_segment(signature)
+        except (ValueError, binascii.Error) as e:
+            raise JWTError("Invalid token.") from e
+
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+            raise JWTError("Invalid token algorithm.")
+
+        mac = self._hmac.copy()
+        mac.update(signing_input)
+        if not hmac.compare_digest(mac.digest(), signature):
+            raise JWTError("Invalid token signature.")
+
+        try:
+            claims = json.loads(self._decode_segment(payload))
+        except (ValueError, binascii.Error) as e:
+            raise JWTError("Invalid token payload.") from e
+
+        if not isinstance(claims, dict) or not isinstance(
+            claims.get("exp"), int
+        ):
+            raise JWTError("Invalid token expiration time.")
+        if claims["exp"] < time.time():
+            raise JWTError("Token has expired.")
+
+        return claims
+
+    def decode(self, token: str) -> dict:
+        """
+        Get the claims of a token, verifying it unless its claims are cached.
+
+        Args:
+            token (str): The token.
+
+        Raises:
+            JWTError: Raised if the token is malformed, its signature is invalid or it has expired.
+
+        Returns:
+            dict: The claims of the token. They are shared with later lookups and must not be modified.
+        """
+
+        if self._hmac is None:
+            return jwt.decode(token, self.secret_key, self.algorithm)
+
+        # Only a digest of the token is kept in memory, the token itself is a credential.
+        key = hashlib.sha256(token.encode()).digest()
+        claims = self.cache.get(key)
+
+        if claims is None:
+            claims = self._verify(token)
+            self.cache.set(key, claims, claims["exp"] - time.time())
+
+        return claims
+
+
+token_util = TokenUtil(
+    settings.JWT_AUTH_SECRET_KEY,
+    settings.ALGORITHM,
+    settings.ACCESS_TOKEN_EXPIRE_IN_MINUTES,
+    settings.REFRESH_TOKEN_EXPIRE_IN_DAYS,
+    settings.ACCESS_TOKEN_CACHE_MAX_SIZE,
+    settings.ACCESS_TOKEN_CACHE_ENABLED,
+)
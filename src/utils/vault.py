@@ -0,0 +1,231 @@
+import time
+import hashlib
+import secrets
+from collections import OrderedDict
+
+from src.config import settings
+
+
+class VaultSession:
+    """
+    A single unlocked vault holding the user's data key, unwrapped with the key encryption key derived from the
+    user's passphrase.
+    """
+
+    def __init__(self, user_id: int, key: bytes, now: float) -> None:
+        """
+        Initializes the vault session.
+
+        Args:
+            user_id (int): The ID of the user the session belongs to.
+            key (bytes): The user's unwrapped data key.
+            now (float): The current monotonic time.
+
+        Returns:
+            None
+        """
+
+        self.user_id = user_id
+        self.key = bytearray(key)
+        self.created_at = now
+        self.last_used_at = now
+
+    def zeroize(self) -> None:
+        """
+        Overwrite the key in place, so it does not linger in memory after the session is gone.
+
+        Returns:
+            None
+        """
+
+        for i in range(len(self.key)):
+            self.key[i] = 0
+
+
+class VaultSessionStore:
+    """
+    A memory-only LRU store of unlocked vaults.
+
+    Unwrapping the data key requires the slow derivation of a key from the passphrase, so the unwrapped data key is
+    kept here behind an opaque unlock token instead. Neither the passphrase nor the keys derived from it are stored.
+    Sessions expire after a fixed time to live or after being idle for too long, and every user can hold only a
+    limited number of them. Data keys are zeroized whenever their session is evicted, expired or locked.
+
+    The store lives in the memory of a single worker process, so the unlock token is only valid on the worker that
+    issued it.
+    """
+
+    def __init__(
+        self,
+        ttl_in_seconds: int,
+        idle_timeout_in_seconds: int,
+        max_sessions: int,
+        max_sessions_per_user: int,
+    ) -> None:
+        """
+        Initializes the store.
+
+        Args:
+            ttl_in_seconds (int): The maximum lifetime of a session.
+            idle_timeout_in_seconds (int): The time after which an unused session expires.
+            max_sessions (int): The maximum number of sessions kept in memory.
+            max_sessions_per_user (int): The maximum number of sessions a single user can hold.
+
+        Returns:
+            None
+        """
+
+        self.ttl_in_seconds = ttl_in_seconds
+        self.idle_timeout_in_seconds = idle_timeout_in_seconds
+        self.max_sessions = max_sessions
+        self.max_sessions_per_user = max_sessions_per_user
+
+        # Sessions are keyed by the digest of the unlock token, so the tokens themselves are never stored.
+        self._sessions: OrderedDict[bytes, VaultSession] = OrderedDict()
+        self._user_sessions: dict[int, OrderedDict[bytes, None]] = {}
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _is_expired(self, session: VaultSession, now: float) -> bool:
+        return (
+            now - session.created_at >= self.ttl_in_seconds
+            or now - session.last_used_at >= self.idle_timeout_in_seconds
+        )
+
+    def _evict(self, digest: bytes) -> None:
+        """
+        Remove a session from the store and zeroize its key.
+
+        Args:
+            digest (bytes): The digest of the session's unlock token.
+
+        Returns:
+            None
+        """
+
+        session = self._sessions.pop(digest, None)
+
+        if session is None:
+            return
+
+        user_sessions = self._user_sessions.get(session.user_id)
+        if user_sessions is not None:
+            user_sessions.pop(digest, None)
+            if not user_sessions:
+                del self._user_sessions[session.user_id]
+
+        session.zeroize()
+
+    def _evict_expired(self, now: float) -> None:
+        """
+        Evict expired sessions from the least recently used end of the store.
+
+        Returns:
+            None
+        """
+
+        while self._sessions:
+            digest, session = next(iter(self._sessions.items()))
+            if not self._is_expired(session, now):
+                break
+            self._evict(digest)
+
+    def create(self, user_id: int, key: bytes) -> str:
+        """
+        Store the data key in a new session and return the unlock token for it.
+
+        Args:
+            user_id (int): The ID of the user the key belongs to.
+            key (bytes): The user's unwrapped data key.
+
+        Returns:
+            str: The opaque unlock token.
+        """
+
+        now = time.monotonic()
+        self._evict_expired(now)
+
+        user_sessions = self._user_sessions.setdefault(user_id, OrderedDict())
+        while len(user_sessions) >= self.max_sessions_per_user:
+            self._evict(next(iter(user_sessions)))
+
+        while len(self._sessions) >= self.max_sessions:
+            self._evict(next(iter(self._sessions)))
+
+        token = secrets.token_urlsafe(32)
+        digest = self._digest(token)
+
+        self._sessions[digest] = VaultSession(user_id, key, now)
+        self._user_sessions.setdefault(user_id, OrderedDict())[digest] = None
+
+        return token
+
+    def get(self, user_id: int, token: str) -> bytes | None:
+        """
+        Get the data key stored behind the unlock token.
+
+        Args:
+            user_id (int): The ID of the user presenting the token.
+            token (str): The unlock token.
+
+        Returns:
+            bytes | None: The data key or None if the token is unknown, expired or belongs to another user.
+        """
+
+        now = time.monotonic()
+        digest = self._digest(token)
+        session = self._sessions.get(digest)
+
+        if session is None or session.user_id != user_id:
+            return None
+        if self._is_expired(session, now):
+            self._evict(digest)
+            return None
+
+        session.last_used_at = now
+        self._sessions.move_to_end(digest)
+        self._user_sessions[user_id].move_to_end(digest)
+
+        return bytes(session.key)
+
+    def lock(self, user_id: int, token: str) -> None:
+        """
+        Lock the vault, i.e. drop the session behind the unlock token.
+
+        Args:
+            user_id (int): The ID of the user presenting the token.
+            token (str): The unlock token.
+
+        Returns:
+            None
+        """
+
+        digest = self._digest(token)
+        session = self._sessions.get(digest)
+
+        if session is not None and session.user_id == user_id:
+            self._evict(digest)
+
+    def lock_all(self, user_id: int) -> None:
+        """
+        Drop all sessions of the user.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            None
+        """
+
+        for digest in list(self._user_sessions.get(user_id, ())):
+            self._evict(digest)
+
+
+vault_session_store = VaultSessionStore(
+    settings.VAULT_SESSION_TTL_IN_SECONDS,
+    settings.VAULT_SESSION_IDLE_TIMEOUT_IN_SECONDS,
+    settings.VAULT_SESSION_MAX_SESSIONS,
+    settings.VAULT_SESSION_MAX_SESSIONS_PER_USER,
+)